@@ -0,0 +1,464 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package aot
+#
+#   Ahead of time translation of a whole program into a Python module.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from dispatch import Dispatcher
+from jit import BlockCompiler
+from instruction_set import Add, Addi, Lw, Sw, Beq, Jalr, Halt, Fill
+from file_cache import FileCache
+from collections import OrderedDict
+import importlib.util
+import hashlib
+import os
+import sys
+
+
+##
+# Generates the source of a standalone Python module that executes
+# a translated program. The module keeps the registers in local
+# variables and chooses the trace to execute with a binary search
+# on the pc inside a while loop. It has no dependency on kindA and
+# can be executed with "python module.py".
+#
+class ModuleGenerator:
+    # Changing the generated code requires a new version,
+    # so the modules already cached are not used anymore
+    VERSION = 4
+    MAX_TRACE_LENGTH = 256
+
+    # Values of the third item returned by run
+    RUNNING = 0
+    HALTED = 1
+    MODIFIED = 2
+    OUTSIDE = 3
+
+    def __init__(self, execution_queue, virtual_machine):
+        self.execution_queue = execution_queue
+        self.virtual_machine = virtual_machine
+        self.size = len(execution_queue)
+        self.leaders = set()
+
+    ##
+    # Returns the hash that identifies the program: the words
+    # loaded on memory and the type of each instruction
+    #
+    def program_hash(self):
+        memory = self.virtual_machine.main_memory
+        digest = hashlib.sha256(f'kindA-aot-{self.VERSION}'.encode())
+        for i, inst in enumerate(self.execution_queue):
+            digest.update(f'{type(inst).__name__}:{memory.get(i, 0)};'.encode())
+        return digest.hexdigest()
+
+    ##
+    # Returns the address reached by a taken beq
+    #
+    def branch_target(self, inst, address):
+        return address + inst.displacement + 1
+
+    ##
+    # Returns the sorted list of addresses where the module may start
+    # a trace. Besides the entry, the branch targets and the return
+    # addresses, every label used by an addi or a .fill is considered
+    # a possible jalr target. Jumps to other addresses leave the module.
+    #
+    def find_leaders(self):
+        leaders = {0}
+        for address, inst in enumerate(self.execution_queue):
+            if isinstance(inst, Beq):
+                leaders.add(self.branch_target(inst, address))
+                leaders.add(address + 1)
+            elif isinstance(inst, Jalr):
+                leaders.add(address + 1)
+            elif isinstance(inst, (Addi, Fill)) and inst.symbol is not None:
+                leaders.add(inst.value)
+
+        return sorted(i for i in leaders if 0 <= i < self.size)
+
+    ##
+    # Generates the module source
+    #
+    def generate(self):
+        vm = self.virtual_machine
+        leaders = self.find_leaders()
+        self.leaders = set(leaders)
+        # only the program, the words identified by program_hash
+        memory = vm.main_memory
+        image = {address: memory.get(address, 0) for address in range(self.size)}
+
+        lines = [
+            '#!/usr/bin/env python',
+            '# coding: UTF-8',
+            '#',
+            '# Módulo gerado pelo kindA (tradução antecipada).',
+            f'# programa: {self.program_hash()}',
+            '#',
+            'import sys',
+            '',
+            f'VERSION = {self.VERSION}',
+            f'SIZE = {self.size}',
+            f'RUNNING = {self.RUNNING}',
+            f'HALTED = {self.HALTED}',
+            f'MODIFIED = {self.MODIFIED}',
+            f'OUTSIDE = {self.OUTSIDE}',
+            f'MEMORY = {image!r}',
+            f'LEADERS = frozenset({leaders!r})',
+            f'ADDRESS_ERROR = {BlockCompiler.ADDRESS_ERROR!r}',
+            f'PC_ERROR = {BlockCompiler.PC_ERROR!r}',
+            'REGISTER_ZERO_ERROR = \'Erro de Execução: O valor do "Registrador 0" não pode ser alterado.\'',
+            '',
+            '',
+            'class Fault(Exception):',
+            '    def __init__(self, address, executed, message):',
+            '        super().__init__(message)',
+            '        self.address = address',
+            '        self.executed = executed',
+            '        self.message = message',
+            '',
+            '',
+            '# Standalone executions do not check stores over the program',
+            'def ignore_store(address):',
+            '    return False',
+            '',
+            '',
+            '# Executes from pc until a halt, an address that does not start a',
+            '# block, a store that changes the program or the end of the budget.',
+            '# read(address) and write(address, value) access the main memory.',
+            '# Returns (pc, executed instructions, state).',
+            'def run(regs, read, write, pc=0, budget=sys.maxsize, store=ignore_store):',
+            '    r1, r2, r3, r4, r5, r6, r7 = regs[1:8]',
+            '    n = 0',
+            '    try:',
+            '        while True:',
+        ]
+        lines += self.dispatch_tree(leaders, ' ' * 12)
+        lines += [
+            '    finally:',
+            '        regs[1:8] = [r1, r2, r3, r4, r5, r6, r7]',
+            '',
+            '',
+            'def main():',
+            '    regs = [0] * 8',
+            '    memory = dict(MEMORY)',
+            '    try:',
+            '        pc, executed, state = run(regs, lambda address: memory.get(address, 0),',
+            '                                  memory.__setitem__)',
+            '    except Fault as fault:',
+            '        print(fault.message)',
+            '        return 1',
+            '    print(\' | \'.join(f\'r{i}: {v}\' for i, v in enumerate(regs)))',
+            '    print(f\'Pc: {pc}  instruções: {executed}\')',
+            '    return 0 if state == HALTED else 1',
+            '',
+            '',
+            'if __name__ == \'__main__\':',
+            '    sys.exit(main())',
+        ]
+
+        return '\n'.join(lines) + '\n'
+
+    ##
+    # Generates the binary search over the leaders
+    #
+    def dispatch_tree(self, leaders, indent):
+        if len(leaders) <= 4:
+            lines = []
+            for i, leader in enumerate(leaders):
+                keyword = 'if' if i == 0 else 'elif'
+                lines.append(f'{indent}{keyword} pc == {leader}:')
+                lines += self.trace(leader, indent + '    ')
+            if not leaders:
+                return lines + [f'{indent}return pc, n, OUTSIDE']
+            lines.append(f'{indent}else:')
+            lines.append(f'{indent}    return pc, n, OUTSIDE')
+            return lines
+
+        middle = len(leaders) // 2
+        lines = [f'{indent}if pc < {leaders[middle]}:']
+        lines += self.dispatch_tree(leaders[:middle], indent + '    ')
+        lines.append(f'{indent}else:')
+        lines += self.dispatch_tree(leaders[middle:], indent + '    ')
+        return lines
+
+    ##
+    # Returns the addresses of the trace that starts on entry: the
+    # instructions follow the not taken side of each beq (or the target
+    # of an unconditional beq) until a jalr, a halt, an instruction
+    # already in the trace or an invalid address.
+    #
+    def find_trace(self, entry):
+        addresses = []
+        address = entry
+        while 0 <= address < self.size and address not in addresses \
+                and len(addresses) < self.MAX_TRACE_LENGTH:
+            addresses.append(address)
+            inst = self.execution_queue[address]
+            if isinstance(inst, (Jalr, Halt, int)):
+                break
+            if isinstance(inst, Beq) and inst.reg_a == inst.reg_b:
+                address = self.branch_target(inst, address)
+            else:
+                address += 1
+        return addresses
+
+    ##
+    # Generates the code of the trace that starts on entry. The trace
+    # runs inside its own while loop, so a jump back to the entry does
+    # not go through the dispatch.
+    #
+    def trace(self, entry, indent):
+        addresses = self.find_trace(entry)
+        length = len(addresses)
+        body = indent + '    '
+        max_address = self.virtual_machine.MAX_MEM_ADDRESS
+
+        def reg(r):
+            return f'r{r}' if r else '0'
+
+        def fault(address, k, message, level=body):
+            return [f'{level}raise Fault({address}, n + {k}, {message})']
+
+        # Code that goes to target after k + 1 instructions of the trace
+        def jump(target, k, level=body):
+            if target == entry:
+                return [f'{level}n += {k + 1}',
+                        f'{level}if n + {length} > budget:',
+                        f'{level}    break',
+                        f'{level}continue']
+            if 0 <= target < self.size:
+                return [f'{level}n += {k + 1}', f'{level}pc = {target}', f'{level}break']
+            return [f'{level}return {target}, n + {k + 1}, OUTSIDE']
+
+        lines = [f'{indent}if n + {length} > budget:',
+                 f'{indent}    return pc, n, RUNNING',
+                 f'{indent}while True:']
+
+        for k, address in enumerate(addresses):
+            inst = self.execution_queue[address]
+            following = address + 1
+            lines.append(f'{body}# {address}: {inst}')
+
+            if isinstance(inst, int):
+                message = (f'Erro de execução: "{inst}" não é uma instrução válida.'
+                           f'\n(endereço de memória: {address})')
+                return lines + fault(address, k, repr(message))
+
+            if isinstance(inst, Add):
+                if inst.reg_dest == 0:
+                    return lines + fault(address, k, 'REGISTER_ZERO_ERROR')
+                lines.append(f'{body}r{inst.reg_dest} = {reg(inst.reg_a)} + {reg(inst.reg_b)}')
+            elif isinstance(inst, Addi):
+                if inst.reg_b == 0:
+                    return lines + fault(address, k, 'REGISTER_ZERO_ERROR')
+                immediate = inst.immediate
+                lines.append(f'{body}r{inst.reg_b} = {reg(inst.reg_a)} + {immediate}')
+            elif isinstance(inst, (Lw, Sw)):
+                displacement = inst.displacement
+                if inst.reg_a == 0:
+                    # constant address
+                    target = displacement
+                    if not 0 <= target <= max_address:
+                        return lines + fault(address, k, f'ADDRESS_ERROR.format({target})')
+                else:
+                    target = 't'
+                    lines.append(f'{body}t = r{inst.reg_a} + {displacement}')
+                    lines.append(f'{body}if not 0 <= t <= {max_address}:')
+                    lines += fault(address, k, 'ADDRESS_ERROR.format(t)', body + '    ')
+                if isinstance(inst, Lw):
+                    if inst.reg_b == 0:
+                        return lines + fault(address, k, 'REGISTER_ZERO_ERROR')
+                    lines.append(f'{body}r{inst.reg_b} = read({target})')
+                else:
+                    lines.append(f'{body}write({target}, {reg(inst.reg_b)})')
+                    if target == 't' or target < self.size:
+                        condition = 't < SIZE and ' if target == 't' else ''
+                        lines.append(f'{body}if {condition}store({target}):')
+                        lines.append(f'{body}    return {following}, n + {k + 1}, MODIFIED')
+            elif isinstance(inst, Beq):
+                target = self.branch_target(inst, address)
+                if inst.reg_a == inst.reg_b:
+                    if target < 0:
+                        return lines + fault(address, k, 'PC_ERROR')
+                    following = target
+                else:
+                    lines.append(f'{body}if {reg(inst.reg_a)} == {reg(inst.reg_b)}:')
+                    if target < 0:
+                        lines += fault(address, k, 'PC_ERROR', body + '    ')
+                    else:
+                        lines += jump(target, k, body + '    ')
+            elif isinstance(inst, Jalr):
+                if inst.reg_b == 0:
+                    return lines + fault(address, k, 'REGISTER_ZERO_ERROR')
+                lines.append(f'{body}t = {reg(inst.reg_a)}')
+                lines.append(f'{body}r{inst.reg_b} = {following}')
+                lines.append(f'{body}if t < 0:')
+                lines += fault(address, k, 'PC_ERROR', body + '    ')
+                lines.append(f'{body}n += {k + 1}')
+                lines.append(f'{body}pc = t')
+                lines.append(f'{body}break')
+                return lines
+            elif isinstance(inst, Halt):
+                lines.append(f'{body}return {address}, n + {k + 1}, HALTED')
+                return lines
+
+            if k == length - 1:
+                lines += jump(following, k)
+
+        return lines
+
+
+##
+# Stores the generated modules in a directory, one file
+# per program, named after the program hash. Only the MAX_FILES
+# modules used most recently are kept on the disk and the
+# MAX_MODULES used most recently stay imported.
+#
+# @see FileCache
+class ModuleCache(FileCache):
+    SUBDIRECTORY = 'aot'
+    MAX_FILES = 256
+    MAX_MODULES = 32
+
+    def __init__(self, directory=None):
+        super().__init__(directory)
+        # program hash -> imported module, the least recently used first
+        self.modules = OrderedDict()
+
+    ##
+    # Returns the path of the module of a program
+    #
+    def module_path(self, program_hash):
+        return self.file_path(f'{program_hash}.py')
+
+    ##
+    # Returns the module of a program, generating and
+    # saving it when it is not in the cache
+    #
+    # @param generator ModuleGenerator of the program
+    def load(self, generator):
+        program_hash = generator.program_hash()
+        module = self.modules.get(program_hash)
+        if module is not None:
+            self.modules.move_to_end(program_hash)
+            return module
+
+        path = self.module_path(program_hash)
+        if os.path.exists(path):
+            self.touch(path)
+        else:
+            self.save(path, generator.generate())
+            self.prune()
+
+        spec = importlib.util.spec_from_file_location(f'kinda_{program_hash}', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        self.modules[program_hash] = module
+        if len(self.modules) > self.MAX_MODULES:
+            self.modules.popitem(last=False)
+        return module
+
+    ##
+    # Writes a module atomically, so a concurrent run never
+    # reads a partial file
+    #
+    def save(self, path, source):
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(source)
+        os.replace(temporary, path)
+
+
+##
+# Executes a program with its ahead of time translated module.
+# Addresses that do not start a block of the module run on the
+# Dispatcher handlers, and after a store changes the program
+# the execution continues only on the handlers.
+#
+# @see ModuleGenerator
+# @see Dispatcher
+class AheadOfTimeRunner(Dispatcher):
+    def __init__(self, execution_queue, virtual_machine, cache=None):
+        super().__init__(execution_queue, virtual_machine)
+        if cache is None:
+            cache = ModuleCache()
+        self.module = cache.load(ModuleGenerator(execution_queue, virtual_machine))
+        self.modified = False
+
+    ##
+    # Updates the handler of an address after a store
+    #
+    # @return True if the program was changed
+    def store_on_program(self, address):
+        super().store_on_program(address)
+        if self.memory[address] != self.words[address]:
+            self.modified = True
+        return self.modified
+
+    ##
+    # Executes the program from pc. Stops on the same
+    # conditions of Dispatcher.run.
+    #
+    # @param pc address of the first instruction
+    # @param max_steps limit of instructions to execute (None: no limit)
+    # @return number of instructions executed
+    def run(self, pc, max_steps=None):
+        if max_steps is None:
+            max_steps = sys.maxsize
+
+        module = self.module
+        table = self.table
+        leaders = module.LEADERS
+        executed = 0
+        self.halted = False
+
+        while executed < max_steps and not self.modified:
+            if not 0 <= pc < self.size:
+                self.pc = -1
+                self.steps += executed
+                return executed
+
+            if pc in leaders:
+                try:
+                    pc, count, state = module.run(self.registers, self.read, self.write, pc,
+                                                  max_steps - executed, self.store_on_program)
+                except module.Fault as fault:
+                    self.pc = fault.address
+                    self.steps += executed + fault.executed
+                    raise ValueError(fault.message)
+                executed += count
+                if state == module.HALTED:
+                    self.pc = pc
+                    self.halted = True
+                    self.steps += executed
+                    return executed
+                if count or state != module.RUNNING:
+                    continue
+
+            # the trace does not fit on max_steps or pc does not start one
+            try:
+                nxt = table[pc]()
+            except ValueError:
+                self.pc = pc
+                self.steps += executed
+                raise
+            executed += 1
+            if nxt == self.HALT:
+                self.pc = pc
+                self.halted = True
+                self.steps += executed
+                return executed
+            pc = -1 if nxt == self.INVALID_PC else nxt
+
+        self.steps += executed
+        self.pc = pc
+        if self.modified and executed < max_steps:
+            executed += super().run(pc, max_steps - executed)
+
+        return executed
@@ -10,6 +10,18 @@
 #
 
 from instruction_set import *
+from object_file import ObjectFile
+from file_cache import FileCache
+from array import array
+import hashlib
+import os
+import sys
+
+try:
+    import numpy
+except ImportError:
+    # the images are decoded word by word
+    numpy = None
 
 
 ##
@@ -18,6 +30,34 @@ from instruction_set import *
 #
 # @see Instruction
 class Assembler:
+    # Changes when a source is translated to other words or labels,
+    # so the translations kept by the AssemblyCache are discarded
+    VERSION = 1
+    MACHINE_CODE_EXTENSION = '.mc'
+    IMAGE_EXTENSION = '.bin'
+    # Words read at a time from an image file (see read_image_file)
+    IMAGE_CHUNK = 1 << 16
+
+    def __init__(self):
+        # label name -> address of the last assembled text
+        self.labels = dict()
+        # image of the last assembled source (None if it was machine
+        # code or a word could not be encoded)
+        self.words = None
+        # True if the last source was translated from the previous one
+        self.incremental = False
+        # lines, instructions and labels of the last assembled source,
+        # reused by the next translation (see translate_changes)
+        self.cached_lines = []
+        self.cached_instructions = []
+        self.cached_labels = dict()
+        self.cached_words = None
+        # (address, number of words) of the blocks of the last
+        # assembled source (see Block) and True if one of them was
+        # read from a file
+        self.blocks = []
+        self.external = False
+
     ##
     # Process user input text and return a vector with
     # lists of terms one for each line
@@ -26,100 +66,618 @@ class Assembler:
     # @retur [[srt]]
     @staticmethod
     def process_text(text: str):
-        text = text.strip().split('\n')
-        t_processado = []
-        for line in text:
-            t_processado.append(line.strip().split())
-        return t_processado
+        return [line.split() for line in text.strip().split('\n')]
 
     ##
-    # Translates a line of processed text into an instruction
+    # Translates a line of processed text into an instruction.
+    # The instruction class is found on the INSTRUCTION_SET registry.
     #
     # @return an Instruction class object
     @staticmethod
     def translate_line(line: [str]):
-        label = None
-        ops = []
-        utils = InstructionsUtils()
-
         if not line:
             raise ValueError('A linha está vazia')
 
-        if ':' in line[0]:
-            try:
-                if line[0][0].isalpha():
-                    label = line[0].strip().strip(':').lower()
-                    name = line[1].strip().lower()
-                    ini = 2
-                else:
-                    raise ValueError('O label só pode começar com letras.')
-            except IndexError:
+        first = line[0]
+        if ':' in first:
+            if not first[0].isalpha():
+                raise ValueError('O label só pode começar com letras.')
+            if len(line) < 2:
                 raise ValueError('Sintaxe incorreta.')
-            except ValueError as err:
-                raise ValueError(err)
+            label = first.strip(':').lower()
+            name = line[1].lower()
+            ops = line[2:]
         else:
-            name = line[0].strip().lower()
-            ini = 1
+            label = None
+            name = first.lower()
+            ops = line[1:]
 
-        for term in line[ini:]:
-            ops.append(term)
-
-        if not utils.is_valid_instruction_name(name):
+        instruction_class = INSTRUCTION_SET.get(name)
+        if instruction_class is None:
             raise ValueError(f'"{name}" não é uma instrução válida.')
 
         try:
-            if name == 'add':
-                instruction = Add(label, ops)
-            elif name == 'addi':
-                instruction = Addi(label, ops)
-            elif name == 'lw':
-                instruction = Lw(label, ops)
-            elif name == 'sw':
-                instruction = Sw(label, ops)
-            elif name == 'beq':
-                instruction = Beq(label, ops)
-            elif name == 'jalr':
-                instruction = Jalr(label, ops)
-            elif name == 'halt':
-                instruction = Halt(label)
-            elif name == 'noop':
-                instruction = Noop(label)
-            elif name == '.fill':
-                instruction = Fill(label, ops)
-            else:
-                raise ValueError(f'"{name}" não é uma instrução válida.')
-        except (ValueError, TypeError) as err:
+            return instruction_class(label, ops)
+        except TypeError as err:
             raise ValueError(err)
 
-        return instruction
-
     ##
-    # Translates text into a list of instructions
+    # Translates text into a list of instructions.
+    # The first pass translates the lines and builds the symbol table
+    # (the labels attribute), the second one replaces the labels used
+    # as operands by their values, so the instructions never look up
+    # labels during the execution.
+    # raises *ValueError* if a line can not be translated or uses a
+    # label that does not exist or does not fit in its field
     #
     # @return a list of Instruction class instances
     #
     # @see Instruction
     def assemble(self, text: str):
-        translated = []
+        self.labels = dict()
+        self.words = None
+        self.incremental = False
+        self.blocks = []
+        self.external = False
 
         if text.strip() == '':
+            self.forget()
+            return []
+
+        return self.translate_text(text)
+
+    ##
+    # Translates a text that is not empty, see assemble. A source
+    # is translated by translate_changes when the assembler keeps the
+    # translation of a previous source and by translate_source
+    # otherwise or if the changes have an error, so the errors are
+    # always reported as the complete translation finds them.
+    #
+    def translate_text(self, text):
+        lines = text.strip().split('\n')
+
+        if self.cached_lines:
+            try:
+                translated = self.translate_changes(lines)
+            except ValueError:
+                translated = None
+                self.labels = dict()
+            if translated is not None:
+                self.incremental = True
+                return self.keep(lines, translated)
+        self.forget()
+
+        translated = []
+        processed_text = [line.split() for line in lines]
+
+        # the usual machine code is read at once, the other forms
+        # accepted by is_binary_code word by word
+        image = self.read_image(processed_text)
+        if image is not None:
+            return self.decode_image(image)
+
+        # the number of the line is found only when it fails
+        try:
+            if self.is_binary_code(processed_text):
+                shared = dict()
+                for line in processed_text:
+                    instruction = self.decode_line(line[0])
+                    translated.append(shared.setdefault(instruction.word, instruction))
+                return translated
+        except ValueError as err:
+            raise ValueError(f'Erro de tradução na linha {len(translated) + 1}: {err}')
+
+        translated = self.translate_source(processed_text)
+        self.words = self.encode_words(translated)
+        return self.keep(lines, translated)
+
+    ##
+    # Keeps a translation of a source made elsewhere (loaded from an
+    # object file, see Engine.load_cached) for the next translation
+    #
+    # @param text source
+    # @param translated list of Instruction class instances, with their
+    # labels and symbols
+    # @param labels dictionary of label name -> address
+    # @param words buffer with the image of the source
+    def adopt(self, text, translated, labels, words):
+        self.labels = dict(sorted(labels.items(), key=lambda item: item[1]))
+        self.words = array('i', words)
+        self.incremental = False
+        self.blocks = []
+        self.external = False
+        lines = text.strip().split('\n')
+        if self.has_blocks(text, lines):
+            self.forget()
+        else:
+            self.keep(lines, list(translated))
+
+    ##
+    # Returns True if a line of a text uses a directive of blocks (see
+    # Block) as its instruction. The names in labels, operands and
+    # comments do not count.
+    #
+    # @param text source
+    # @param lines of the source
+    @staticmethod
+    def has_blocks(text, lines):
+        lowered = text.lower()
+        if not any(name in lowered for name in BLOCKS):
+            return False
+
+        for line in lines:
+            terms = line.split(None, 2)
+            if terms and ':' in terms[0]:
+                terms = terms[1:]
+            if terms and terms[0].lower() in BLOCKS:
+                return True
+        return False
+
+    ##
+    # Returns True if the assembler keeps the translation of a text
+    #
+    # @param text source
+    def holds(self, text):
+        return bool(self.cached_lines) and self.cached_lines == text.strip().split('\n')
+
+    ##
+    # Returns the line of a text where its first instruction is,
+    # counting from 1, as assemble skips the blank lines at the start
+    #
+    # @param text source
+    @staticmethod
+    def first_line(text):
+        return text[:len(text) - len(text.lstrip())].count('\n') + 1
+
+    ##
+    # Keeps the translation of a source for the next one. The lines
+    # of a source with blocks are not its addresses, so it is not
+    # kept and its next changes are translated as a whole.
+    #
+    # @param lines of the source
+    # @param translated list of Instruction class instances
+    # @return a copy of the list, that the caller may change
+    def keep(self, lines, translated):
+        if self.blocks:
+            self.forget()
             return translated
+        self.cached_lines = lines
+        self.cached_instructions = translated
+        self.cached_labels = dict(self.labels)
+        self.cached_words = self.words
+        return list(translated)
 
-        processed_text = self.process_text(text)
+    ##
+    # Translates the lines of a source in two passes, see assemble
+    #
+    # @param processed_text list of lines, see process_text
+    # @return a list of Instruction class instances
+    def translate_source(self, processed_text):
+        translated = []
+        labels = self.labels
+        # label name -> line where it was defined
+        defined = dict()
 
-        is_binary_code = self.is_binary_code(processed_text)
+        number = 0
+        try:
+            translate_line = self.translate_line
+            for number, line in enumerate(processed_text, 1):
+                instruction = translate_line(line)
+                label = instruction.label
+                if label is not None:
+                    if label in labels:
+                        raise ValueError(f'O label "{label}" já foi definido na linha '
+                                         f'{defined[label]}.')
+                    labels[label] = len(translated)
+                    defined[label] = number
+                if isinstance(instruction, Block):
+                    self.blocks.append((len(translated), instruction.size))
+                    self.external = self.external or instruction.EXTERNAL
+                    translated.extend(instruction.expand())
+                else:
+                    translated.append(instruction)
+        except ValueError as err:
+            raise ValueError(f'Erro de tradução na linha {number}: {err}')
 
-        for i, line in enumerate(processed_text):
+        for i, instruction in enumerate(translated):
+            try:
+                translated[i] = instruction.resolve_labels(labels, i)
+            except ValueError as err:
+                raise ValueError(f'Erro de tradução na linha {self.line_of(i, self.blocks)}: {err}')
+
+        return translated
+
+    ##
+    # Returns the line (from 1) of the instruction on an address, as
+    # the lines of the blocks (see Block) place many words or none
+    #
+    # @param address of an instruction that is not in a block
+    # @param blocks list of (address, number of words) of the blocks
+    @staticmethod
+    def line_of(address, blocks):
+        return address + 1 - sum(size - 1 for start, size in blocks if start + size <= address)
+
+    ##
+    # Translates a source reusing the translation of the previous
+    # one. The lines equal to the old ones at the same position, or
+    # at the same distance from the end after the lines that changed,
+    # keep their instructions; only the other lines are translated.
+    # The labels are resolved again only by the new instructions, by
+    # the ones that moved and by the ones that use a label that moved.
+    # The instructions are immutable, so the old translation is never
+    # modified.
+    # raises *ValueError* on any error, reported by translate_source
+    #
+    # @param lines of the source
+    # @return a list of Instruction class instances or None if no
+    # line was kept or a changed line is a block (see keep)
+    def translate_changes(self, lines):
+        old_lines = self.cached_lines
+        old_instructions = self.cached_instructions
+        old_labels = self.cached_labels
+        size = len(lines)
+        old_size = len(old_lines)
+
+        limit = min(size, old_size)
+        prefix = self.count_equal(lines, old_lines, limit)
+        suffix = self.count_equal(lines[::-1], old_lines[::-1], limit - prefix)
+        # a line of a source is never machine code, so only a text
+        # that keeps lines of the last source is surely a source
+        if prefix + suffix == 0:
+            return None
+        shift = size - old_size
+        end = size - suffix
+        old_end = old_size - suffix
+
+        # the labels of the changed lines are defined again
+        labels = dict(old_labels)
+        moved = set()
+        for instruction in old_instructions[prefix:old_end]:
+            if instruction.label is not None:
+                del labels[instruction.label]
+                moved.add(instruction.label)
+        relabeled = bool(moved)
+
+        middle = []
+        fresh = set()
+        for i in range(prefix, end):
+            line = lines[i]
+            if i < old_size and line == old_lines[i]:
+                instruction = old_instructions[i]
+            else:
+                instruction = self.translate_line(line.split())
+                if isinstance(instruction, Block):
+                    return None
+                fresh.add(i)
+            label = instruction.label
+            if label is not None:
+                if label in labels:
+                    raise ValueError(f'O label "{label}" já foi definido.')
+                labels[label] = i
+                relabeled = True
+                if old_labels.get(label) == i:
+                    moved.discard(label)
+                else:
+                    moved.add(label)
+            middle.append(instruction)
+
+        translated = old_instructions[:prefix] + middle + old_instructions[old_end:]
+
+        # the lines kept at the end move with their labels
+        shifted = set()
+        if shift:
+            for i in range(end, size):
+                label = translated[i].label
+                if label is not None:
+                    labels[label] = i
+                    shifted.add(label)
+
+        # the value of a beq changes when it moves apart from its
+        # label, the other values when the label moves
+        pending = set(fresh)
+        if moved or shift:
+            moved |= shifted
+            for i, instruction in enumerate(translated):
+                symbol = instruction.symbol
+                if symbol is None:
+                    continue
+                if shift and i >= end and isinstance(instruction, Beq):
+                    if symbol not in shifted:
+                        pending.add(i)
+                elif symbol in moved:
+                    pending.add(i)
+        if relabeled:
+            labels = dict(sorted(labels.items(), key=lambda item: item[1]))
+        self.labels = labels
+
+        for i in sorted(pending):
+            translated[i] = translated[i].resolve_labels(labels, i)
+
+        self.words = self.encode_changes(translated, prefix, end, shift, pending)
+        return translated
+
+    ##
+    # Returns the number of equal lines at the start of two lists,
+    # comparing blocks of lines before comparing them one by one
+    #
+    # @param limit of lines compared
+    @staticmethod
+    def count_equal(lines, old_lines, limit):
+        count = 0
+        block = 1024
+        while count + block <= limit and \
+                lines[count:count + block] == old_lines[count:count + block]:
+            count += block
+        while count < limit and lines[count] == old_lines[count]:
+            count += 1
+        return count
+
+    ##
+    # Returns the image of the instructions of a source, or None if
+    # a word can not be encoded (the Engine reports it when it writes
+    # the main memory)
+    #
+    # @param translated list of Instruction class instances, whose
+    # instructions are shared (see share) if the words are encoded
+    # @return array('i') with the words
+    def encode_words(self, translated):
+        try:
+            words = array('i', [instruction.get_word() for instruction in translated])
+        except (ValueError, OverflowError):
+            return None
+        self.share(translated, range(len(translated)), dict())
+        return words
+
+    ##
+    # Returns the image of a source translated by translate_changes,
+    # changing only the words of the changed lines on the image of
+    # the previous source
+    #
+    # @param translated list of Instruction class instances
+    # @param prefix number of lines kept at the start
+    # @param end position of the first line kept at the end
+    # @param shift difference between the new and the old number of lines
+    # @param pending positions of the instructions that resolved labels
+    # @return array('i') with the words, see encode_words
+    def encode_changes(self, translated, prefix, end, shift, pending):
+        old = self.cached_words
+        if old is None:
+            return self.encode_words(translated)
+
+        try:
+            words = old[:prefix] + \
+                array('i', [translated[i].get_word() for i in range(prefix, end)]) + \
+                old[end - shift:]
+            for i in pending:
+                words[i] = translated[i].get_word()
+        except (ValueError, OverflowError):
+            return None
+        shared = dict()
+        self.share(translated, range(prefix, end), shared)
+        self.share(translated, pending, shared)
+        return words
+
+    ##
+    # Replaces the encoded instructions of a translation without label
+    # and symbol by a single instruction per word, so the lines that
+    # repeat an instruction (noop, .fill 0) share one object. The
+    # label and the symbol stay on the instructions that have them,
+    # the only data of an instruction that depends on its line. A
+    # .fill that holds the word of an instruction is not shared.
+    #
+    # @param translated list of Instruction class instances
+    # @param positions of the instructions that may be shared
+    # @param shared dictionary of word -> instruction
+    @staticmethod
+    def share(translated, positions, shared):
+        for i in positions:
+            instruction = translated[i]
+            if instruction.label is None and instruction.symbol is None:
+                other = shared.setdefault(instruction.word, instruction)
+                if other.__class__ is instruction.__class__:
+                    translated[i] = other
+
+    ##
+    # Discards the translation kept for the next source
+    #
+    def forget(self):
+        self.cached_lines = []
+        self.cached_instructions = []
+        self.cached_labels = dict()
+        self.cached_words = None
+
+    ##
+    # Translates a source read line by line and writes its machine
+    # code (one hexadecimal word per line) to an output, keeping in
+    # memory only the symbol table. The source is read twice: the
+    # first pass finds the labels and the second one translates each
+    # line, resolves its labels and writes its word.
+    # raises *ValueError* if a line can not be translated or uses a
+    # label that does not exist or does not fit in its field
+    #
+    # @param source text file (or any seekable stream of lines)
+    # @param output text file where the words are written
+    # @return number of words written
+    def assemble_stream(self, source, output):
+        self.labels = dict()
+        labels = self.labels
+        start = source.tell()
+
+        # first pass
+        is_binary_code = True
+        duplicate = None
+        # label name -> line where it was defined
+        defined = dict()
+        address = 0
+        for i, line in enumerate(self.read_lines(source)):
+            if is_binary_code:
+                is_binary_code = self.is_binary_code([line])
+            first = line[0] if line else ''
+            labeled = ':' in first and first[0].isalpha() and len(line) > 1
+            if labeled:
+                label = first.strip(':').lower()
+                if label not in labels:
+                    labels[label] = address
+                    defined[label] = i
+                elif duplicate is None:
+                    duplicate = (i, f'O label "{label}" já foi definido na linha '
+                                    f'{defined[label] + 1}.')
+            address += self.count_words(line, labeled)
+
+        # second pass
+        source.seek(start)
+        write = output.write
+        translate_line = self.translate_line
+        count = 0
+        for i, line in enumerate(self.read_lines(source)):
             try:
                 if is_binary_code:
                     instruction = self.decode_line(line[0])
                 else:
-                    instruction = self.translate_line(line)
-                translated.append(instruction)
+                    if duplicate is not None and duplicate[0] == i:
+                        raise ValueError(duplicate[1])
+                    instruction = translate_line(line)
+                    if isinstance(instruction, Block):
+                        instruction.write_hexa(write)
+                        count += instruction.size
+                        continue
+                    instruction = instruction.resolve_labels(labels, count)
+                write(instruction.get_hexa_representation() + '\n')
             except ValueError as err:
                 raise ValueError(f'Erro de tradução na linha {i + 1}: {err}')
+            count += 1
 
-        return translated
+        return count
+
+    ##
+    # Returns the number of words that a line of a source places: the
+    # size of a block (see Block) or one word. A line with an error
+    # counts as one word, the error is reported when it is translated.
+    #
+    # @param line list of terms, see process_text
+    # @param labeled True if the first term is a label
+    def count_words(self, line, labeled):
+        if len(line) <= labeled or line[labeled].lower() not in BLOCKS:
+            return 1
+        try:
+            return self.translate_line(line).size
+        except ValueError:
+            return 1
+
+    ##
+    # Checks a text and returns all its errors at once, instead of
+    # stopping at the first one like assemble. The lines with errors
+    # are skipped, so each error is reported only once.
+    #
+    # @param text source or machine code
+    # @return list of (line of the text, message) pairs in line order,
+    # counting the lines from 1 with the blank lines at the start
+    def diagnose(self, text: str):
+        self.labels = dict()
+        if text.strip() == '':
+            return []
+
+        # assemble does not count the blank lines at the start
+        first = self.first_line(text)
+        processed_text = self.process_text(text)
+        if self.read_image(processed_text) is not None or self.is_binary_code(processed_text):
+            return []
+
+        errors = []
+        # (line, address, instruction) of the lines translated
+        translated = []
+        # label name -> line where it was defined
+        defined = dict()
+        address = 0
+        for i, line in enumerate(processed_text):
+            size = 1
+            try:
+                instruction = self.translate_line(line)
+                label = instruction.label
+                if label in self.labels:
+                    raise ValueError(f'O label "{label}" já foi definido na linha '
+                                     f'{first + defined[label]}.')
+                if label is not None:
+                    self.labels[label] = address
+                    defined[label] = i
+                if isinstance(instruction, Block):
+                    size = instruction.size
+                else:
+                    translated.append((i, address, instruction))
+            except ValueError as err:
+                errors.append((first + i, str(err)))
+            address += size
+
+        for i, address, instruction in translated:
+            try:
+                instruction = instruction.resolve_labels(self.labels, address)
+            except ValueError as err:
+                errors.append((first + i, str(err)))
+                continue
+            try:
+                instruction.get_word()
+            except ValueError as err:
+                errors.append((first + i, f'O valor não cabe na palavra da instrução ({err}).'))
+
+        return sorted(errors, key=lambda error: error[0])
+
+    ##
+    # Translates a source with assemble_stream and saves the machine
+    # code on a file. The file is replaced only if the translation
+    # succeeds.
+    # raises *ValueError* if the source can not be translated and
+    # *OSError* if the file can not be written
+    #
+    # @param source text file (or any seekable stream of lines)
+    # @param path of the machine code file
+    # @return number of words written
+    def assemble_file(self, source, path):
+        temporary = f'{path}.tmp'
+        try:
+            with open(temporary, 'w') as output:
+                count = self.assemble_stream(source, output)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return count
+
+    ##
+    # Translates a source text and saves it as an object file
+    # (see ObjectFile), with its labels and the line of the source
+    # where the program starts.
+    # raises *ValueError* if the source can not be translated and
+    # *OSError* if the file can not be written
+    #
+    # @param text source or machine code
+    # @param path of the object file
+    # @return number of words written
+    def assemble_object(self, text, path):
+        instructions = self.assemble(text)
+        ObjectFile.write(path, instructions, self.labels, self.first_line(text))
+        return len(instructions)
+
+    ##
+    # Reads the lines of a source as lists of terms, like process_text:
+    # the blank lines before the first and after the last instruction
+    # are skipped
+    #
+    # @param source iterable of lines
+    @staticmethod
+    def read_lines(source):
+        blank = 0
+        started = False
+        for text in source:
+            line = text.split()
+            if not line:
+                blank += started
+                continue
+            started = True
+            for _ in range(blank):
+                yield []
+            blank = 0
+            yield line
 
     ##
     # Checks whether a rendered text is a binary code
@@ -142,62 +700,229 @@ class Assembler:
         return True
 
     ##
-    # Converts an binary code entry to a list of instructions
+    # Reads a binary code made only of hexadecimal digits (the usual
+    # .mc file) at once
     #
-    # @return a list of Instruction class instances
+    # @return the words as big endian bytes or None if the text is
+    # not in this format
     @staticmethod
-    def decode_line(text):
-        bin_converted = ''
-        for ch in text:
-            ch = bin(int(ch, 16))[2:]
-            ch = '0' * (4 - len(ch)) + ch
-            bin_converted += ch
+    def read_image(processed_text):
+        if set(map(len, processed_text)) != {1}:
+            return None
 
-        label = None
-        name = bin_converted[0:10]
-        op0 = bin_converted[10:13]
-        op1 = bin_converted[13:16]
-        op2 = bin_converted[17:]
+        words = [line[0] for line in processed_text]
+        if set(map(len, words)) != {8}:
+            return None
 
-        utils = InstructionsUtils()
+        try:
+            return bytes.fromhex(''.join(words))
+        except ValueError:
+            return None
 
+    ##
+    # Reads the words of an image file in chunks of IMAGE_CHUNK words,
+    # without keeping its text: a machine code file (.mc, one word of
+    # 8 hexadecimal digits per line) or a raw binary image (signed 32
+    # bit little endian words, like the files of .incbin).
+    # raises *ValueError* if the file can not be read, is not an image
+    # or has more than limit words
+    #
+    # @param path of the file
+    # @param limit largest number of words (None: no limit)
+    # @return array('i') with the words
+    @staticmethod
+    def read_image_file(path, limit=None):
+        words = array('i')
         try:
-            name = int(name, 2)
-            if 0 <= name <= 7:
-                name = utils.get_name_by_code(name)
-                op0 = int(op0, 2)
-                op1 = int(op1, 2)
-                op2 = utils.twos_complement_binary_to_int(op2)
+            if os.path.splitext(path)[1].lower() == Assembler.MACHINE_CODE_EXTENSION:
+                with open(path, 'r', encoding='ascii') as f:
+                    first = 1
+                    for lines in iter(lambda: f.readlines(Assembler.IMAGE_CHUNK * 9), []):
+                        words.frombytes(Assembler.read_image_lines(lines, first))
+                        first += len(lines)
+                        if limit is not None and len(words) > limit:
+                            break
+                if sys.byteorder == 'little':
+                    words.byteswap()
             else:
-                name = '.fill'
-                op0 = utils.twos_complement_binary_to_int(bin_converted)
+                with open(path, 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    if size % words.itemsize:
+                        raise ValueError(f'A imagem "{path}" não tem um número inteiro de palavras.')
+                    count = size // words.itemsize
+                    if limit is not None and count > limit:
+                        count = limit + 1
+                    while len(words) < count:
+                        words.fromfile(f, min(Assembler.IMAGE_CHUNK, count - len(words)))
+                if sys.byteorder != 'little':
+                    words.byteswap()
+        except (OSError, EOFError, UnicodeDecodeError) as err:
+            raise ValueError(f'Não foi possível ler a imagem "{path}": {err}')
+
+        if limit is not None and len(words) > limit:
+            raise ValueError(f'A imagem "{path}" não cabe na memória principal ({limit} palavras).')
+        return words
+
+    ##
+    # Converts lines of a machine code file to the bytes of their
+    # words, see read_image_file
+    # raises *ValueError* if a line is not a word of 8 hexadecimal digits
+    #
+    # @param lines of the file
+    # @param first number of the first line, for the error message
+    # @return the words as big endian bytes
+    @staticmethod
+    def read_image_lines(lines, first):
+        words = [line.strip() for line in lines]
+        if set(map(len, words)) <= {0, 8}:
+            try:
+                # fromhex skips spaces inside the lines
+                data = bytes.fromhex(''.join(words))
+                if len(data) == 4 * (len(words) - words.count('')):
+                    return data
+            except ValueError:
+                pass
+
+        for number, word in enumerate(words, first):
+            try:
+                if word and (len(word) != 8 or len(bytes.fromhex(word)) != 4):
+                    raise ValueError
+            except ValueError:
+                raise ValueError(f'Decodificação: a linha {number} ("{word[:20]}") não é uma '
+                                 f'palavra de 8 dígitos hexadecimais.')
+        return b''
+
+    ##
+    # Decodes a binary code image at once, see decode_words
+    #
+    # @param image words as big endian bytes, see read_image
+    # @return a list of Instruction class instances
+    @staticmethod
+    def decode_image(image):
+        words = array('i', image)
+        if sys.byteorder == 'little':
+            words.byteswap()
+        return Assembler.decode_words(words)
+
+    ##
+    # Decodes a buffer of words at once. Each distinct word is decoded
+    # only once and its instruction is shared by all the addresses
+    # that hold it. With NumPy, the distinct words are found by
+    # numpy.unique and their fields are extracted by vectorized shifts
+    # and masks; otherwise each word is decoded by decode_word.
+    #
+    # @param words buffer of signed 32 bit words (array('i'), memoryview)
+    # @return a list of Instruction class instances
+    @staticmethod
+    def decode_words(words):
+        if numpy is None or len(words) == 0:
+            shared = dict()
+            translated = []
+            append = translated.append
+            decode_word = Assembler.decode_word
+            for word in words:
+                instruction = shared.get(word)
+                if instruction is None:
+                    instruction = shared[word] = decode_word(word)
+                append(instruction)
+            return translated
+
+        words = numpy.frombuffer(words, dtype=numpy.int32)
+        unique, positions = numpy.unique(words, return_inverse=True)
+        if len(unique) < len(words):
+            words = unique
+        fields_of = words.view(numpy.uint32)
+        classes = [OPCODES.get(code, Fill) for code in (fields_of >> 22).tolist()]
+        regs_a = ((fields_of >> 19) & 0x7).tolist()
+        regs_b = ((fields_of >> 16) & 0x7).tolist()
+        fields = (fields_of & 0xFFFF).astype(numpy.uint16).view(numpy.int16).tolist()
+
+        translated = [instruction_class.from_fields(word, reg_a, reg_b, field)
+                      for instruction_class, word, reg_a, reg_b, field
+                      in zip(classes, words.tolist(), regs_a, regs_b, fields)]
+        if words is not unique:
+            return translated
+        return list(map(translated.__getitem__, positions.tolist()))
+
+    ##
+    # Converts an binary code entry to a list of instructions
+    #
+    # @return a list of Instruction class instances
+    @staticmethod
+    def decode_line(text):
+        try:
+            word = int(text, 16)
         except ValueError as err:
             raise ValueError(f'Decodificação: {err}')
 
-        ops = [op0, op1, op2]
+        # words are 32 bit two's complement
+        if word & 0x80000000:
+            word -= 0x100000000
 
-        try:
-            if name == 'add':
-                instruction = Add(label, ops)
-            elif name == 'addi':
-                instruction = Addi(label, ops)
-            elif name == 'lw':
-                instruction = Lw(label, ops)
-            elif name == 'sw':
-                instruction = Sw(label, ops)
-            elif name == 'beq':
-                instruction = Beq(label, ops)
-            elif name == 'jalr':
-                instruction = Jalr(label, ops)
-            elif name == 'halt':
-                instruction = Halt(label)
-            elif name == 'noop':
-                instruction = Noop(label)
-            elif name == '.fill':
-                instruction = Fill(label, ops)
-            else:
-                raise ValueError(f'"{name}" não é uma instrução válida.')
-        except (ValueError, TypeError) as err:
-            raise ValueError(err)
+        return Assembler.decode_word(word)
+
+    ##
+    # Converts a word of the main memory to an instruction.
+    # Words whose code is not an instruction become a .fill.
+    # raises *ValueError* if the word is not an integer
+    #
+    # @param word value stored on the main memory
+    # @return an Instruction class object or a Fill
+    @staticmethod
+    def decode_word(word):
+        if not isinstance(word, int):
+            raise ValueError(f'"{word}" não é uma instrução válida.')
+
+        # the word may have bits that the instruction does not use,
+        # so the instruction keeps it
+        return OPCODES.get(word >> 22, Fill).decode(word)
+
+
+##
+# Stores the translations of sources in a directory, as object files
+# (see ObjectFile) named after the hash of the source and the version
+# of the Assembler, so a source opened again is not translated again.
+# Only the MAX_FILES translations used most recently are kept.
+#
+# @see FileCache
+class AssemblyCache(FileCache):
+    SUBDIRECTORY = 'asm'
+    MAX_FILES = 512
 
-        return instruction
+    ##
+    # Returns the hash that identifies the translation of a source
+    #
+    @staticmethod
+    def source_hash(text):
+        return hashlib.sha256(f'kindA-asm-{Assembler.VERSION}\n{text}'.encode()).hexdigest()
+
+    ##
+    # Returns the path of the object file of a source
+    #
+    def object_path(self, text):
+        return self.file_path(f'{self.source_hash(text)}{ObjectFile.EXTENSION}')
+
+    ##
+    # Returns the path of the object file of a source, or None if
+    # the source is not in the cache
+    #
+    # @param text source
+    def find(self, text):
+        path = self.object_path(text)
+        if not os.path.exists(path):
+            return None
+        self.touch(path)
+        return path
+
+    ##
+    # Saves the translation of a source (see ObjectFile.write) and
+    # removes the translations used less recently beyond MAX_FILES
+    # raises *OSError* if the file can not be written
+    #
+    # @param text source
+    # @param instructions translated by the Assembler
+    # @param labels dictionary of label name -> address
+    def save(self, text, instructions, labels):
+        os.makedirs(self.directory, exist_ok=True)
+        ObjectFile.write(self.object_path(text), instructions, labels, Assembler.first_line(text))
+        self.prune()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package batch
+#
+#   Runs kindA programs without the graphic interface.
+#
+#   usage: python batch.py [-q] [-m MODE] [--ips RATE] [--max-steps N]
+#                          [--max-time SECONDS] [--max-memory N]
+#                          [--memory-file PATH [--memory-size WORDS]] [--cache-dir PATH]
+#                          program.asc [program.mc program.bin program.ko ...]
+#          python batch.py -a [-o] program.asc [program.asc ...]
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from engine import Engine
+from assembler import Assembler
+from observer import EngineObserver, ConsoleObserver
+from mapped_memory import MappedMemory
+from object_file import ObjectFile
+import argparse
+import os
+import sys
+
+
+##
+# Executes the program stored in a file on a headless engine
+#
+# @param path of the source, binary, image (.bin) or object file
+# @param context observer that receives the engine notifications
+# @param mode execution mode of the engine
+# @param rate instructions per second (None: no limit)
+# @param max_steps limit of executed instructions (None: no limit)
+# @param max_time limit of seconds of execution (None: no limit)
+# @param max_memory limit of main memory addresses in use (None: no limit)
+# @param main_memory memory of the virtual machine (None: a PagedMemory)
+# @param module_directory directory of the modules of the mode aot
+# (None: see FileCache)
+# @return the engine after the execution
+def run_file(path, context=None, mode=Engine.MODE_INTERPRETER, rate=None,
+             max_steps=None, max_time=None, max_memory=None, main_memory=None,
+             module_directory=None):
+    engine = Engine(context, main_memory)
+    engine.set_rate(rate)
+    engine.set_limits(max_steps, max_time, max_memory)
+    engine.set_mode(mode)
+    engine.set_module_directory(module_directory)
+
+    if ObjectFile.is_object(path):
+        engine.run_object(path)
+        return engine
+    if os.path.splitext(path)[1].lower() == Assembler.IMAGE_EXTENSION:
+        engine.run_image(path)
+        return engine
+
+    with open(path, 'r') as f:
+        text = f.read()
+    engine.run(text)
+
+    return engine
+
+
+##
+# Translates a source file to a machine code file, line by line,
+# so the size of the source is not limited by the memory, or to
+# an object file
+# raises *ValueError* if the source can not be translated
+#
+# @param path of the source file
+# @param output path of the translated file (None: path with .mc or .ko)
+# @param as_object True to write an object file (see ObjectFile)
+# @return (path of the translated file, number of words)
+def assemble_file(path, output=None, as_object=False):
+    if output is None:
+        output = os.path.splitext(path)[0] + (ObjectFile.EXTENSION if as_object else '.mc')
+    if os.path.abspath(output) == os.path.abspath(path):
+        raise ValueError(f'O arquivo "{path}" já é código de máquina.')
+
+    with open(path, 'r') as f:
+        if as_object:
+            count = Assembler().assemble_object(f.read(), output)
+        else:
+            count = Assembler().assemble_file(f, output)
+
+    return output, count
+
+
+##
+# Creates a textual summary of the machine state after an execution
+#
+# @param engine that executed the program
+# @return the summary
+def describe(engine):
+    vm = engine.virtual_machine
+    if vm is None:
+        return 'Máquina virtual não criada.'
+
+    regs = ' | '.join(f'r{i}: {v}' for i, v in enumerate(vm.registers))
+    pacer = engine.pacer
+    msg = (f'registradores:\t{regs}\nPc:\t{vm.get_pc()}\n'
+           f'Instruções:\t{pacer.executed} ({pacer.achieved_rate:.0f} ips)')
+    if engine.termination is not None:
+        msg += f'\nTérmino:\t{engine.termination.reason}'
+    return msg
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Executa programas kindA sem interface gráfica.')
+    parser.add_argument('files', nargs='+', help='arquivos .asc, .mc, .bin ou .ko')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='não exibe as mensagens do console')
+    parser.add_argument('-a', '--assemble', action='store_true',
+                        help='traduz os arquivos para código de máquina (.mc) sem executá-los')
+    parser.add_argument('-o', '--object', action='store_true',
+                        help='com -a, traduz para arquivos objeto (.ko)')
+    parser.add_argument('-m', '--mode', choices=Engine.MODES, default=Engine.MODE_INTERPRETER,
+                        help='modo de execução')
+    parser.add_argument('--ips', type=float, default=None,
+                        help='instruções por segundo (padrão: sem limite)')
+    parser.add_argument('--max-steps', type=int, default=None,
+                        help='limite de instruções executadas')
+    parser.add_argument('--max-time', type=float, default=None,
+                        help='limite de tempo de execução em segundos')
+    parser.add_argument('--max-memory', type=int, default=None,
+                        help='limite de endereços da memória principal em uso')
+    parser.add_argument('--memory-file', default=None,
+                        help='arquivo mapeado com mmap usado como memória principal')
+    parser.add_argument('--memory-size', type=int, default=None,
+                        help='número de palavras do arquivo da memória')
+    parser.add_argument('--cache-dir', default=None,
+                        help='diretório dos módulos do modo aot (padrão: ~/.cache/kinda/aot)')
+    args = parser.parse_args(argv)
+    if args.ips is not None and args.ips <= 0:
+        parser.error('a frequência de execução deve ser positiva')
+    for name in ('max_steps', 'max_time', 'max_memory'):
+        value = getattr(args, name)
+        if value is not None and value <= 0:
+            parser.error(f'--{name.replace("_", "-")} deve ser positivo')
+
+    status = 0
+    if args.assemble:
+        for path in args.files:
+            try:
+                output, count = assemble_file(path, as_object=args.object)
+            except (OSError, ValueError) as err:
+                print(f'{path}: {err}', file=sys.stderr)
+                status = 1
+                continue
+            print(f'{path}: {count} palavras gravadas em {output}')
+        return status
+
+    for path in args.files:
+        context = EngineObserver() if args.quiet else ConsoleObserver()
+        print(f'== {path}')
+        main_memory = None
+        try:
+            if args.memory_file is not None:
+                if args.memory_size is None:
+                    main_memory = MappedMemory(args.memory_file)
+                else:
+                    main_memory = MappedMemory(args.memory_file, args.memory_size)
+        except ValueError as err:
+            print(err, file=sys.stderr)
+            status = 1
+            continue
+
+        try:
+            engine = run_file(path, context, args.mode, args.ips,
+                              args.max_steps, args.max_time, args.max_memory, main_memory,
+                              args.cache_dir)
+            print(describe(engine))
+            if engine.termination is not None and engine.termination.is_limit:
+                status = 2
+        except UnicodeDecodeError as err:
+            print(f'Falha ao abrir o arquivo: o arquivo não é um texto ({err})', file=sys.stderr)
+            status = 1
+        except OSError as err:
+            print(f'Falha ao abrir o arquivo: {err}', file=sys.stderr)
+            status = 1
+        except ValueError as err:
+            print(f'Falha na tradução: {err}', file=sys.stderr)
+            status = 1
+        finally:
+            if main_memory is not None:
+                main_memory.close()
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
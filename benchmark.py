@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package benchmark
+#
+#   Measures the translation speed of the assembler.
+#
+#   usage: python benchmark.py [-n LINES] [-r REPEAT] [program.asc ...]
+#
+#   Without files, measures generated programs: an unrolled kernel,
+#   a data table, an array declared by .array and the machine code
+#   of the kernel.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from assembler import Assembler
+from time import perf_counter
+import argparse
+import sys
+
+
+##
+# Generates an unrolled kernel: blocks that load values through
+# labels, add them and branch back to the start of the block
+#
+# @param lines number of lines of the program
+# @return the source text
+def generate_kernel(lines):
+    block = 8
+    # the data lives at the end of the first blocks
+    data = max(1, min(1000, (lines - 1) // block))
+    text = []
+    for i in range(lines - 1):
+        k = i % block
+        if k == 0:
+            text.append(f'b{i}: lw 0 1 d{i % data}')
+        elif k == 1:
+            text.append(f'lw 0 2 d{(i + 7) % data}')
+        elif k == 2:
+            text.append('add 1 2 3')
+        elif k == 3:
+            text.append(f'addi 3 3 {i % 100 - 50}')
+        elif k == 4:
+            text.append(f'sw 0 3 d{i % data}')
+        elif k == 5:
+            text.append(f'beq 3 4 b{i - k}')
+        elif k == 6:
+            text.append('noop')
+        else:
+            text.append(f'd{i // block}: .fill {i}' if i // block < data else '.fill 0')
+    text.append('halt')
+    return '\n'.join(text)
+
+
+##
+# Returns a label made only of letters, as .fill requires
+#
+# @param number of the label
+def letters(number):
+    name = ''
+    while True:
+        name = chr(ord('a') + number % 26) + name
+        number //= 26
+        if number == 0:
+            return name
+
+
+##
+# Generates a data table: a .fill per line, some of them labeled
+# and some of them holding the address of a label
+#
+# @param lines number of lines of the program
+# @return the source text
+def generate_table(lines):
+    text = [f'{letters(0)}: halt']
+    for i in range(1, lines):
+        if i % 16 == 0:
+            text.append(f'{letters(i)}: .fill {i * 7 - 3}')
+        elif i % 16 == 1:
+            text.append(f'.fill {letters(i - 1)}')
+        else:
+            text.append(f'.fill {-i}')
+    return '\n'.join(text)
+
+
+##
+# Generates a data block: a loop that sums the values of an array
+# declared by .array directives, 16 values per line
+#
+# @param size number of values of the array
+# @return the source text
+def generate_array(size):
+    text = ['        lw 0 2 size',
+            'loop:   beq 1 2 done',
+            '        lw 1 3 data',
+            '        add 4 3 4',
+            '        addi 1 1 1',
+            '        beq 0 0 loop',
+            'done:   halt',
+            f'size:   .fill {size}']
+    values = [str(i % 1000 - 500) for i in range(size)]
+    for i in range(0, size, 16):
+        label = 'data:' if i == 0 else ''
+        text.append(f'{label:8}.array {", ".join(values[i:i + 16])}')
+    return '\n'.join(text)
+
+
+##
+# Generates the machine code (.mc) of a source text
+#
+# @param text source text
+# @return one hexadecimal word per line
+def generate_machine_code(text):
+    return '\n'.join(inst.get_hexa_representation() for inst in Assembler().assemble(text))
+
+
+##
+# Translates a text and returns the best time of some repetitions
+#
+# @param text source or machine code
+# @param repeat number of translations
+# @return seconds of the fastest translation
+def measure(text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        Assembler().assemble(text)
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mede a velocidade de tradução do montador.')
+    parser.add_argument('files', nargs='*', help='arquivos .asc ou .mc (padrão: programas gerados)')
+    parser.add_argument('-n', '--lines', type=int, default=100000,
+                        help='número de linhas dos programas gerados')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='número de traduções de cada programa')
+    args = parser.parse_args(argv)
+    if args.lines < 16 or args.repeat <= 0:
+        parser.error('os programas gerados devem ter ao menos 16 linhas '
+                     'e o número de repetições deve ser positivo')
+
+    programs = []
+    if args.files:
+        for path in args.files:
+            try:
+                with open(path, 'r') as f:
+                    programs.append((path, f.read()))
+            except OSError as err:
+                print(f'Falha ao abrir o arquivo: {err}', file=sys.stderr)
+                return 1
+    else:
+        kernel = generate_kernel(args.lines)
+        programs.append(('kernel', kernel))
+        programs.append(('tabela', generate_table(args.lines)))
+        programs.append(('vetor', generate_array(args.lines)))
+        programs.append(('código de máquina', generate_machine_code(kernel)))
+
+    for name, text in programs:
+        lines = text.strip().count('\n') + 1
+        try:
+            elapsed = measure(text, args.repeat)
+        except ValueError as err:
+            print(f'{name}: {err}', file=sys.stderr)
+            return 1
+        print(f'{name}:\t{lines} linhas em {elapsed:.3f} s ({lines / elapsed:.0f} linhas/s)')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
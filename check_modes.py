@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package check_modes
+#
+#   Checks that the execution modes of the engine give the same results.
+#
+#   usage: python check_modes.py [--max-steps N] [program.asc ...]
+#
+#   Without files, checks the sample programs of the module: loops,
+#   calls with jalr, self-modifying code and the error paths.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from engine import Engine
+import argparse
+import sys
+
+
+SAMPLES = {
+    'multiplicação': '''
+        lw 0 1 mcand
+        lw 0 2 mplier
+        lw 0 4 count
+loop:   beq 4 0 done
+        add 3 1 3
+        addi 4 4 -1
+        beq 0 0 loop
+done:   sw 0 3 result
+        halt
+mcand:  .fill 7
+mplier: .fill 6
+count:  .fill 500
+result: .fill 0
+''',
+    'soma com jalr': '''
+        lw 0 7 n
+        addi 0 1 0
+        addi 0 3 0
+loop:   beq 1 7 done
+        lw 1 2 arr
+        addi 0 6 acc
+        jalr 6 5
+        sw 1 3 out
+        addi 1 1 1
+        beq 0 0 loop
+acc:    add 3 2 3
+        add 3 3 4
+        jalr 5 6
+done:   sw 0 4 out
+        halt
+n:      .fill 4
+arr:    .fill 5
+        .fill -3
+        .fill 9
+        .fill 7
+out:    .fill 0
+''',
+    'código automodificável': '''
+        lw 0 5 newi
+        lw 0 4 count
+        lw 0 6 three
+loop:   addi 1 1 1
+        addi 4 4 -1
+        beq 4 6 patch
+        beq 4 0 done
+        beq 0 0 loop
+patch:  sw 0 5 3
+        beq 0 0 loop
+done:   halt
+count:  .fill 40
+three:  .fill 3
+newi:   addi 1 1 100
+''',
+    'reescrita da mesma palavra': '''
+        lw 0 1 tgt
+        sw 0 1 tgt
+tgt:    addi 0 2 9
+        halt
+''',
+    'dado executado': '''
+        lw 0 1 val
+        sw 0 1 tgt
+tgt:    noop
+        halt
+val:    .fill 12345
+''',
+    'registrador 0': '''
+        addi 0 1 3
+        add 1 1 0
+        halt
+''',
+    'endereço inválido': '''
+        addi 0 1 -5
+        lw 1 2 0
+        halt
+''',
+    'jalr para fora': '''
+        addi 0 1 100
+        jalr 1 2
+        halt
+''',
+    'fim sem halt': '''
+        addi 0 1 3
+        noop
+''',
+    'desvio negativo': '''
+        beq 0 0 -3
+        halt
+''',
+    'laço infinito': '''
+loop:   beq 0 0 loop
+''',
+}
+
+
+##
+# Executes a program on a headless engine and returns what an
+# execution mode must reproduce
+#
+# @param text source or machine code
+# @param mode execution mode of the engine
+# @param max_steps limit of executed instructions
+# @return tuple with registers, pc, memory, executed instructions and
+# the reason and message of the end of the execution
+def execute(text, mode, max_steps):
+    engine = Engine()
+    engine.set_mode(mode)
+    engine.set_limits(max_steps=max_steps)
+    engine.run(text)
+
+    vm = engine.virtual_machine
+    termination = engine.termination
+    return (list(vm.registers), vm.get_pc(), dict(vm.main_memory.items()),
+            engine.pacer.executed, termination.reason, termination.message)
+
+
+##
+# Compares the execution modes on a program
+#
+# @param text source or machine code
+# @param max_steps limit of executed instructions
+# @return list with the modes whose result differs from the interpreter
+def compare(text, max_steps):
+    expected = execute(text, Engine.MODE_INTERPRETER, max_steps)
+    return [mode for mode in Engine.MODES
+            if mode != Engine.MODE_INTERPRETER and execute(text, mode, max_steps) != expected]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara os modos de execução do kindA.')
+    parser.add_argument('files', nargs='*', help='arquivos .asc ou .mc (padrão: programas de exemplo)')
+    parser.add_argument('--max-steps', type=int, default=100000,
+                        help='limite de instruções de cada execução')
+    args = parser.parse_args(argv)
+    if args.max_steps <= 0:
+        parser.error('--max-steps deve ser positivo')
+
+    programs = list(SAMPLES.items())
+    if args.files:
+        programs = []
+        for path in args.files:
+            try:
+                with open(path, 'r') as f:
+                    programs.append((path, f.read()))
+            except OSError as err:
+                print(f'Falha ao abrir o arquivo: {err}', file=sys.stderr)
+                return 1
+
+    status = 0
+    for name, text in programs:
+        different = compare(text, args.max_steps)
+        if different:
+            print(f'{name}: diferente em {", ".join(different)}')
+            status = 1
+        else:
+            print(f'{name}: ok')
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
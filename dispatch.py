@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package dispatch
+#
+#   Pre-decoded execution of a translated program.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from instruction_set import Add, Addi, Lw, Sw, Beq, Jalr, Halt
+from assembler import Assembler
+
+
+##
+# The Dispatcher turns the execution queue into a table of handlers,
+# one per memory address. Every handler has its operands (and the
+# addresses pointed by labels) already resolved, executes the
+# instruction directly on the registers list and the main memory
+# of the virtual machine and returns the next pc.
+#
+# The results are the same of Instruction.execute, including the
+# error messages. A store over an address of the program replaces
+# its handler by the handler of the decoded word, as the Engine
+# does when it fetches the instruction.
+#
+# @see Engine
+class Dispatcher:
+    HALT = -1
+    INVALID_PC = -2
+
+    def __init__(self, execution_queue, virtual_machine):
+        self.virtual_machine = virtual_machine
+        self.registers = virtual_machine.registers
+        self.memory = virtual_machine.main_memory
+        self.read = self.memory.reader()
+        self.write = self.memory.writer()
+        self.size = len(execution_queue)
+
+        self.pc = 0
+        self.steps = 0
+        self.halted = False
+
+        # Words loaded on memory by the translation, used to find out
+        # if a store really changed an instruction
+        self.words = [self.memory.get(i, 0) for i in range(self.size)]
+        self.handlers = [self.compile_instruction(inst, i)
+                         for i, inst in enumerate(execution_queue)]
+        self.table = list(self.handlers)
+
+    ##
+    # Returns the pc that follows a jump to target, checking
+    # whether it contains an instruction
+    #
+    def next_pc(self, target):
+        if 0 <= target < self.size:
+            return target
+        return self.INVALID_PC
+
+    ##
+    # Creates the handler that executes an instruction
+    #
+    # @param inst Instruction class object
+    # @param address of the instruction on memory
+    # @return function without parameters that returns the next pc
+    def compile_instruction(self, inst, address):
+        vm = self.virtual_machine
+        regs = self.registers
+        max_address = vm.MAX_MEM_ADDRESS
+        nxt = self.next_pc(address + 1)
+
+        if isinstance(inst, int):
+            return self.invalid_instruction(inst, address)
+
+        if isinstance(inst, Add):
+            a, b, d = inst.reg_a, inst.reg_b, inst.reg_dest
+            if d == 0:
+                return self.register_zero_error()
+
+            def add():
+                regs[d] = regs[a] + regs[b]
+                return nxt
+            return add
+
+        if isinstance(inst, Addi):
+            a, b = inst.reg_a, inst.reg_b
+            immediate = inst.immediate
+            if b == 0:
+                return self.register_zero_error()
+
+            def addi():
+                regs[b] = regs[a] + immediate
+                return nxt
+            return addi
+
+        if isinstance(inst, Lw):
+            a, b = inst.reg_a, inst.reg_b
+            displacement = inst.displacement
+            read = self.read
+
+            def lw():
+                target = regs[a] + displacement
+                if not 0 <= target <= max_address:
+                    raise ValueError(f'Erro de Execução: O endereço "{target}" da memória '
+                                     f'principal não pode ser acessado.')
+                if b == 0:
+                    raise ValueError('Erro de Execução: O valor do "Registrador 0" não pode ser alterado.')
+                regs[b] = int(read(target))
+                return nxt
+            return lw
+
+        if isinstance(inst, Sw):
+            a, b = inst.reg_a, inst.reg_b
+            displacement = inst.displacement
+            size = self.size
+            store_on_program = self.store_on_program
+            write = self.write
+
+            def sw():
+                target = regs[a] + displacement
+                if not 0 <= target <= max_address:
+                    raise ValueError(f'Erro de Execução: O endereço "{target}" da memória '
+                                     f'principal não pode ser acessado.')
+                write(target, regs[b])
+                if target < size:
+                    store_on_program(target)
+                return nxt
+            return sw
+
+        if isinstance(inst, Beq):
+            a, b = inst.reg_a, inst.reg_b
+            target = address + inst.displacement + 1
+            if target < 0:
+                def beq():
+                    if regs[a] == regs[b]:
+                        raise ValueError('Erro de Execução: Valor inválido para PC')
+                    return nxt
+                return beq
+            target = self.next_pc(target)
+
+            def beq():
+                if regs[a] == regs[b]:
+                    return target
+                return nxt
+            return beq
+
+        if isinstance(inst, Jalr):
+            a, b = inst.reg_a, inst.reg_b
+            size = self.size
+            invalid = self.INVALID_PC
+            if b == 0:
+                return self.register_zero_error()
+
+            def jalr():
+                target = regs[a]
+                regs[b] = address + 1
+                if target < 0:
+                    raise ValueError('Erro de Execução: Valor inválido para PC')
+                if target < size:
+                    return target
+                return invalid
+            return jalr
+
+        if isinstance(inst, Halt):
+            halt = self.HALT
+
+            def stop():
+                return halt
+            return stop
+
+        # Noop and .fill
+        def noop():
+            return nxt
+        return noop
+
+    ##
+    # Creates a handler that fails because the instruction
+    # writes on the register 0
+    #
+    @staticmethod
+    def register_zero_error():
+        def handler():
+            raise ValueError('Erro de Execução: O valor do "Registrador 0" não pode ser alterado.')
+        return handler
+
+    ##
+    # Creates a handler that fails because the memory
+    # address does not contain an instruction
+    #
+    @staticmethod
+    def invalid_instruction(value, address):
+        def handler():
+            raise ValueError(f'Erro de execução: "{value}" não é uma '
+                             f'instrução válida.\n(endereço de memória: {address})')
+        return handler
+
+    ##
+    # Updates the handler of an address of the program after a store
+    #
+    # @param address that received the store
+    def store_on_program(self, address):
+        value = self.memory[address]
+        self.virtual_machine.decode_cache.pop(address, None)
+        if value == self.words[address]:
+            self.table[address] = self.handlers[address]
+            return
+
+        try:
+            inst = Assembler.decode_word(value)
+        except ValueError:
+            self.table[address] = self.invalid_instruction(value, address)
+            return
+        self.table[address] = self.compile_instruction(inst, address)
+
+    ##
+    # Executes the program from pc until it halts, jumps to an
+    # address without instruction or max_steps instructions run.
+    # Errors are raised as *ValueError* with self.pc pointing to
+    # the failed instruction.
+    #
+    # @param pc address of the first instruction
+    # @param max_steps limit of instructions to execute (None: no limit)
+    # @return number of instructions executed
+    def run(self, pc, max_steps=None):
+        table = self.table
+        executed = 0
+        self.halted = False
+
+        if not 0 <= pc < self.size:
+            self.pc = pc
+            return 0
+
+        if max_steps is None:
+            max_steps = -1
+
+        nxt = pc
+        try:
+            while executed != max_steps:
+                pc = nxt
+                nxt = table[pc]()
+                executed += 1
+                if nxt < 0:
+                    break
+        except ValueError:
+            self.pc = pc
+            self.steps += executed
+            raise
+
+        self.steps += executed
+        if nxt == self.HALT:
+            # halt does not increment pc
+            self.pc = pc
+            self.halted = True
+        elif nxt == self.INVALID_PC:
+            self.pc = -1
+        else:
+            self.pc = nxt
+
+        return executed
+
+    ##
+    # Checks if the last execution stopped on a valid instruction
+    #
+    def is_valid_pc(self):
+        return 0 <= self.pc < self.size
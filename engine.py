@@ -10,17 +10,74 @@
 #
 
 from virtual_machine import VirtualMachine
-from assembler import Assembler
-from time import sleep
-from instruction_set import Fill, Sw
+from assembler import Assembler, AssemblyCache
+import threading
+from instruction_set import Sw, Fill
+from object_file import ObjectFile
+from observer import EngineObserver
+from pacing import Pacer
+from watchdog import Watchdog, TerminationReason
+from dispatch import Dispatcher
+from jit import BlockCompiler
+from aot import AheadOfTimeRunner, ModuleCache
 
 
+##
+# The Engine translates and executes programs on a VirtualMachine.
+# Without a context (or with an EngineObserver) it runs headless and
+# with no clock, so programs execute at full interpreter speed.
+# The execution speed is controlled by a Pacer and its resources
+# by a Watchdog. The end of each run is described by termination.
+#
+# @see EngineObserver
+# @see Pacer
+# @see Watchdog
 class Engine:
-    def __init__(self, context):
+    DEFAULT_CLOCK = 0.5
+    # Execution modes
+    MODE_INTERPRETER = 'interpreter'
+    MODE_DISPATCH = 'dispatch'
+    MODE_JIT = 'jit'
+    MODE_AOT = 'aot'
+    MODES = [MODE_INTERPRETER, MODE_DISPATCH, MODE_JIT, MODE_AOT]
+    # Instructions executed by the dispatchers between two checks
+    # of the pause and stop requests
+    DISPATCH_BATCH = 50000
+
+    ##
+    # @param context observer that receives the notifications
+    # @param main_memory memory of the virtual machine (None: a PagedMemory)
+    def __init__(self, context=None, main_memory=None):
         self.execution_queue = []
+        # Kept between translations, so it translates only the lines
+        # that changed (see Assembler.translate_changes)
+        self.assembler = Assembler()
+        # translations kept on the disk, only if enabled by
+        # use_assembly_cache
+        self.assembly_cache = None
+        self.main_memory = main_memory
         self.virtual_machine = None
-        self.clock = 0.5
         self.status = StatusReady()
+        self.mode = self.MODE_INTERPRETER
+        # modules of the programs, created when the mode aot runs
+        # (see set_module_directory)
+        self.module_cache = None
+        self.module_directory = None
+        # Pause and stop requests may come from another thread
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        self.stop_event = threading.Event()
+        # Held while the execution changes the machine, so other
+        # threads take consistent snapshots (see snapshot)
+        self.lock = threading.Lock()
+        self.pacer = Pacer()
+        self.watchdog = Watchdog()
+        self.termination = None
+        self.clock = 0
+        if context is None:
+            context = EngineObserver()
+        else:
+            self.set_clock(self.DEFAULT_CLOCK)
         self.context = context
 
     ##
@@ -28,10 +85,10 @@ class Engine:
     #  text and executes the program
     #
     def run(self, text):
-        if self.status.is_running:
-            self.status = StatusReady()
+        self.prepare_run()
 
         if not text:
+            self.terminate(TerminationReason.ERROR, 'O código fonte está em branco.')
             self.context.log_on_console('O código fonte está em branco.')
             self.context.log_on_console('Fim da execução.')
             self.context.change_back_pc_bg()
@@ -39,10 +96,51 @@ class Engine:
             self.context.enable_execution_button()
             return
 
+        self.load_and_execute(self.translate, text)
+
+    ##
+    # Loads a program from an object file (see load_object) and
+    # executes it
+    #
+    # @param path of the object file
+    def run_object(self, path):
+        self.prepare_run()
+        self.load_and_execute(self.load_object, path)
+
+    ##
+    # Loads a program from an image file (see load_image) and
+    # executes it
+    #
+    # @param path of the image file
+    def run_image(self, path):
+        self.prepare_run()
+        self.load_and_execute(self.load_image, path)
+
+    ##
+    # Resets the state of the previous execution
+    #
+    def prepare_run(self):
+        if self.status.is_running:
+            self.status = StatusReady()
+        self.stop_event.clear()
+        self.resume_event.set()
+        self.termination = None
+        self.pacer.reset()
+        self.watchdog.start()
+
+    ##
+    # Loads a program into the virtual machine and executes it
+    #
+    # @param load function that loads the program (translate,
+    # load_object or load_image)
+    # @param source of the program given to the function
+    def load_and_execute(self, load, source):
         # Translation
         try:
-            self.translate(text)
+            with self.lock:
+                load(source)
         except ValueError as err:
+            self.terminate(TerminationReason.ERROR, err)
             self.context.log_on_console(err)
             self.context.log_on_console('Fim da Execução.')
             self.context.enable_execution_button()
@@ -55,9 +153,36 @@ class Engine:
 
         self.status = StatusRunning()
 
+        self.pacer.reset()
+        self.watchdog.start()
+        if self.mode == self.MODE_INTERPRETER:
+            self.run_interpreter()
+        else:
+            self.run_dispatch()
+        self.pacer.finish()
+
+    ##
+    # Executes the translated program one instruction at a time
+    #
+    def run_interpreter(self):
+        pacer = self.pacer
+        watchdog = self.watchdog
+        limited = watchdog.is_active()
+
         while self.status.is_running:
+            if self.is_interrupted():
+                self.stop_execution()
+                return
+
+            if limited:
+                termination = watchdog.check(pacer.executed, self.virtual_machine.main_memory)
+                if termination is not None:
+                    self.stop_by_watchdog(termination)
+                    return
+
             pc = self.virtual_machine.get_pc()
             if not self.is_valid_pc(pc):
+                self.terminate(TerminationReason.INVALID_PC, 'Falha na execução.')
                 self.context.log_on_console('Falha na execução.')
                 self.context.log_on_console('    O endereço de memória acessado '
                                             'não contém uma instrução válida.')
@@ -71,32 +196,34 @@ class Engine:
                 self.context.change_back_pc_bg()
                 return
 
-            try:
-                sleep(self.clock)
-
-                instruction = self.execution_queue[pc]
+            if pacer.is_throttled():
+                pacer.wait(self.stop_event)
+                if self.is_interrupted():
+                    self.stop_execution()
+                    return
 
-                if isinstance(instruction, int):
-                    raise ValueError(f'Erro de execução: "{instruction}" não é uma '
-                                     f'instrução válida.\n(endereço de memória: {pc})')
-                else:
-                    inst_representation = self.execution_queue[pc].get_hexa_representation(self.virtual_machine)
-                    self.virtual_machine.instruction_register = inst_representation
+            try:
+                with self.lock:
+                    instruction = self.fetch(pc)
+                    self.virtual_machine.instruction_register = instruction.get_word(self.virtual_machine)
                     success = instruction.execute(self.virtual_machine)
+                    if success:
+                        self.virtual_machine.increment_pc()
+                pacer.account(1)
 
                 if success:
-                    self.virtual_machine.increment_pc()
                     if isinstance(instruction, Sw):
-                        self.update_execution_queue()
                         self.context.update_memory_table()
                         self.context.update_ui_pc()
                 else:
+                    self.terminate(TerminationReason.HALTED, 'Fim da execução.')
                     self.status = StatusReady()
                     self.context.log_on_console('Fim da execução.')
                     self.context.change_back_pc_bg()
                     self.context.console_space()
                     self.context.enable_execution_button()
             except (ValueError, TypeError) as err:
+                self.terminate(TerminationReason.ERROR, err)
                 self.context.log_on_console(err)
 
                 self.context.log_on_console('Fim da Execução.')
@@ -107,10 +234,188 @@ class Engine:
                 self.status = StatusReady()
                 self.context.enable_execution_button()
 
+    ##
+    # Executes the translated program through a Dispatcher
+    # (a BlockCompiler in jit mode or an AheadOfTimeRunner in aot mode).
+    # The instructions run in batches sized by the Pacer and the
+    # Watchdog and the context is updated after each batch.
+    #
+    # @see Dispatcher
+    # @see BlockCompiler
+    # @see AheadOfTimeRunner
+    def run_dispatch(self):
+        vm = self.virtual_machine
+
+        try:
+            if self.mode == self.MODE_JIT:
+                dispatcher = BlockCompiler(self.execution_queue, vm)
+            elif self.mode == self.MODE_AOT:
+                if self.module_cache is None:
+                    self.module_cache = ModuleCache(self.module_directory)
+                dispatcher = AheadOfTimeRunner(self.execution_queue, vm, self.module_cache)
+            else:
+                dispatcher = Dispatcher(self.execution_queue, vm)
+        except ValueError as err:
+            self.terminate(TerminationReason.ERROR, err)
+            self.context.log_on_console(err)
+            self.finish_execution()
+            return
+
+        pacer = self.pacer
+        watchdog = self.watchdog
+        limited = watchdog.is_active()
+
+        while self.status.is_running:
+            if self.is_interrupted():
+                with self.lock:
+                    self.sync_virtual_machine(dispatcher)
+                self.stop_execution()
+                return
+
+            batch = pacer.batch_size(self.DISPATCH_BATCH)
+            if pacer.is_throttled():
+                pacer.wait(self.stop_event)
+                if self.is_interrupted():
+                    self.stop_execution()
+                    return
+
+            if limited:
+                termination = watchdog.check(pacer.executed, vm.main_memory)
+                if termination is not None:
+                    self.stop_by_watchdog(termination)
+                    return
+                batch = watchdog.batch_size(pacer.executed, vm.main_memory, batch)
+
+            executed = dispatcher.steps
+            try:
+                with self.lock:
+                    dispatcher.run(vm.get_pc(), batch)
+                    self.sync_virtual_machine(dispatcher)
+            except ValueError as err:
+                pacer.account(dispatcher.steps - executed)
+                with self.lock:
+                    self.sync_virtual_machine(dispatcher)
+                self.terminate(TerminationReason.ERROR, err)
+                self.context.log_on_console(err)
+                self.virtual_machine.reset_pc()
+                self.finish_execution()
+                return
+
+            pacer.account(dispatcher.steps - executed)
+
+            if dispatcher.halted:
+                self.terminate(TerminationReason.HALTED, 'Fim da execução.')
+                self.status = StatusReady()
+                self.context.log_on_console('Fim da execução.')
+                self.context.change_back_pc_bg()
+                self.context.console_space()
+                self.context.enable_execution_button()
+            elif not dispatcher.is_valid_pc():
+                self.terminate(TerminationReason.INVALID_PC, 'Falha na execução.')
+                self.context.log_on_console('Falha na execução.')
+                self.context.log_on_console('    O endereço de memória acessado '
+                                            'não contém uma instrução válida.')
+                self.context.log_on_console('    (Dica: sempre termine seu '
+                                            'código com halt)')
+                self.virtual_machine.reset_pc()
+                self.finish_execution()
+
+    ##
+    # Copies the state of a dispatcher back to the virtual
+    # machine and notifies the context
+    #
+    def sync_virtual_machine(self, dispatcher):
+        vm = self.virtual_machine
+        if dispatcher.is_valid_pc():
+            vm.set_pc(dispatcher.pc)
+            try:
+                vm.instruction_register = self.fetch(dispatcher.pc).get_word(vm)
+            except ValueError:
+                pass
+        self.context.update_registers_table()
+        self.context.update_memory_table()
+
+    ##
+    # Pauses a running execution. The execution thread stops
+    # before the next instruction (or batch of instructions).
+    #
+    def pause(self):
+        if self.status.is_running and not self.status.is_step_execution:
+            self.resume_event.clear()
+            self.status = StatusPaused()
+            self.context.log_on_console('Execução pausada.')
+
+    ##
+    # Resumes a paused execution
+    #
+    def resume(self):
+        if self.status.is_paused:
+            self.status = StatusRunning()
+            self.context.log_on_console('Execução retomada.')
+            self.resume_event.set()
+
+    ##
+    # Requests the end of a running execution
+    #
+    def stop(self):
+        self.stop_event.set()
+        self.resume_event.set()
+
+    ##
+    # Blocks while the execution is paused
+    #
+    # @return True if a stop was requested
+    def is_interrupted(self):
+        if not self.resume_event.is_set():
+            self.resume_event.wait()
+        return self.stop_event.is_set()
+
+    ##
+    # Finishes an execution stopped by the user
+    #
+    def stop_execution(self):
+        self.terminate(TerminationReason.STOPPED, 'Execução interrompida.')
+        self.context.log_on_console('Execução interrompida.')
+        self.finish_execution()
+
+    ##
+    # Finishes an execution that exceeded a limit of the Watchdog
+    #
+    # @param termination TerminationReason returned by the Watchdog
+    def stop_by_watchdog(self, termination):
+        self.termination = termination
+        self.context.log_on_console(termination.message)
+        self.finish_execution()
+
+    ##
+    # Records why the execution ended
+    #
+    # @param reason one of the TerminationReason constants
+    # @param message shown to the user
+    def terminate(self, reason, message=''):
+        memory = self.virtual_machine.main_memory if self.virtual_machine else {}
+        self.termination = TerminationReason(reason, message, self.pacer.executed,
+                                             self.watchdog.elapsed(),
+                                             Watchdog.used_addresses(memory))
+
+    ##
+    # Logs the end of an execution and returns the
+    # engine to the ready state
+    #
+    def finish_execution(self):
+        self.context.log_on_console('Fim da Execução.')
+        self.context.console_space()
+        self.context.change_back_pc_bg()
+        self.status = StatusReady()
+        self.context.enable_execution_button()
+
     ##
     # Performs a series of actions to start the step execution.
     #
-    def run_in_steps(self, text):
+    # @param text source of the program
+    # @param load function that loads the source (None: translate;
+    # see load_image)
+    def run_in_steps(self, text, load=None):
         if not text:
             self.context.log_on_console('O código fonte está em branco.')
             self.context.log_on_console('Fim da execução em etapas.')
@@ -122,7 +427,7 @@ class Engine:
             self.status = StatusReady()
 
         try:
-            self.translate(text)
+            (load or self.translate)(text)
         except ValueError as err:
             self.context.log_on_console(err)
             self.context.log_on_console('Fim da Execução.')
@@ -137,7 +442,7 @@ class Engine:
         self.status = StatusWaiting()
         self.context.log_on_console('O sistema iniciou o processo de Execução em Etapas.')
         self.context.change_pc_bg()
-        self.context.action_avancar.setDisabled(False)
+        self.context.enable_step_button()
 
     ##
     # Execute the next instruction of the execution queue when
@@ -151,7 +456,7 @@ class Engine:
             self.context.log_on_console('    (Dica: Sempre termine seu código com "halt")')
             self.virtual_machine.reset_pc()
             self.status = StatusWaiting()
-            self.context.action_avancar.setDisabled(True)
+            self.context.disable_step_button()
             self.context.log_on_console('Fim da execução.')
             self.context.change_back_pc_bg()
             self.context.console_space()
@@ -168,24 +473,17 @@ class Engine:
             return
 
         try:
-            instruction = self.execution_queue[pc]
-
-            if isinstance(instruction, int):
-                raise ValueError(f'Erro de execução: "{instruction}" não é uma '
-                                 f'instrução válida.\n(endereço de memória: {pc})')
-            else:
-                inst_representation = self.execution_queue[pc].get_hexa_representation(self.virtual_machine)
-                self.virtual_machine.instruction_register = inst_representation
-                success = instruction.execute(self.virtual_machine)
+            instruction = self.fetch(pc)
+            self.virtual_machine.instruction_register = instruction.get_word(self.virtual_machine)
+            success = instruction.execute(self.virtual_machine)
 
             if success:
                 self.virtual_machine.increment_pc()
                 if isinstance(instruction, Sw):
-                    self.update_execution_queue()
                     self.context.update_memory_table()
                     self.context.update_ui_pc()
             else:
-                self.context.action_avancar.setDisabled(True)
+                self.context.disable_step_button()
                 self.context.log_on_console('Fim da Execução em Etapas.')
                 self.context.change_back_pc_bg()
                 self.context.console_space()
@@ -196,7 +494,7 @@ class Engine:
             self.context.log_on_console('Fim da Execução.')
             self.context.change_back_pc_bg()
             self.virtual_machine.reset_pc()
-            self.context.action_avancar.setDisabled(True)
+            self.context.disable_step_button()
             self.status = StatusWaiting()
 
         pc = self.virtual_machine.get_pc()
@@ -219,84 +517,239 @@ class Engine:
             return
 
         self.create_virtual_machine()
+        # the assembler translates the source it keeps faster
+        if not self.assembler.holds(text) and self.load_cached(text):
+            self.context.log_on_console('Sucesso na tradução! (cache)')
+            return
+
         try:
             self.populate_execution_queue(text)
-            self.update_vm_labels()
-            self.update_vm_main_memory()
+            if self.assembler.words is None:
+                self.update_vm_labels()
+                self.update_vm_main_memory()
+            else:
+                # the assembler placed the instructions of the source
+                # and has its labels and its image
+                self.update_vm_labels(self.assembler.labels)
+                self.update_vm_main_memory(self.assembler.words)
         except ValueError as err:
             raise ValueError(err)
+        self.save_cached(text)
         self.context.log_on_console('Sucesso na tradução!')
 
+    ##
+    # Loads a program from an object file (see ObjectFile): the words
+    # of the file go to the main memory in blocks and are decoded at
+    # once. The data sections become .fill directives and the symbols
+    # become the labels, like in the translation of the source.
+    # raises *ValueError* if the file is not a valid object
+    #
+    # @param path of the object file
+    def load_object(self, path):
+        self.create_virtual_machine()
+        with ObjectFile(path) as obj:
+            self.load_program(obj)
+        self.context.log_on_console('Sucesso na carga do objeto!')
+
+    ##
+    # Loads a program from an image file: a machine code file (.mc)
+    # or a raw binary image, read by Assembler.read_image_file in
+    # chunks. The words go to the main memory in blocks and are
+    # decoded at once, without the text of the file, so big images
+    # are loaded without the editor (see disassemble).
+    # raises *ValueError* if the file is not a valid image
+    #
+    # @param path of the image file
+    def load_image(self, path):
+        words = Assembler.read_image_file(path, VirtualMachine.MAX_MEM_ADDRESS + 1)
+        self.create_virtual_machine()
+        self.execution_queue = Assembler.decode_words(words)
+        self.update_vm_labels()
+        self.update_vm_main_memory(words)
+        self.context.log_on_console(f'Sucesso na carga da imagem! ({len(words)} palavras)')
+
+    ##
+    # Reads a window of the main memory around an address, without
+    # copying the rest of the memory: the words come from
+    # VirtualMachine.read_block and their instructions from the
+    # decode cache (or are decoded).
+    #
+    # @param address shown on the window (usually the pc)
+    # @param size number of addresses of the window
+    # @return (first address, list of (address, word, instruction))
+    def memory_window(self, address, size):
+        with self.lock:
+            vm = self.virtual_machine
+            if vm is None:
+                return 0, []
+            end = max(len(self.execution_queue), address + 1)
+            first = max(0, min(address - size // 4, end - size))
+            count = max(0, min(size, end - first, vm.MAX_MEM_ADDRESS + 1 - first))
+            words = vm.read_block(first, count)
+            cache = vm.decode_cache
+
+            rows = []
+            for i, word in enumerate(words, first):
+                instruction = cache.get(i)
+                if instruction is None:
+                    instruction = Assembler.decode_word(word)
+                rows.append((i, word, instruction))
+            if isinstance(words, memoryview):
+                words.release()
+        return first, rows
+
+    ##
+    # Disassembles the words of the main memory around an address,
+    # one line per word with its address, its hexadecimal
+    # representation and its instruction. The line of the pc is
+    # marked with ">".
+    #
+    # @param address shown on the window (usually the pc)
+    # @param size number of lines of the window
+    # @return (first address, text) of the window
+    def disassemble(self, address, size):
+        first, rows = self.memory_window(address, size)
+        pc = self.virtual_machine.get_pc() if self.virtual_machine is not None else 0
+        lines = [f'{">" if i == pc else " "} {i:08X}  {word & 0xFFFFFFFF:08X}  {instruction}'
+                 for i, word, instruction in rows]
+        return first, '\n'.join(lines)
+
+    ##
+    # Loads the program of an opened object file, see load_object
+    #
+    # @param obj ObjectFile
+    def load_program(self, obj):
+        queue = Assembler.decode_words(obj.words)
+        # the equal words of the data share their .fill, like the
+        # instructions (see Assembler.decode_words)
+        data = dict()
+        for address in obj.data_addresses():
+            word = queue[address].word
+            if word not in data:
+                data[word] = Fill.decode(word)
+            queue[address] = data[word]
+        for name, address in obj.symbols.items():
+            queue[address] = queue[address].named(name, obj.references.get(address))
+        for address, name in obj.references.items():
+            if queue[address].symbol is None:
+                queue[address] = queue[address].named(queue[address].label, name)
+        self.execution_queue = queue
+        self.update_vm_labels()
+        self.update_vm_main_memory(obj.words)
+
+    ##
+    # Loads the translation of a source from the assembly cache.
+    # The assembler keeps it, so the next changes of the source are
+    # translated from it (see Assembler.translate_changes).
+    #
+    # @param text source
+    # @return True if the translation was in the cache (always False
+    # if the cache is not enabled, see use_assembly_cache)
+    def load_cached(self, text):
+        if self.assembly_cache is None:
+            return False
+        path = self.assembly_cache.find(text)
+        if path is None:
+            return False
+
+        self.create_virtual_machine()
+        try:
+            with ObjectFile(path) as obj:
+                self.load_program(obj)
+                self.assembler.adopt(text, self.execution_queue, obj.symbols, obj.words)
+        except ValueError:
+            # a damaged file is translated again
+            return False
+        return True
+
+    ##
+    # Saves the translation of a source on the assembly cache. Only
+    # complete translations are saved: the ones of the changes made
+    # on the editor are not kept on the disk, nor the ones that
+    # include files (.incbin), that may change without the source.
+    #
+    # @param text source
+    def save_cached(self, text):
+        assembler = self.assembler
+        if self.assembly_cache is None or assembler.words is None or \
+                assembler.incremental or assembler.external:
+            return
+        try:
+            self.assembly_cache.save(text, self.execution_queue, assembler.labels)
+        except (OSError, ValueError):
+            # the cache is optional
+            pass
+
     ##
     # Populates the execution queue with the instruction
     # list translated by the assembler.
     #
     def populate_execution_queue(self, text):
-        assembler = Assembler()
         try:
-            self.execution_queue = assembler.assemble(text)
+            self.execution_queue = self.assembler.assemble(text)
         except ValueError as err:
             raise ValueError(err)
 
     ##
-    #   Updates execution_queue based on virual_machine.main_memory
+    # Returns the instruction stored on an address of the main memory.
+    # The word is decoded once and kept on the decode cache of the
+    # virtual machine until a store changes it, so a program that
+    # writes over its own code executes the new instructions.
+    # raises *ValueError* if the word is not an instruction
     #
-    #   @see VirtualMachine
-    def update_execution_queue(self):
-        memory = self.virtual_machine.main_memory
-
-        # TODO: Maybe this test is unnecessary
-        if self.virtual_machine.BLOCKED_ADDRESS_KEY in memory.keys():
-            memory.pop(self.virtual_machine.BLOCKED_ADDRESS_KEY)
-
-        for i, k in enumerate(memory.keys()):
-            if i >= len(self.execution_queue):
-                self.execution_queue.append(memory[k])
-            else:
-                inst = self.execution_queue[i]
-                if isinstance(inst, int):
-                    value = inst
-                else:
-                    value = inst.get_hexa_representation(self.virtual_machine)
-                    value = int(value, 16)
-                if value != self.virtual_machine.main_memory[k]:
-                    self.execution_queue[i] = memory[k]
-
-        self.virtual_machine.block_memory(len(self.execution_queue) - 1)
+    # @param pc address of the instruction
+    # @return Instruction class object
+    def fetch(self, pc):
+        vm = self.virtual_machine
+        instruction = vm.decode_cache.get(pc)
+        if instruction is None:
+            try:
+                instruction = Assembler.decode_word(vm.get_main_memory_value(pc))
+            except ValueError as err:
+                raise ValueError(f'Erro de execução: {err}\n(endereço de memória: {pc})')
+            vm.decode_cache[pc] = instruction
+            if pc < len(self.execution_queue):
+                self.execution_queue[pc] = instruction
+        return instruction
 
     ##
     # Updates the data in the main memory of the virtual machine
     #
-    def update_vm_main_memory(self):
+    # @param words buffer with the words of the execution queue, copied
+    # in blocks (None: the words are encoded from the instructions)
+    def update_vm_main_memory(self, words=None):
         self.virtual_machine.clear_main_memory()
 
         try:
-            for i, inst in enumerate(self.execution_queue):
-                if isinstance(inst, Fill):
-                    representation = inst.get_value()
-                    if representation in self.virtual_machine.labels.keys():
-                        representation = self.virtual_machine.get_label_value(representation)
-                else:
-                    hex_representation = inst.get_hexa_representation(self.virtual_machine)
-                    representation = int(hex_representation, 16)
-                self.virtual_machine.set_main_memory_value(representation, i)
-            # TODO: (2021-sw) BLOQUEIO DA MEMÓRIA - TALVEZ REMOVER O TESTE EM UPDATE_EXECUTION_QUEUE
+            if words is None:
+                for i, inst in enumerate(self.execution_queue):
+                    self.virtual_machine.set_main_memory_value(inst.get_word(), i)
+            else:
+                self.virtual_machine.write_block(0, words)
             self.virtual_machine.block_memory(len(self.execution_queue) - 1)
         except ValueError as err:
             raise ValueError(f'Atualização da memória principal: {err}')
+        # the translated instructions keep the text of their labels
+        self.virtual_machine.decode_cache.update(enumerate(self.execution_queue))
         self.context.update_memory_table()
 
     ##
     # Updates the list of virtual machine labels
     #
-    def update_vm_labels(self):
+    # @param labels dictionary of label name -> address of instructions
+    # already placed (None: the labels and the addresses are taken
+    # from the execution queue)
+    def update_vm_labels(self, labels=None):
         self.create_virtual_machine()
         try:
             self.virtual_machine.clear_labels()
+            if labels is not None:
+                # the addresses of the assembler are always valid
+                self.virtual_machine.labels.update(labels)
+                return
             for i, inst in enumerate(self.execution_queue):
                 if inst.label is not None:
                     self.virtual_machine.add_label(inst.label, i)
-                inst.set_address(i)
         except ValueError as err:
             raise ValueError(err)
 
@@ -306,20 +759,79 @@ class Engine:
     # @param a value to check if can represent a register
     #
     def is_valid_pc(self, pc):
-        if pc in list(range(len(self.execution_queue))):
-            return True
-
-        return False
+        return 0 <= pc < len(self.execution_queue)
 
     ##
     # Creates a virtual machine if not exists
     #
     def create_virtual_machine(self):
         if self.virtual_machine is None:
-            self.virtual_machine = VirtualMachine(self.context)
+            self.virtual_machine = VirtualMachine(self.context, self.main_memory)
 
+    ##
+    # Changes the time between two instructions
+    #
+    # @param value in seconds, 0 to execute without waiting
     def set_clock(self, value):
         self.clock = value
+        self.pacer.set_rate(1 / value if value > 0 else None)
+
+    ##
+    # Changes the target execution rate
+    #
+    # @param rate instructions per second, None to execute without waiting
+    def set_rate(self, rate):
+        self.pacer.set_rate(rate)
+        self.clock = 1 / rate if rate else 0
+
+    ##
+    # Changes the resource limits of the next executions
+    # raises *ValueError* if a limit is not positive
+    #
+    # @param max_steps instructions executed (None: no limit)
+    # @param max_time seconds of execution (None: no limit)
+    # @param max_memory distinct main memory addresses in use (None: no limit)
+    def set_limits(self, max_steps=None, max_time=None, max_memory=None):
+        self.watchdog.set_limits(max_steps, max_time, max_memory)
+
+    ##
+    # Enables the assembly cache: the translations of the sources are
+    # kept on a directory and loaded again by translate (see
+    # load_cached and save_cached)
+    #
+    # @param directory of the cache (None: see FileCache)
+    def use_assembly_cache(self, directory=None):
+        self.assembly_cache = AssemblyCache(directory)
+
+    ##
+    # Changes the directory of the modules of the mode aot
+    #
+    # @param directory of the modules (None: see FileCache)
+    def set_module_directory(self, directory):
+        self.module_directory = directory
+        self.module_cache = None
+
+    ##
+    # Changes the execution mode used by run
+    # raises *ValueError* if the mode does not exist
+    #
+    # @param mode one of the Engine.MODES
+    def set_mode(self, mode):
+        if mode not in self.MODES:
+            raise ValueError(f'O modo de execução "{mode}" não existe.')
+        self.mode = mode
+
+    ##
+    # Copies the state shown by the graphic interface, so it
+    # can be rendered while another thread executes the program
+    #
+    # @param memory True to copy the main memory too
+    # @return EngineSnapshot or None if there is no virtual machine
+    def snapshot(self, memory=False):
+        with self.lock:
+            if self.virtual_machine is None:
+                return None
+            return EngineSnapshot(self, memory)
 
     ##
     # Returns data tha represents a Engine class instance
@@ -330,6 +842,9 @@ class Engine:
         msg = '\n-= ENGINE =-\n'
         msg += f'· Status: {self.status}\n'
         msg += f'· Clock: {self.clock}\n'
+        msg += f'· IPS: {self.pacer.achieved_rate:.1f}\n'
+        msg += f'· Mode: {self.mode}\n'
+        msg += f'· Termination: {self.termination}\n'
         msg += '· Execution Queue: \n'
         msg += '\t' + str(self.execution_queue) + '\n'
         msg += '· Virtual Machine:\n'
@@ -339,6 +854,31 @@ class Engine:
         return msg
 
 
+##
+# State of the engine and of its virtual machine at a moment
+#
+class EngineSnapshot:
+    def __init__(self, engine, memory=False):
+        vm = engine.virtual_machine
+        self.registers = list(vm.registers)
+        self.pc = vm.pc
+        self.instruction_register = vm.instruction_register
+        self.is_running = engine.status.is_running
+        # only the memory table uses the program and the memory
+        self.execution_queue = list(engine.execution_queue) if memory else None
+        self.main_memory = vm.main_memory.copy() if memory else None
+
+        if memory:
+            # addresses changed by stores and not fetched yet
+            cache = vm.decode_cache
+            for i in range(len(self.execution_queue)):
+                if i not in cache:
+                    try:
+                        self.execution_queue[i] = Assembler.decode_word(self.main_memory.get(i, 0))
+                    except ValueError:
+                        pass
+
+
 # States
 ##
 # EngineStatus is an abstract class
@@ -350,6 +890,7 @@ class EngineStatus:
     def __init__(self):
         self.is_running = False
         self.is_step_execution = False
+        self.is_paused = False
 
     def __repr__(self):
         return self.NAME
@@ -366,6 +907,19 @@ class StatusRunning(EngineStatus):
         self.is_running = True
 
 
+##
+# Class whose instance represents a running execution
+# paused by the user.
+#
+class StatusPaused(EngineStatus):
+    NAME = 'Paused'
+
+    def __init__(self):
+        super().__init__()
+        self.is_running = True
+        self.is_paused = True
+
+
 ##
 # Class whose instance represents the waiting state.
 # This state occurs when the engine is running a step execution.
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package file_cache
+#
+#   Directories of cached files with a limited number of files.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+import os
+
+
+##
+# The FileCache keeps files named PREFIX* in a directory and removes
+# the least recently used ones when there are more than MAX_FILES.
+# A file is used when it is saved or found (see touch), so the files
+# of the programs opened over and over stay in the cache.
+#
+# The directory is given to the constructor; by default it is the
+# SUBDIRECTORY of the directory in the KINDA_CACHE_DIR environment
+# variable or of ~/.cache/kinda.
+#
+class FileCache:
+    PREFIX = 'kinda_'
+    SUBDIRECTORY = ''
+    MAX_FILES = 256
+
+    def __init__(self, directory=None):
+        self.directory = directory or self.default_directory()
+
+    ##
+    # Returns the directory used when none is given
+    #
+    @classmethod
+    def default_directory(cls):
+        root = os.environ.get('KINDA_CACHE_DIR') or \
+            os.path.join(os.path.expanduser('~'), '.cache', 'kinda')
+        return os.path.join(root, cls.SUBDIRECTORY)
+
+    ##
+    # Returns the path of a file of the cache
+    #
+    # @param name of the file, without the prefix
+    def file_path(self, name):
+        return os.path.join(self.directory, f'{self.PREFIX}{name}')
+
+    ##
+    # Marks a file as used now. A file that disappeared (removed by
+    # another process) is ignored.
+    #
+    # @param path of the file
+    @staticmethod
+    def touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    ##
+    # Removes the least recently used files beyond MAX_FILES. The
+    # cache is optional, so a file that can not be removed is kept.
+    #
+    def prune(self):
+        try:
+            with os.scandir(self.directory) as entries:
+                files = [(entry.stat().st_mtime, entry.path) for entry in entries
+                         if entry.name.startswith(self.PREFIX) and entry.is_file()]
+        except OSError:
+            return
+
+        if len(files) <= self.MAX_FILES:
+            return
+        files.sort()
+        for _, path in files[:len(files) - self.MAX_FILES]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -9,6 +9,13 @@
 #   @since 11/28/2020
 #
 from virtual_machine import VirtualMachine
+from array import array
+import os
+import sys
+
+# register operand (text or number) -> register number
+REGISTER_OPERANDS = {**{str(reg): reg for reg in VirtualMachine.AVAILABLE_REGISTERS},
+                     **{reg: reg for reg in VirtualMachine.AVAILABLE_REGISTERS}}
 
 
 ##
@@ -23,7 +30,10 @@ class InstructionsUtils:
                           'jalr',
                           'halt',
                           'noop',
-                          '.fill']
+                          '.fill',
+                          '.space',
+                          '.array',
+                          '.incbin']
 
     ##
     # Returns a list of all labels for instructions and directives.
@@ -42,6 +52,12 @@ class InstructionsUtils:
     # @return reg converted in integer
     @staticmethod
     def validate_register_operator(reg):
+        # the usual operands ("0" to "7") skip the checks
+        try:
+            return REGISTER_OPERANDS[reg]
+        except (KeyError, TypeError):
+            pass
+
         exception_msg_type = 'O registrador deve ser um número inteiro positivo.'
         exception_msg_not_found = f'O "registrador {reg}" não existe.'
 
@@ -75,80 +91,37 @@ class InstructionsUtils:
             return False
 
     ##
-    # Converts the passed value to a encoded value that represents a register
-    #
-    # @return input translated to binary.
-    #
-    @staticmethod
-    def convert_register_to_binary(reg):
-        converted = bin(reg)[2:]
-        converted = '0' * (3 - len(converted)) + converted
-        return converted
-
-    ##
-    # Converts a value to binary in the representation in two's complement.
-    # raises an exception if the number cannot be represented.
+    # Convert an integer value to a hexadecimal representation
     #
     # @param value to convert
-    # @param word_size size of the memory word size
-    # @return value converted to binaty Two's Complement.
+    # @param memory word size
     #
     @staticmethod
-    def convert_to_binary_twos_complement(value: int, word_size) -> str:
-        # Max and Min representation that word size allows.
-        low_limit = -1 * 2 ** (word_size - 1)
-        high_limit = (2 ** (word_size - 1)) - 1
-
-        if value < low_limit or value > high_limit:
-            raise ValueError('Overflow')
-
-        # Convertion
-        if value >= 0:
-            value = bin(value)[2:]
-            value = '0' * (word_size - len(value)) + value
-        else:
-            value = (value * -1) - 1
-            value = bin(value)[2:]
-            inverted = ''
-            for digit in value:
-                if digit == '0':
-                    inverted += '1'
-                else:
-                    inverted += '0'
-            inverted = '1' * (word_size - len(inverted)) + inverted
-            value = inverted
-
-        return value
+    def convert_to_hexadecimal(value: int, word_size) -> str:
+        result = hex(value)[2:]
+        result = '0' * (word_size - len(result)) + result
+        return result
 
     ##
-    # Converts a binary number to hexadecimal
+    # Converts a machine word to its hexadecimal representation,
+    # in two's complement for negative values
     #
-    # @param is an integer on string format
-    # @return hexadecimal representatio
+    # @param word integer value of the word
+    # @return 8 uppercase hexadecimal digits
     @staticmethod
-    def convert_binary_to_hexadecimal(num: str):
-        num = hex(int(num, 2))[2:]
-        num = '0' * (int(VirtualMachine.WORD_SIZE / 4) - len(num)) + num
-        output = ''
-
-        for ch in num:
-            if ch.isalpha():
-                ch = ch.upper()
-            output += ch
-
-        return output
+    def word_to_hexadecimal(word: int) -> str:
+        return f'{word & 0xFFFFFFFF:08X}'
 
     ##
-    # Convert an integer value to a hexadecimal representation
-    #
-    # @param value to convert
-    # @param memory word size
+    # Checks if a value fits in a field of the machine word
+    # raises *ValueError* if it does not fit
     #
+    # @param value signed integer
+    # @param bits size of the field
     @staticmethod
-    def convert_to_hexadecimal(value: int, word_size) -> str:
-        result = hex(value)[2:]
-        result = '0' * (word_size - len(result)) + result
-        return result
+    def check_field(value: int, bits):
+        if not -(1 << (bits - 1)) <= value < (1 << (bits - 1)):
+            raise ValueError('Overflow')
 
     ##
     # Returns the name of an instruction from a code.
@@ -162,54 +135,115 @@ class InstructionsUtils:
         else:
             raise ValueError('Decodificação: Código de instrução inválido.')
 
-    ##
-    # Converts a number encoded in binary two's complement to an integer.
-    # rases a *ValueError* if something unexpected happens.
-    #
-    # returns the converted version of the passes value
-    #
-    @staticmethod
-    def twos_complement_binary_to_int(val):
-        output = ''
-        if val[0] == '0':
-            try:
-                output = int(val[1:], 2)
-            except ValueError as err:
-                raise ValueError(f'Erro de decodificação: {err}')
-        else:
-            for ch in val:
-                if ch == '0':
-                    output += '1'
-                else:
-                    output += '0'
-            try:
-                output = int(output, 2) + 1
-            except ValueError as err:
-                raise ValueError(f'Erro de decodificação: {err}')
-            output *= -1
-
-        return output
-
-
 ##
 # It is an abstract class from which all instructions inherits
 #
+# The instructions are immutable records: their fields are kept in
+# __slots__ and exposed by read-only properties. They are created in
+# two ways: the constructor, that validates the operands of a line
+# of text, and from_fields, that trusts the fields of a machine word
+# already decoded (or of a translation already checked). As they
+# never change, one instruction serves every address that holds its
+# word (see Assembler.share and Assembler.decode_words).
+#
+# The machine word of an instruction is encoded once, as an integer,
+# and kept in the word attribute.
+#
+# The Assembler resolves the labels used as operands before the
+# execution (see resolve_labels), so the operands are always integers
+# and the symbol attribute keeps the label text only for display.
+#
 class Instruction:
     INSTRUCTION_CODE = 'super'
+    OPCODE = 0
+
+    __slots__ = ('_label', '_symbol', '_word')
 
     ##
     # Constructor Method
     #
-    def __init__(self):
-        self.address = None
+    # @param la label of the line or None
+    def __init__(self, la=None):
+        self._label = la
+        self._symbol = None
+        self._word = None
+
+    @property
+    def label(self):
+        return self._label
+
+    @property
+    def symbol(self):
+        return self._symbol
+
+    @property
+    def word(self):
+        return self._word
+
+    ##
+    # Returns the register of an operand of the text
+    # raises *ValueError* if the operand is not a register
+    #
+    # @param value operand
+    # @param position of the operand on the line, for the message
+    @staticmethod
+    def register_operand(value, position):
+        try:
+            return InstructionsUtils.validate_register_operator(value)
+        except ValueError as err:
+            raise ValueError(f'Argumento {position}: {err}')
+
+    ##
+    # Returns the instruction with the labels used as operands replaced
+    # by their values. Instructions without a label operand are
+    # returned as they are.
+    #
+    # @param labels dictionary of label name -> address
+    # @param address where the instruction is placed
+    def resolve_labels(self, labels, address):
+        return self
+
+    ##
+    # Returns a copy of the instruction, already encoded, with another
+    # label and symbol
+    #
+    # @param label name of the label of the line or None
+    # @param symbol text of the label used as operand or None
+    def named(self, label, symbol):
+        return self.decode(self.get_word(), label, symbol)
 
     ##
-    # Allows you to assign a value to the address attribute
+    # Creates the instruction encoded on a machine word
     #
-    # @param address to assign os attribute.
+    # @param word integer with the opcode of the class
+    # @param label name of the label of the line or None
+    # @param symbol text of the label used as operand or None
+    @classmethod
+    def decode(cls, word, label=None, symbol=None):
+        field = word & 0xFFFF
+        if field & 0x8000:
+            field -= 0x10000
+        return cls.from_fields(word, (word >> 19) & 0x7, (word >> 16) & 0x7, field, label, symbol)
+
+    ##
+    # Creates the instruction from the fields of a machine word,
+    # already extracted and valid, without the checks of the
+    # constructor. Used by the decoders.
     #
-    def set_address(self, address):
-        self.address = address
+    # @param word integer with the opcode of the class (None: the
+    # word is encoded from the fields when it is needed)
+    # @param reg_a register of bits 19-21
+    # @param reg_b register of bits 16-18
+    # @param field signed value of bits 0-15
+    # @param label name of the label of the line or None
+    # @param symbol text of the label used as operand or None
+    @classmethod
+    def from_fields(cls, word, reg_a, reg_b, field, label=None, symbol=None):
+        instruction = cls.__new__(cls)
+        instruction._label = label
+        instruction._symbol = symbol
+        instruction._word = word
+        return instruction
 
     ##
     # Abstract method that represents the Instructions operations.
@@ -217,11 +251,30 @@ class Instruction:
     def execute(self, virtual_machine):
         return True
 
+    ##
+    # Encodes the instruction as a machine word.
+    # The word has the opcode on bits 22-24.
+    #
+    # @param vm is a VirtualMachine class Object (unused)
+    # @return the word as an integer
+    def encode(self, vm=None):
+        return self.OPCODE << 22
+
+    ##
+    # Returns the machine word of the instruction, encoding it
+    # on the first call
+    #
+    # @param vm is a VirtualMachine class Object (unused)
+    def get_word(self, vm=None):
+        if self._word is None:
+            self._word = self.encode(vm)
+        return self._word
+
     ##
     # Returns the hexadecimal representation of the instruction
     #
-    def get_hexa_representation(self, *args):
-        return self.INSTRUCTION_CODE
+    def get_hexa_representation(self, vm=None):
+        return InstructionsUtils.word_to_hexadecimal(self.get_word(vm))
 
 
 ##
@@ -238,13 +291,14 @@ class TwoRegistersInstruction(Instruction):
     INSTRUCTION_NAME = '"Two Register Instruction"'
     INSTRUCTION_CODE = 'Superclass TwoRegistersIntruction'
 
+    __slots__ = ('_reg_a', '_reg_b', '_value')
+
     def __init__(self, la, ops):
-        super().__init__()
-        self.label = la
+        super().__init__(la)
         if len(ops) >= 3:
-            self.reg_a = ops[0]
-            self.reg_b = ops[1]
-            self.value = ops[2]
+            self._reg_a = self.register_operand(ops[0], 1)
+            self._reg_b = self.register_operand(ops[1], 2)
+            self._value = self.value_operand(ops[2])
         else:
             raise ValueError('Não há argumentos suficientes para a operação (necessário: 3)')
 
@@ -252,86 +306,99 @@ class TwoRegistersInstruction(Instruction):
     def reg_a(self):
         return self._reg_a
 
-    @reg_a.setter
-    def reg_a(self, value):
-        try:
-            value = InstructionsUtils.validate_register_operator(value)
-        except ValueError as err:
-            raise ValueError(f'Argumento 1: {err}')
-        self._reg_a = value
-
     @property
     def reg_b(self):
         return self._reg_b
 
-    @reg_b.setter
-    def reg_b(self, value):
-        try:
-            value = InstructionsUtils.validate_register_operator(value)
-        except ValueError as err:
-            raise ValueError(f'Argumento 2: {err}')
-        self._reg_b = value
-
     @property
     def value(self):
         return self._value
 
-    @value.setter
-    def value(self, value):
-        negative = False
+    ##
+    # Returns the value of the third operand of the text: an
+    # integer or the name of a label
+    # raises *ValueError* if the operand is neither
+    #
+    # @param value operand
+    @classmethod
+    def value_operand(cls, value):
         if isinstance(value, str):
-            if value[0] == '-':
-                if value[1:].isnumeric():
-                    negative = True
-                    value = value[1:]
-            if value.isnumeric():
+            digits = value[1:] if value[:1] == '-' else value
+            if digits.isnumeric():
                 value = int(value)
-                if negative:
-                    value *= -1
             else:
                 if not value.isalnum():
                     raise ValueError(f'Argumento 3: O valor passado ("{value}") '
                                      f'deve ser um inteiro ou um label válido.')
         elif not isinstance(value, int):
-            raise ValueError(f'Argumento 3: O valor {self.ATTRIBUTE_NAME} '
+            raise ValueError(f'Argumento 3: O valor {cls.ATTRIBUTE_NAME} '
                              f'deve ser um label ou um número inteiro.')
 
-        self._value = value
+        return value
 
     ##
-    # Covert the instruction to a hexadecimal representation.
+    # Creates the instruction from the fields of a machine word
     #
-    # @param vm is a VirtualMachine class Object
-    # @return hexadecimal representation
-    def get_hexa_representation(self, vm):
-        if isinstance(self.value, str):
-            try:
-                value = vm.get_label_value(self.value)
-            except ValueError as err:
-                raise ValueError(f'Não foi possível converter a '
-                                 f'instrução para hexadecimal. {err}')
-        else:
-            value = self.value
+    @classmethod
+    def from_fields(cls, word, reg_a, reg_b, field, label=None, symbol=None):
+        instruction = cls.__new__(cls)
+        instruction._label = label
+        instruction._symbol = symbol
+        instruction._word = word
+        instruction._reg_a = reg_a
+        instruction._reg_b = reg_b
+        instruction._value = field
+        return instruction
 
-        prefix = '0000000'
-        utils = InstructionsUtils()
-
-        rega = utils.convert_register_to_binary(self.reg_a)
-        regb = utils.convert_register_to_binary(self.reg_b)
+    ##
+    # Returns the instruction with a label used as the third operand
+    # replaced by its value. An operand already resolved is resolved
+    # again from its symbol, so the instruction follows a label that
+    # moved.
+    # raises *ValueError* if the label does not exist or its value
+    # does not fit in the 16 bit field
+    #
+    # @param labels dictionary of label name -> address
+    # @param address where the instruction is placed
+    def resolve_labels(self, labels, address):
+        symbol = self._symbol if self._symbol is not None else self._value
+        if not isinstance(symbol, str):
+            return self
+
+        if symbol not in labels:
+            raise ValueError(f'O label "{symbol}" não foi encontrado.')
+        value = self.relocate(labels[symbol], address)
         try:
-            value = utils.convert_to_binary_twos_complement(value, 16)
-        except ValueError as err:
-            raise ValueError(err)
+            InstructionsUtils.check_field(value, 16)
+        except ValueError:
+            raise ValueError(f'O label "{symbol}" ({value}) está fora do '
+                             f'alcance do campo de 16 bits.')
+
+        return self.from_fields(None, self._reg_a, self._reg_b, value, self._label, symbol)
+
+    ##
+    # Returns the value of the 16 bit field for a label address
+    #
+    # @param target address of the label
+    # @param address where the instruction is placed
+    def relocate(self, target, address):
+        return target
 
-        binary_representation = prefix + self.INSTRUCTION_CODE + rega + regb + value
-        output = utils.convert_binary_to_hexadecimal(binary_representation)
-        return output
+    ##
+    # Encodes the instruction as a machine word
+    #
+    # @param vm is a VirtualMachine class Object (unused)
+    # @return the word as an integer
+    def encode(self, vm=None):
+        InstructionsUtils.check_field(self._value, 16)
+        return (self.OPCODE << 22) | (self._reg_a << 19) | (self._reg_b << 16) | (self._value & 0xFFFF)
 
     ##
     # returns the representation of the instruction in pseudocode
     #
     def __repr__(self):
-        return f'{self.INSTRUCTION_NAME} {self.reg_a} {self.reg_b} {self.value}'
+        value = self._symbol if self._symbol is not None else self._value
+        return f'{self.INSTRUCTION_NAME} {self._reg_a} {self._reg_b} {value}'
 
 
 ##
@@ -344,17 +411,19 @@ class TwoRegistersInstruction(Instruction):
 class Add(Instruction):
     INSTRUCTION_NAME = 'add'
     INSTRUCTION_CODE = '000'
+    OPCODE = 0
+
+    __slots__ = ('_reg_a', '_reg_b', '_reg_dest')
 
     def __init__(self, la, ops):
-        super().__init__()
-        self.label = la
+        super().__init__(la)
 
         # check if there are enough operands for object
         # initialization
         if len(ops) >= 3:
-            self.reg_a = ops[0]
-            self.reg_b = ops[1]
-            self.reg_dest = ops[2]
+            self._reg_a = self.register_operand(ops[0], 1)
+            self._reg_b = self.register_operand(ops[1], 2)
+            self._reg_dest = self.register_operand(ops[2], 3)
         else:
             raise ValueError('Não há argumentos suficientes para a operação. (necessários: 3)')
 
@@ -362,37 +431,27 @@ class Add(Instruction):
     def reg_a(self):
         return self._reg_a
 
-    @reg_a.setter
-    def reg_a(self, value):
-        try:
-            value = InstructionsUtils.validate_register_operator(value)
-        except ValueError as err:
-            raise ValueError(f'Argumento 1: {err}')
-        self._reg_a = value
-
     @property
     def reg_b(self):
         return self._reg_b
 
-    @reg_b.setter
-    def reg_b(self, value):
-        try:
-            value = InstructionsUtils.validate_register_operator(value)
-        except ValueError as err:
-            raise ValueError(f'Argumento 2: {err}')
-        self._reg_b = value
-
     @property
     def reg_dest(self):
         return self._reg_dest
 
-    @reg_dest.setter
-    def reg_dest(self, value):
-        try:
-            value = InstructionsUtils.validate_register_operator(value)
-        except ValueError as err:
-            raise ValueError(f'Argumento 3: {err}')
-        self._reg_dest = value
+    ##
+    # Creates the instruction from the fields of a machine word
+    #
+    @classmethod
+    def from_fields(cls, word, reg_a, reg_b, field, label=None, symbol=None):
+        instruction = cls.__new__(cls)
+        instruction._label = label
+        instruction._symbol = symbol
+        instruction._word = word
+        instruction._reg_a = reg_a
+        instruction._reg_b = reg_b
+        instruction._reg_dest = field & 0x7
+        return instruction
 
     ##
     # Performs the operation of the add instruction
@@ -402,35 +461,24 @@ class Add(Instruction):
         value_b = vm.get_register_value(self._reg_b)
         try:
             result = int(value_a + value_b)
-            vm.set_register_value(result, self.reg_dest)
+            vm.set_register_value(result, self._reg_dest)
         except ValueError as err:
             raise ValueError(f'Erro de Execução: {err}')
 
         return True
 
     ##
-    # Covert the instruction to a hexadecimal representation.
+    # Encodes the instruction as a machine word
     #
-    # @param vm is a VirtualMachine class Object
-    # @return hexadecimal representation
-    def get_hexa_representation(self, *args):
-        utils = InstructionsUtils()
-        prefix = '0' * 7
-        rega = utils.convert_register_to_binary(self.reg_a)
-        regb = utils.convert_register_to_binary(self.reg_b)
-        regdest_complement = '0' * 13
-        regdest = utils.convert_register_to_binary(self.reg_dest)
-
-        bin_representation = prefix + rega + regb + regdest_complement + regdest
-        output = utils.convert_binary_to_hexadecimal(bin_representation)
-
-        return output
+    # @return the word as an integer
+    def encode(self, vm=None):
+        return (self.OPCODE << 22) | (self._reg_a << 19) | (self._reg_b << 16) | self._reg_dest
 
     ##
     # returns the representation of the instruction in pseudocode
     #
     def __repr__(self):
-        return f'{self.INSTRUCTION_NAME} {self.reg_a} {self.reg_b} {self.reg_dest}'
+        return f'{self.INSTRUCTION_NAME} {self._reg_a} {self._reg_b} {self._reg_dest}'
 
 
 ##
@@ -439,26 +487,21 @@ class Add(Instruction):
 class Addi(TwoRegistersInstruction):
     INSTRUCTION_NAME = 'addi'
     INSTRUCTION_CODE = '001'
+    OPCODE = 1
     ATTRIBUTE_NAME = 'Imediato'
+    immediate = TwoRegistersInstruction.value
 
-    def __init__(self, la, ops):
-        super().__init__(la, ops)
-        self.immediate = self.value
+    __slots__ = ()
 
     ##
     # Performs the operation of the addi instruction
     #
     def execute(self, vm):
-        value_a = vm.get_register_value(self.reg_a)
+        value_a = vm.get_register_value(self._reg_a)
 
         try:
-            if isinstance(self.immediate, str):
-                immediate = vm.get_label_value(self.immediate)
-            else:
-                immediate = self.immediate
-
-            result = int(value_a + immediate)
-            vm.set_register_value(result, self.reg_b)
+            result = int(value_a + self._value)
+            vm.set_register_value(result, self._reg_b)
         except ValueError as err:
             raise ValueError(f'Erro de Execução: {err}')
 
@@ -471,30 +514,25 @@ class Addi(TwoRegistersInstruction):
 class Lw(TwoRegistersInstruction):
     INSTRUCTION_NAME = 'lw'
     INSTRUCTION_CODE = '010'
+    OPCODE = 2
     ATTRIBUTE_NAME = 'Deslocamento'
+    displacement = TwoRegistersInstruction.value
 
-    def __init__(self, la, ops):
-        super().__init__(la, ops)
-        self.displacement = self.value
+    __slots__ = ()
 
     ##
     # Performs the operation of the lw instruction
     #
     def execute(self, vm):
-        value_a = vm.get_register_value(self.reg_a)
+        value_a = vm.get_register_value(self._reg_a)
 
         try:
-            if isinstance(self.displacement, str):
-                displacement = vm.get_label_value(self.displacement)
-            else:
-                displacement = self.displacement
-
-            address = int(value_a + displacement)
+            address = int(value_a + self._value)
 
             data = vm.get_main_memory_value(address)
             data = int(data)
 
-            vm.set_register_value(data, self.reg_b)
+            vm.set_register_value(data, self._reg_b)
 
         except ValueError as err:
             raise ValueError(f'Erro de Execução: {err}')
@@ -508,26 +546,20 @@ class Lw(TwoRegistersInstruction):
 class Sw(TwoRegistersInstruction):
     INSTRUCTION_NAME = 'sw'
     INSTRUCTION_CODE = '011'
+    OPCODE = 3
     ATTRIBUTE_NAME = 'Deslocamento'
+    displacement = TwoRegistersInstruction.value
 
-    def __init__(self, la, ops):
-        super().__init__(la, ops)
-        self.label = la
-        self.displacement = self.value
+    __slots__ = ()
 
     ##
     # Performs the operation of the sw instruction
     #
     def execute(self, vm):
-        value_on_reg_a = vm.get_register_value(self.reg_a)
+        value_on_reg_a = vm.get_register_value(self._reg_a)
 
         try:
-            if isinstance(self.displacement, str):
-                displacement = vm.get_label_value(self.displacement)
-            else:
-                displacement = self.displacement
-
-            address = int(value_on_reg_a + displacement)
+            address = int(value_on_reg_a + self._value)
 
             data = vm.get_register_value(self._reg_b)
             vm.set_main_memory_value(data, address)
@@ -543,72 +575,36 @@ class Sw(TwoRegistersInstruction):
 class Beq(TwoRegistersInstruction):
     INSTRUCTION_NAME = 'beq'
     INSTRUCTION_CODE = '100'
+    OPCODE = 4
     ATTRIBUTE_NAME = 'Deslocamento'
+    displacement = TwoRegistersInstruction.value
 
-    def __init__(self, la, ops):
-        super().__init__(la, ops)
-        self.displacement = self.value
+    __slots__ = ()
 
     ##
     # Performs the operation of the beq instruction
     #
     def execute(self, vm):
-        value_reg_a = vm.get_register_value(self.reg_a)
-        value_reg_b = vm.get_register_value(self.reg_b)
-        using_label = False
+        value_reg_a = vm.get_register_value(self._reg_a)
+        value_reg_b = vm.get_register_value(self._reg_b)
 
         try:
-            if isinstance(self.displacement, str):
-                displacement = vm.get_label_value(self.displacement)
-                using_label = True
-            else:
-                displacement = self.displacement
-
             if value_reg_a == value_reg_b:
-                if using_label:
-                    vm.set_pc(displacement - 1)
-                else:
-                    pc = vm.get_pc()
-                    vm.set_pc(pc + displacement)
+                pc = vm.get_pc()
+                vm.set_pc(pc + self._value)
         except (TypeError, ValueError) as err:
             raise ValueError(f'Erro de Execução: {err}')
 
         return True
 
     ##
-    # Covert the instruction to a hexadecimal representation.
+    # Returns the displacement to a label: the distance
+    # from the next instruction
     #
-    # @param vm is a VirtualMachine class Object
-    # @return hexadecimal representation
-    def get_hexa_representation(self, vm):
-        if isinstance(self.value, str):
-            try:
-                if self.address is not None:
-                    pc = self.address
-                else:
-                    pc = vm.get_pc()
-                value = vm.get_label_value(self.value)
-                value_fix = value - pc - 1
-                value = value_fix
-            except ValueError as err:
-                raise ValueError(f'Não foi possível converter a '
-                                 f'instrução para hexadecimal. {err}')
-        else:
-            value = self.value
-
-        prefix = '0000000'
-        utils = InstructionsUtils()
-
-        rega = utils.convert_register_to_binary(self.reg_a)
-        regb = utils.convert_register_to_binary(self.reg_b)
-        try:
-            value = utils.convert_to_binary_twos_complement(value, 16)
-        except ValueError as err:
-            raise ValueError(err)
-
-        binary_representation = prefix + self.INSTRUCTION_CODE + rega + regb + value
-        output = utils.convert_binary_to_hexadecimal(binary_representation)
-        return output
+    # @param target address of the label
+    # @param address where the instruction is placed
+    def relocate(self, target, address):
+        return target - address - 1
 
 
 ##
@@ -617,13 +613,15 @@ class Beq(TwoRegistersInstruction):
 class Jalr(Instruction):
     INSTRUCTION_NAME = 'jalr'
     INSTRUCTION_CODE = '101'
+    OPCODE = 5
+
+    __slots__ = ('_reg_a', '_reg_b')
 
     def __init__(self, la, ops):
-        super().__init__()
-        self.label = la
+        super().__init__(la)
         if len(ops) >= 2:
-            self.reg_a = ops[0]
-            self.reg_b = ops[1]
+            self._reg_a = self.register_operand(ops[0], 1)
+            self._reg_b = self.register_operand(ops[1], 2)
         else:
             raise ValueError('Não há argumentos suficientes para '
                              'a operação. (necessário: 2)')
@@ -632,36 +630,33 @@ class Jalr(Instruction):
     def reg_a(self):
         return self._reg_a
 
-    @reg_a.setter
-    def reg_a(self, value):
-        try:
-            value = InstructionsUtils.validate_register_operator(value)
-        except ValueError as err:
-            raise ValueError(f'Argumento 1: {err}')
-        self._reg_a = value
-
     @property
     def reg_b(self):
         return self._reg_b
 
-    @reg_b.setter
-    def reg_b(self, value):
-        try:
-            value = InstructionsUtils.validate_register_operator(value)
-        except ValueError as err:
-            raise ValueError(f'Argumento 2: {err}')
-        self._reg_b = value
+    ##
+    # Creates the instruction from the fields of a machine word
+    #
+    @classmethod
+    def from_fields(cls, word, reg_a, reg_b, field, label=None, symbol=None):
+        instruction = cls.__new__(cls)
+        instruction._label = label
+        instruction._symbol = symbol
+        instruction._word = word
+        instruction._reg_a = reg_a
+        instruction._reg_b = reg_b
+        return instruction
 
     ##
     # Performs the operation of the jalr instruction
     #
     def execute(self, vm):
         pc = vm.get_pc()
-        value_reg_a = vm.get_register_value(self.reg_a)
+        value_reg_a = vm.get_register_value(self._reg_a)
 
         try:
             result = int(pc + 1)
-            vm.set_register_value(result, self.reg_b)
+            vm.set_register_value(result, self._reg_b)
             # Receives the register value minus 1
             # because at the end the Engine will increment pc
             vm.set_pc(value_reg_a - 1)
@@ -671,28 +666,17 @@ class Jalr(Instruction):
         return True
 
     ##
-    # Covert the instruction to a hexadecimal representation.
+    # Encodes the instruction as a machine word
     #
-    # @param vm is a VirtualMachine class Object
-    # @return hexadecimal representation
-    def get_hexa_representation(self, *args):
-        utils = InstructionsUtils()
-
-        prefix = '0' * 7
-        suffix = '0' * 16
-        rega = utils.convert_register_to_binary(self.reg_a)
-        regb = utils.convert_register_to_binary(self.reg_b)
-
-        bin_representation = prefix + self.INSTRUCTION_CODE + rega + regb + suffix
-        output = utils.convert_binary_to_hexadecimal(bin_representation)
-
-        return output
+    # @return the word as an integer
+    def encode(self, vm=None):
+        return (self.OPCODE << 22) | (self._reg_a << 19) | (self._reg_b << 16)
 
     ##
     # returns the representation of the instruction in pseudocode
     #
     def __repr__(self):
-        return f'{self.INSTRUCTION_NAME} {self.reg_a} {self.reg_b}'
+        return f'{self.INSTRUCTION_NAME} {self._reg_a} {self._reg_b}'
 
 
 ##
@@ -701,10 +685,12 @@ class Jalr(Instruction):
 class Halt(Instruction):
     INSTRUCTION_NAME = 'halt'
     INSTRUCTION_CODE = '01800000'
+    OPCODE = 6
 
-    def __init__(self, la):
-        super().__init__()
-        self.label = la
+    __slots__ = ()
+
+    def __init__(self, la, ops=()):
+        super().__init__(la)
 
     ##
     # Performs the operation of the halt instruction
@@ -725,10 +711,12 @@ class Halt(Instruction):
 class Noop(Instruction):
     INSTRUCTION_NAME = 'noop'
     INSTRUCTION_CODE = '01C00000'
+    OPCODE = 7
+
+    __slots__ = ()
 
-    def __init__(self, la):
-        super().__init__()
-        self.label = la
+    def __init__(self, la, ops=()):
+        super().__init__(la)
 
     ##
     # Performs no operatin as the noop instruction
@@ -746,36 +734,45 @@ class Noop(Instruction):
 ##
 # Class that implemente the directive  ".fill"
 #
+# Like the instructions, it is an immutable record created by the
+# constructor from the text or by from_fields from a word.
+#
 class Fill:
     NAME = '.fill'
+    INSTRUCTION_NAME = NAME
+
+    __slots__ = ('_label', '_symbol', '_word', '_value')
 
     def __init__(self, la, ops):
-        self.label = la
+        self._label = la
         if len(ops) >= 1:
-            self.value = ops[0]
+            self._value = self.value_operand(ops[0])
         else:
             raise ValueError('Não há argumentos suficientes para a operação. (Necessário: 1)')
-        self.address = None
+        self._word = None
+        self._symbol = None
 
-    def set_address(self, address):
-        self.address = address
+    label = Instruction.label
+    symbol = Instruction.symbol
+    word = Instruction.word
+    named = Instruction.named
 
     @property
     def value(self):
         return self._value
 
-    @value.setter
-    def value(self, value):
+    ##
+    # Returns the value of the operand of the text: an integer that
+    # fits in a word or the name of a label
+    # raises *ValueError* if the operand is neither
+    #
+    # @param value operand
+    @staticmethod
+    def value_operand(value):
         if isinstance(value, str):
-            negative = False
-            if value[0] == '-':
-                if value[1:].isnumeric():
-                    value = value[1:]
-                    negative = True
-            if value.isnumeric():
+            digits = value[1:] if value[:1] == '-' else value
+            if digits.isnumeric():
                 value = int(value)
-                if negative:
-                    value *= -1
 
                 # Defining possible range
                 min_val = -1 * (2 ** (VirtualMachine.WORD_SIZE - 1))
@@ -792,37 +789,77 @@ class Fill:
             raise ValueError('Argumeto 1: O argumento deve ser um número '
                              'inteiro ou um label com caracteres válidos.')
 
-        self._value = value
+        return value
+
+    ##
+    # Creates the directive that stores a machine word
+    #
+    # @param word signed integer
+    # @param label name of the label of the line or None
+    # @param symbol text of the label used as value or None
+    @classmethod
+    def decode(cls, word, label=None, symbol=None):
+        return cls.from_fields(word, 0, 0, 0, label, symbol)
+
+    ##
+    # Creates the directive from the fields of a machine word,
+    # see Instruction.from_fields
+    #
+    @classmethod
+    def from_fields(cls, word, reg_a, reg_b, field, label=None, symbol=None):
+        directive = cls.__new__(cls)
+        directive._label = label
+        directive._symbol = symbol
+        directive._word = word
+        directive._value = word
+        return directive
+
+    ##
+    # Returns the directive with a label used as the value replaced by
+    # its address, again from the symbol if it was already resolved
+    # (see TwoRegistersInstruction)
+    # raises *ValueError* if the label does not exist
+    #
+    # @param labels dictionary of label name -> address
+    # @param address where the directive is placed (unused)
+    def resolve_labels(self, labels, address):
+        symbol = self._symbol if self._symbol is not None else self._value
+        if not isinstance(symbol, str):
+            return self
+
+        if symbol not in labels:
+            raise ValueError(f'O label "{symbol}" não foi encontrado.')
+        return self.from_fields(labels[symbol], 0, 0, 0, self._label, symbol)
 
     @staticmethod
     def execute(*args):
         return True
 
     ##
-    # Covert the instruction to a hexadecimal representation.
+    # Encodes the value as a machine word
     #
-    # @param vm is a VirtualMachine class Object
-    # @return hexadecimal representation
-    def get_hexa_representation(self, vm):
-        if isinstance(self.value, str):
-            try:
-                value = vm.get_label_value(self.value)
-            except ValueError as err:
-                raise ValueError(f'Não foi possível converter a instrução '
-                                 f'para hexadecimal. {err}')
-        else:
-            value = self.value
-
-        utils = InstructionsUtils()
+    # @param vm is a VirtualMachine class Object (unused)
+    # @return the word as a signed integer
+    def encode(self, vm=None):
+        InstructionsUtils.check_field(self._value, VirtualMachine.WORD_SIZE)
+        return self._value
 
-        try:
-            bin_repr = utils.convert_to_binary_twos_complement(value, VirtualMachine.WORD_SIZE)
-        except ValueError as err:
-            raise ValueError(err)
-        # bin_repr = '1' + bin_repr
-        output = utils.convert_binary_to_hexadecimal(bin_repr)
+    ##
+    # Returns the machine word of the value, encoding it on the first call
+    #
+    # @param vm is a VirtualMachine class Object (unused)
+    def get_word(self, vm=None):
+        if self._word is None:
+            self._word = self.encode(vm)
+        return self._word
 
-        return output
+    ##
+    # Covert the instruction to a hexadecimal representation.
+    #
+    # @param vm is a VirtualMachine class Object (unused)
+    # @return hexadecimal representation
+    def get_hexa_representation(self, vm=None):
+        return InstructionsUtils.word_to_hexadecimal(self.get_word(vm))
 
     def get_value(self):
         return self._value
@@ -831,4 +868,247 @@ class Fill:
     # returns the representation of the number passed along with the directive
     #
     def __repr__(self):
-        return f'{self.NAME} {self.value}'
+        value = self._symbol if self._symbol is not None else self._value
+        return f'{self.NAME} {value}'
+
+
+##
+# It is an abstract class from which the directives that place a
+# block of words inherits: .space, .array and .incbin. The operands
+# are checked and the size is known when the line is translated, but
+# the words (a contiguous buffer, array('i')) are read only when they
+# are placed, so counting the words of a line is cheap. The Assembler
+# places a .fill per word, shared by the equal words (see expand), so
+# the block goes to the main memory at once with the other words of
+# the program (see Engine.update_vm_main_memory).
+#
+class Block:
+    NAME = 'block'
+    INSTRUCTION_NAME = NAME
+    TYPECODE = 'i'
+    # Largest number of words of a block
+    MAX_SIZE = 1 << 20
+    # True if the words come from a file and not from the text
+    EXTERNAL = False
+
+    __slots__ = ('_label',)
+
+    def __init__(self, la, ops):
+        self._label = la
+        self.read_operands(ops)
+
+    label = Instruction.label
+
+    ##
+    # Abstract method that checks the operands and keeps what the
+    # block needs to place its words
+    # raises *ValueError* if the operands are not valid
+    #
+    # @param ops list of operands of the line
+    def read_operands(self, ops):
+        pass
+
+    ##
+    # Returns the words of the block
+    # raises *ValueError* if the words can not be read
+    #
+    # @return array('i') with the words
+    @property
+    def words(self):
+        return array(self.TYPECODE)
+
+    ##
+    # Returns the number of words of the block
+    #
+    @property
+    def size(self):
+        return 0
+
+    ##
+    # Checks the number of words of a block
+    # raises *ValueError* if the block is larger than MAX_SIZE
+    #
+    @classmethod
+    def check_size(cls, size):
+        if size > cls.MAX_SIZE:
+            raise ValueError(f'{cls.NAME} deve ter no máximo {cls.MAX_SIZE} palavras.')
+        return size
+
+    ##
+    # Returns the .fill of each word of the block. The equal words
+    # share a .fill; the first one keeps the label of the block.
+    # raises *ValueError* if the words can not be read
+    #
+    # @return list of Fill
+    def expand(self):
+        shared = dict()
+        directives = []
+        append = directives.append
+        for word in self.words:
+            directive = shared.get(word)
+            if directive is None:
+                directive = shared[word] = Fill.decode(word)
+            append(directive)
+        return self.name_first(directives)
+
+    ##
+    # Gives the label of the block to the first of its .fill
+    #
+    # @param directives list of Fill of the block
+    def name_first(self, directives):
+        if directives and self._label is not None:
+            directives[0] = directives[0].named(self._label, None)
+        return directives
+
+    ##
+    # Writes the machine code of the words of the block, a word of
+    # 8 hexadecimal digits per line
+    # raises *ValueError* if the words can not be read
+    #
+    # @param write function that writes a text
+    def write_hexa(self, write):
+        for word in self.words:
+            write(InstructionsUtils.word_to_hexadecimal(word) + '\n')
+
+    ##
+    # returns the representation of the directive
+    #
+    def __repr__(self):
+        return f'{self.NAME} ({self.size} palavras)'
+
+
+##
+# Class that implements the directive ".space": reserves a block of
+# words with zero. Only the size is kept; the zeros are placed by the
+# image of the program (see Assembler.encode_words).
+#
+# .space size
+#
+class Space(Block):
+    NAME = '.space'
+    INSTRUCTION_NAME = NAME
+    # Lines of zeros written at a time by write_hexa
+    HEXA_CHUNK = 4096
+
+    __slots__ = ('_size',)
+
+    def read_operands(self, ops):
+        if len(ops) < 1:
+            raise ValueError('Não há argumentos suficientes para a operação. (Necessário: 1)')
+        if not ops[0].isdecimal():
+            raise ValueError('Argumento 1: O tamanho deve ser um número inteiro positivo.')
+        self._size = self.check_size(int(ops[0]))
+
+    @property
+    def words(self):
+        return array(self.TYPECODE, bytes(array(self.TYPECODE).itemsize * self._size))
+
+    @property
+    def size(self):
+        return self._size
+
+    def expand(self):
+        return self.name_first([Fill.decode(0)] * self._size)
+
+    def write_hexa(self, write):
+        zeros = '00000000\n' * self.HEXA_CHUNK
+        for start in range(0, self._size, self.HEXA_CHUNK):
+            write(zeros[:9 * min(self.HEXA_CHUNK, self._size - start)])
+
+
+##
+# Class that implements the directive ".array": a word per integer
+# operand, separated by spaces or commas
+#
+# .array value, value, ...
+#
+class Array(Block):
+    NAME = '.array'
+    INSTRUCTION_NAME = NAME
+
+    __slots__ = ('_words',)
+
+    def read_operands(self, ops):
+        values = ' '.join(ops).replace(',', ' ').split()
+        if not values:
+            raise ValueError('Não há argumentos suficientes para a operação. (Necessário: 1)')
+        self.check_size(len(values))
+
+        for position, value in enumerate(values, 1):
+            digits = value[1:] if value[:1] == '-' else value
+            if not digits.isdecimal():
+                raise ValueError(f'Argumento {position}: .array recebe somente números inteiros.')
+        try:
+            self._words = array(self.TYPECODE, map(int, values))
+        except OverflowError:
+            min_val = -1 * (2 ** (VirtualMachine.WORD_SIZE - 1))
+            max_val = (2 ** (VirtualMachine.WORD_SIZE - 1)) - 1
+            raise ValueError(f'.array deve receber valores entre {min_val} e {max_val}')
+
+    @property
+    def words(self):
+        return self._words
+
+    @property
+    def size(self):
+        return len(self._words)
+
+
+##
+# Class that implements the directive ".incbin": includes the content
+# of a binary file, as signed 32 bit little endian words (the last
+# one completed with zeros). A relative path is relative to the
+# current directory. The size comes from the size of the file; the
+# file is read only when the words are placed.
+#
+# .incbin path
+#
+class Incbin(Block):
+    NAME = '.incbin'
+    INSTRUCTION_NAME = NAME
+    EXTERNAL = True
+
+    __slots__ = ('_path', '_size')
+
+    def read_operands(self, ops):
+        path = ' '.join(ops).strip('"\'')
+        if not path:
+            raise ValueError('Não há argumentos suficientes para a operação. (Necessário: 1)')
+
+        try:
+            size = os.stat(path).st_size
+        except OSError as err:
+            raise ValueError(f'Não foi possível ler o arquivo "{path}": {err.strerror}')
+        self._path = path
+        self._size = self.check_size(-(-size // array(self.TYPECODE).itemsize))
+
+    @property
+    def words(self):
+        try:
+            with open(self._path, 'rb') as f:
+                data = f.read()
+        except OSError as err:
+            raise ValueError(f'Não foi possível ler o arquivo "{self._path}": {err.strerror}')
+
+        itemsize = array(self.TYPECODE).itemsize
+        words = array(self.TYPECODE, data + bytes(-len(data) % itemsize))
+        if len(words) != self._size:
+            raise ValueError(f'O arquivo "{self._path}" mudou durante a tradução.')
+        if sys.byteorder != 'little':
+            words.byteswap()
+        return words
+
+    @property
+    def size(self):
+        return self._size
+
+
+##
+# Registry of the instruction set. Each class declares its syntax
+# (the constructor), encoder (encode), decoder (decode) and executor
+# (execute), and the Assembler finds it by name or by opcode.
+#
+INSTRUCTION_SET = {cls.INSTRUCTION_NAME: cls
+                   for cls in (Add, Addi, Lw, Sw, Beq, Jalr, Halt, Noop, Fill, Space, Array, Incbin)}
+OPCODES = {cls.OPCODE: cls for cls in (Add, Addi, Lw, Sw, Beq, Jalr, Halt, Noop)}
+BLOCKS = {cls.NAME: cls for cls in (Space, Array, Incbin)}
@@ -0,0 +1,352 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package jit
+#
+#   Translation of hot basic blocks into Python functions.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from dispatch import Dispatcher
+from instruction_set import Add, Addi, Lw, Sw, Beq, Jalr, Halt, Noop, Fill
+from collections import OrderedDict
+import sys
+
+
+##
+# Raised by a compiled block when an instruction fails.
+# Carries the address of the instruction and how many
+# instructions of the block were executed before it.
+#
+class BlockFault(Exception):
+    def __init__(self, address, executed, message):
+        super().__init__(message)
+        self.address = address
+        self.executed = executed
+        self.message = message
+
+
+##
+# A block translated into a Python function
+#
+class CompiledBlock:
+    def __init__(self, entry, addresses, function, source, halt_address=None):
+        self.entry = entry
+        # instructions executed by one pass over the block
+        self.length = len(addresses)
+        self.addresses = addresses
+        self.function = function
+        self.source = source
+        self.halt_address = halt_address
+
+    def __repr__(self):
+        return f'<bloco {self.entry}: {self.addresses}>'
+
+
+##
+# The BlockCompiler executes like the Dispatcher, but counts how
+# many times each address starts a block. When an address reaches
+# HOT_THRESHOLD, the block that starts there is translated into
+# Python code, compiled with compile()/exec and executed as one call.
+#
+# A block is a chain of basic blocks: the translation follows the
+# not taken side of a beq (or the target of an unconditional beq)
+# and stops on jalr, halt, an instruction already translated or an
+# instruction that can not be translated. A beq back to the entry
+# becomes a loop inside the function, so a hot loop runs entirely
+# in Python code, with the registers in local variables.
+#
+# A store over an address covered by a compiled block discards the
+# block, which is translated again when it becomes hot once more.
+#
+# @see Dispatcher
+class BlockCompiler(Dispatcher):
+    HOT_THRESHOLD = 16
+    MAX_BLOCK_LENGTH = 256
+    ADDRESS_ERROR = ('Erro de Execução: O endereço "{}" da memória '
+                     'principal não pode ser acessado.')
+    PC_ERROR = 'Erro de Execução: Valor inválido para PC'
+
+    # Code objects shared by every compiler, indexed by the block source.
+    # The least recently used ones are dropped after CODE_CACHE_SIZE.
+    CODE_CACHE_SIZE = 1024
+    code_cache = OrderedDict()
+
+    def __init__(self, execution_queue, virtual_machine):
+        super().__init__(execution_queue, virtual_machine)
+        self.execution_queue = execution_queue
+        self.blocks = [None] * self.size
+        self.counts = [0] * self.size
+        # address -> entries of the compiled blocks that cover it
+        self.owners = dict()
+
+    ##
+    # Executes the program from pc, running compiled blocks when
+    # available. Stops on the same conditions of Dispatcher.run.
+    #
+    # @param pc address of the first instruction
+    # @param max_steps limit of instructions to execute (None: no limit)
+    # @return number of instructions executed
+    def run(self, pc, max_steps=None):
+        table = self.table
+        blocks = self.blocks
+        counts = self.counts
+        hot = self.HOT_THRESHOLD
+        executed = 0
+        self.halted = False
+
+        if not 0 <= pc < self.size:
+            self.pc = pc
+            return 0
+
+        if max_steps is None:
+            max_steps = sys.maxsize
+
+        nxt = pc
+        last = pc
+        try:
+            while executed < max_steps:
+                pc = nxt
+                block = blocks[pc]
+                if block is not None and executed + block.length <= max_steps:
+                    nxt, count = block.function(max_steps - executed)
+                    executed += count
+                    last = block.halt_address
+                else:
+                    count = counts[pc] + 1
+                    counts[pc] = count
+                    if count == hot:
+                        self.compile_block(pc)
+                    last = pc
+                    nxt = table[pc]()
+                    executed += 1
+                if nxt < 0:
+                    break
+        except BlockFault as fault:
+            self.pc = fault.address
+            self.steps += executed + fault.executed
+            raise ValueError(fault.message)
+        except ValueError:
+            self.pc = pc
+            self.steps += executed
+            raise
+
+        self.steps += executed
+        if nxt == self.HALT:
+            self.pc = last
+            self.halted = True
+        elif nxt == self.INVALID_PC:
+            self.pc = -1
+        else:
+            self.pc = nxt
+
+        return executed
+
+    ##
+    # Updates the handler and discards the compiled blocks
+    # that cover an address after a store
+    #
+    # @param address that received the store
+    def store_on_program(self, address):
+        super().store_on_program(address)
+
+        for entry in self.owners.pop(address, ()):
+            block = self.blocks[entry]
+            if block is None:
+                continue
+            self.blocks[entry] = None
+            self.counts[entry] = 0
+            for i in block.addresses:
+                if i != address:
+                    self.owners.get(i, set()).discard(entry)
+
+    ##
+    # Checks if the instruction on an address can be translated.
+    # Instructions that always fail, words changed by a store and
+    # jumps to invalid addresses are left to the Dispatcher handlers.
+    #
+    def is_compilable(self, address):
+        if self.table[address] is not self.handlers[address]:
+            return False
+
+        inst = self.execution_queue[address]
+        if isinstance(inst, Add):
+            return inst.reg_dest != 0
+        if isinstance(inst, (Addi, Lw, Jalr)):
+            return inst.reg_b != 0
+        if isinstance(inst, Beq):
+            return self.branch_target(inst, address) >= 0
+        return isinstance(inst, (Sw, Halt, Noop, Fill))
+
+    ##
+    # Returns the address reached by a taken beq
+    #
+    def branch_target(self, inst, address):
+        return address + inst.displacement + 1
+
+    ##
+    # Returns the addresses of the block that starts on entry
+    #
+    def find_block(self, entry):
+        addresses = []
+        address = entry
+        while (0 <= address < self.size and address not in addresses
+               and len(addresses) < self.MAX_BLOCK_LENGTH
+               and self.is_compilable(address)):
+            addresses.append(address)
+            inst = self.execution_queue[address]
+            if isinstance(inst, (Jalr, Halt)):
+                break
+            if isinstance(inst, Beq) and inst.reg_a == inst.reg_b:
+                address = self.branch_target(inst, address)
+            else:
+                address += 1
+
+        return addresses
+
+    ##
+    # Returns the code object of a block source, compiling it if it is
+    # not on the shared cache
+    #
+    # @param source of the block
+    # @param entry address of the block, used on tracebacks
+    def compile_source(self, source, entry):
+        cache = self.code_cache
+        code = cache.get(source)
+        if code is None:
+            code = compile(source, f'<bloco {entry}>', 'exec')
+            cache[source] = code
+            if len(cache) > self.CODE_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(source)
+        return code
+
+    ##
+    # Translates the block that starts on entry
+    #
+    # @param entry address of the first instruction of the block
+    # @return the CompiledBlock or None if the block is empty
+    def compile_block(self, entry):
+        addresses = self.find_block(entry)
+        if not addresses:
+            return None
+
+        source = self.generate_source(addresses)
+        code = self.compile_source(source, entry)
+
+        namespace = {
+            'regs': self.registers,
+            'read': self.read,
+            'write': self.write,
+            'store': self.store_on_program,
+            'BlockFault': BlockFault,
+        }
+        exec(code, namespace)
+
+        halt_address = None
+        if isinstance(self.execution_queue[addresses[-1]], Halt):
+            halt_address = addresses[-1]
+
+        block = CompiledBlock(entry, addresses, namespace['block'], source, halt_address)
+        self.blocks[entry] = block
+        for i in addresses:
+            self.owners.setdefault(i, set()).add(entry)
+
+        return block
+
+    ##
+    # Generates the Python source of a block
+    #
+    # @param addresses of the instructions in execution order
+    def generate_source(self, addresses):
+        instructions = [self.execution_queue[i] for i in addresses]
+        entry = addresses[0]
+        length = len(addresses)
+
+        used = set()
+        written = set()
+        for inst in instructions:
+            for name in ('reg_a', 'reg_b', 'reg_dest'):
+                reg = getattr(inst, name, 0)
+                if reg:
+                    used.add(reg)
+            if isinstance(inst, Add):
+                written.add(inst.reg_dest)
+            elif isinstance(inst, (Addi, Lw, Jalr)):
+                written.add(inst.reg_b)
+
+        def reg(r):
+            return f'r{r}' if r else '0'
+
+        write_back = [f'regs[{r}] = r{r}' for r in sorted(written)]
+
+        def exit_block(indent, result):
+            return [indent + line for line in write_back] + [f'{indent}return {result}']
+
+        def fault(indent, address, k, message):
+            return [indent + line for line in write_back] + \
+                   [f'{indent}raise BlockFault({address}, n + {k}, {message})']
+
+        # Goes to address after k + 1 instructions of the pass
+        def go_to(indent, address, k):
+            if address == entry:
+                return [f'{indent}n += {k + 1}',
+                        f'{indent}if n + {length} > budget:'] + \
+                       exit_block(indent + '    ', f'{entry}, n') + \
+                       [f'{indent}continue']
+            return exit_block(indent, f'{self.next_pc(address)}, n + {k + 1}')
+
+        lines = ['def block(budget, regs=regs, read=read, write=write, store=store, BlockFault=BlockFault):']
+        lines += [f'    r{r} = regs[{r}]' for r in sorted(used)]
+        lines.append('    n = 0')
+        lines.append('    while True:')
+
+        indent = ' ' * 8
+        for k, inst in enumerate(instructions):
+            address = addresses[k]
+            following = address + 1
+            lines.append(f'{indent}# {address}: {inst}')
+
+            if isinstance(inst, Add):
+                lines.append(f'{indent}r{inst.reg_dest} = {reg(inst.reg_a)} + {reg(inst.reg_b)}')
+            elif isinstance(inst, Addi):
+                immediate = inst.immediate
+                lines.append(f'{indent}r{inst.reg_b} = {reg(inst.reg_a)} + {immediate}')
+            elif isinstance(inst, (Lw, Sw)):
+                displacement = inst.displacement
+                lines.append(f'{indent}t = {reg(inst.reg_a)} + {displacement}')
+                lines.append(f'{indent}if not 0 <= t <= {self.virtual_machine.MAX_MEM_ADDRESS}:')
+                lines += fault(indent + '    ', address, k, f'{self.ADDRESS_ERROR!r}.format(t)')
+                if isinstance(inst, Lw):
+                    lines.append(f'{indent}r{inst.reg_b} = read(t)')
+                else:
+                    lines.append(f'{indent}write(t, {reg(inst.reg_b)})')
+                    # a store over the program ends the block, that may be stale
+                    lines.append(f'{indent}if t < {self.size}:')
+                    lines += [f'{indent}    {line}' for line in write_back]
+                    lines.append(f'{indent}    store(t)')
+                    lines.append(f'{indent}    return {self.next_pc(following)}, n + {k + 1}')
+            elif isinstance(inst, Beq):
+                target = self.branch_target(inst, address)
+                if inst.reg_a == inst.reg_b:
+                    following = target
+                else:
+                    lines.append(f'{indent}if {reg(inst.reg_a)} == {reg(inst.reg_b)}:')
+                    lines += go_to(indent + '    ', target, k)
+            elif isinstance(inst, Jalr):
+                lines.append(f'{indent}t = {reg(inst.reg_a)}')
+                lines.append(f'{indent}r{inst.reg_b} = {following}')
+                lines.append(f'{indent}if t < 0:')
+                lines += fault(indent + '    ', address, k, repr(self.PC_ERROR))
+                lines += exit_block(indent, f'(t if t < {self.size} else {self.INVALID_PC}), n + {k + 1}')
+                break
+            elif isinstance(inst, Halt):
+                lines += exit_block(indent, f'{self.HALT}, n + {k + 1}')
+                break
+
+            if k == length - 1:
+                lines += go_to(indent, following, k)
+
+        return '\n'.join(lines) + '\n'
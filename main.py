@@ -9,12 +9,16 @@
 #   @since 10/03/2020
 #
 from PySide2.QtWidgets import QApplication, QListWidgetItem, QTableWidgetItem, QFileDialog
-from PySide2.QtCore import Qt
+from PySide2.QtCore import Qt, QTimer
 from ui_help import Help
 from ui_main_window import Window
 from engine import Engine
+from ui_engine_worker import EngineWorker, QueuedObserver
 from instruction_set import InstructionsUtils as Utils, Fill, Instruction
 from assembler import Assembler
+from object_file import ObjectFile
+from aot import ModuleGenerator
+import io
 import sys
 
 
@@ -22,6 +26,16 @@ import sys
 # Class that configures the Graphic User Interface
 #
 class MainWindow(Window):
+    # Execution rates selected by the dial, in instructions
+    # per second (None: no limit)
+    CLOCK_RATES = [0.5, 1, 2, 5, 10, 100, 1000, 10000, 100000, 1000000, None]
+    DEFAULT_RATE_INDEX = 2
+    RATE_METER_INTERVAL = 250
+    # Lines of the disassembly of an image shown on the editor
+    DISASSEMBLY_LINES = 200
+    # Addresses of the memory table shown while an image is loaded
+    MEMORY_TABLE_LINES = 200
+
     def __init__(self):
         super().__init__()
 
@@ -31,8 +45,15 @@ class MainWindow(Window):
 
         self.is_external_document = False
         self.path_external_document = ''
+        # image loaded by image_open, shown only as a disassembly
+        self.image_path = None
+        # address of the first row of the memory table
+        self.memory_table_first = 0
 
-        self.engine = Engine(self)
+        self.engine = Engine(QueuedObserver(self))
+        # the files opened again are loaded from their translations
+        self.engine.use_assembly_cache()
+        self.worker = None
 
         self.configure_actions()
 
@@ -55,11 +76,16 @@ class MainWindow(Window):
         self.action_salvar.triggered.connect(self.file_save)
         self.action_salvar_como.triggered.connect(self.file_save_as)
         self.action_exportar.triggered.connect(self.file_export)
+        self.action_exportar_python.triggered.connect(self.file_export_python)
         self.action_abrir.triggered.connect(self.file_open)
+        self.action_carregar_imagem.triggered.connect(self.image_open)
         self.action_fechar.triggered.connect(self.file_close)
         self.action_sair.triggered.connect(self.close_application)
         # Executar
         self.action_executar.triggered.connect(self.execute)
+        self.action_pausar.triggered.connect(self.pause_execution)
+        self.action_continuar.triggered.connect(self.resume_execution)
+        self.action_parar.triggered.connect(self.stop_execution)
         self.action_executar_etapas.triggered.connect(self.run_in_steps)
         self.action_avancar.triggered.connect(self.step_foward)
         self.action_traduzir.triggered.connect(self.translate)
@@ -74,20 +100,53 @@ class MainWindow(Window):
     #
     def configure_clock_widgets(self):
         # setting up initial values
-        clock = self.engine.clock
-        self.dial_clock.setValue(clock * 10)
-        self.lcd_clock_value.display(clock)
+        self.dial_clock.setMaximum(len(self.CLOCK_RATES) - 1)
+        self.dial_clock.setValue(self.DEFAULT_RATE_INDEX)
+        self.change_clock()
 
         # triggering dial button
         self.dial_clock.valueChanged.connect(self.change_clock)
 
+        # shows the achieved rate while a program runs
+        self.rate_meter = QTimer(self)
+        self.rate_meter.setInterval(self.RATE_METER_INTERVAL)
+        self.rate_meter.timeout.connect(self.update_rate_meter)
+
     ##
     # Method called to change the engine clock
     #
     def change_clock(self):
-        clock_value = self.dial_clock.value() / 10
-        self.lcd_clock_value.display(clock_value)
-        self.engine.set_clock(clock_value)
+        rate = self.CLOCK_RATES[self.dial_clock.value()]
+        self.engine.set_rate(rate)
+        self.dial_clock.setToolTip(f'Ajustar clock: {self.format_rate(rate)}')
+        self.show_rate(rate)
+
+    ##
+    # Shows the rate achieved by the running program
+    #
+    def update_rate_meter(self):
+        self.show_rate(self.engine.pacer.achieved_rate)
+
+    ##
+    # Shows a rate on the clock display
+    #
+    # @param rate instructions per second (None: no limit)
+    def show_rate(self, rate):
+        if rate is None:
+            self.lcd_clock_value.display('-')
+        elif rate < 10:
+            self.lcd_clock_value.display(round(rate, 1))
+        else:
+            self.lcd_clock_value.display(int(rate))
+
+    ##
+    # Returns the description of an execution rate
+    #
+    @staticmethod
+    def format_rate(rate):
+        if rate is None:
+            return 'sem limite'
+        return f'{rate:g} instruções/s'
 
     ##
     # Save current open file or calls save all dialog to save a new file
@@ -155,6 +214,7 @@ class MainWindow(Window):
                                            'Exportar para binário...',
                                            '',
                                            'Binário (*.mc);;'
+                                           'Objeto (*.ko);;'
                                            'Todos os arquivos (*.*)')
         try:
             if not file[0]:
@@ -163,21 +223,51 @@ class MainWindow(Window):
         except IndexError as err:
             self.log_on_console(f'Erro Interno: {err}')
 
-        self.engine.create_virtual_machine()
-        vm = self.engine.virtual_machine
-
         text = self.frame_editor.code_editor.toPlainText()
-        output = ''
         try:
             assembler = Assembler()
-            instructions = assembler.assemble(text)
-            for i, inst in enumerate(instructions):
-                output += inst.get_hexa_representation(vm)
-                if i < len(instructions):
-                    output += '\n'
+            if file[0].endswith(ObjectFile.EXTENSION):
+                assembler.assemble_object(text, file[0])
+            else:
+                assembler.assemble_file(io.StringIO(text), file[0])
+        except ValueError as err:
+            error = 'Falha ao exportar o arquivo.'
+            detail = f'Ocorreu um erro na tradução. (Erro: {err})'
 
-            with open(file[0], 'w') as f:
-                f.write(output)
+            self.show_info_dialog(title, error, detail)
+        except OSError:
+            error = 'Não foi possivel Exportar o arquivo.'
+            detail = 'Verifique se você tem permissão para ' \
+                     'salvar arquivos no local selecionado.'
+            self.show_info_dialog(title, error, detail)
+
+    ##
+    # Translates current code ahead of time to a standalone
+    # Python module and opens a dialog to save it
+    #
+    def file_export_python(self):
+        title = 'Exportar para Python...'
+
+        file = QFileDialog.getSaveFileName(self,
+                                           'Exportar para Python...',
+                                           '',
+                                           'Python (*.py);;'
+                                           'Todos os arquivos (*.*)')
+        try:
+            if not file[0]:
+                # user Canceled/ close dialog
+                return
+        except IndexError as err:
+            self.log_on_console(f'Erro Interno: {err}')
+
+        text = self.frame_editor.code_editor.toPlainText()
+        try:
+            # a headless engine, so the machine on the interface is kept
+            engine = Engine()
+            engine.translate(text)
+            generator = ModuleGenerator(engine.execution_queue, engine.virtual_machine)
+            with open(file[0], 'w', encoding='utf-8') as f:
+                f.write(generator.generate())
         except ValueError as err:
             error = 'Falha ao exportar o arquivo.'
             detail = f'Ocorreu um erro na tradução. (Erro: {err})'
@@ -197,9 +287,10 @@ class MainWindow(Window):
         name = QFileDialog.getOpenFileName(self,
                                            'Abrir arquivo',
                                            '',
-                                           'Arquivos kindA (*.asc *.mc);'
+                                           'Arquivos kindA (*.asc *.mc *.ko);'
                                            ';Código Fonte (*.asc);'
                                            '; Binário (*.mc);'
+                                           '; Objeto (*.ko);'
                                            ';Todos os Arquivos (*.*)')
 
         try:
@@ -212,9 +303,14 @@ class MainWindow(Window):
             title = 'Abrir...'
             self.show_info_dialog(title, error, detail)
 
+        if ObjectFile.is_object(name[0]):
+            self.object_open(name[0])
+            return
+
         try:
             with open(name[0], 'r') as f:
                 text = f.read()
+                self.close_listing()
                 self.frame_editor.code_editor.setPlainText(text)
                 self.path_external_document = name[0]
                 self.is_external_document = True
@@ -226,11 +322,124 @@ class MainWindow(Window):
             detail = f'Arquivo inválido: {err}'
             title = 'Abrir...'
             self.show_info_dialog(title, error, detail)
+            return
+
+        # a translation of the same text kept on the cache is loaded now
+        if not self.is_executing():
+            with self.engine.lock:
+                loaded = self.engine.load_cached(self.frame_editor.code_editor.toPlainText())
+            if loaded:
+                self.log_on_console('Tradução carregada do cache.')
+
+    ##
+    # Loads an object file on the virtual machine and shows its
+    # machine code on the editor. The machine code has no labels nor
+    # sections, so it is shown read-only and can not be saved over
+    # the object.
+    #
+    # @param path of the object file
+    def object_open(self, path):
+        title = 'Abrir...'
+        if self.is_executing():
+            self.show_info_dialog(title, 'Falha ao abrir o arquivo',
+                                  'Aguarde o fim da execução para carregar um objeto.')
+            return
+
+        self.clear_memory_table()
+        try:
+            with self.engine.lock:
+                self.engine.load_object(path)
+            with ObjectFile(path) as obj:
+                text = obj.machine_code()
+        except ValueError as err:
+            self.show_info_dialog(title, 'Falha ao abrir o arquivo', str(err))
+            return
+
+        self.close_listing()
+        self.frame_editor.code_editor.show_listing(text)
+        self.is_external_document = False
+        self.path_external_document = ''
+        self.enable_document_actions(False)
+        self.action_fechar.setDisabled(False)
+        self.open_code_editor_tab()
+
+    ##
+    # Opens a dialog to load an image (a machine code file or a raw
+    # binary image) straight into the virtual machine. The text of
+    # the file never goes to the editor, that shows only the
+    # disassembly of the words around the pc (see show_disassembly).
+    #
+    def image_open(self):
+        name = QFileDialog.getOpenFileName(self,
+                                           'Carregar imagem',
+                                           '',
+                                           'Imagens kindA (*.mc *.bin);'
+                                           '; Binário (*.mc);'
+                                           '; Imagem binária (*.bin);'
+                                           ';Todos os Arquivos (*.*)')
+        if not name[0]:
+            return
+
+        title = 'Carregar imagem...'
+        if self.is_executing():
+            self.show_info_dialog(title, 'Falha ao carregar a imagem',
+                                  'Aguarde o fim da execução para carregar uma imagem.')
+            return
+
+        self.clear_memory_table()
+        try:
+            with self.engine.lock:
+                self.engine.load_image(name[0])
+        except ValueError as err:
+            self.show_info_dialog(title, 'Falha ao carregar a imagem', str(err))
+            return
+
+        self.image_path = name[0]
+        self.is_external_document = False
+        self.path_external_document = ''
+        self.action_fechar.setDisabled(False)
+        self.enable_document_actions(False)
+        self.show_disassembly()
+        self.open_code_editor_tab()
+
+    ##
+    # Shows on the editor the disassembly of the words of the
+    # loaded image around the pc
+    #
+    # @param pc address shown (None: the pc of the virtual machine)
+    def show_disassembly(self, pc=None):
+        if pc is None:
+            snapshot = self.engine.snapshot()
+            pc = snapshot.pc if snapshot is not None else 0
+        first, text = self.engine.disassemble(pc, self.DISASSEMBLY_LINES)
+        self.frame_editor.code_editor.show_listing(text, pc - first)
+
+    ##
+    # Forgets the loaded image and makes the editor editable again
+    # after an image or an object was shown
+    #
+    def close_listing(self):
+        self.image_path = None
+        if self.frame_editor.code_editor.isReadOnly():
+            self.frame_editor.code_editor.show_editable()
+            self.enable_document_actions(True)
+
+    ##
+    # Enables the actions that save the text of the editor, that
+    # are disabled while it shows an object or the disassembly of an
+    # image
+    #
+    # @param enabled True to enable the actions
+    def enable_document_actions(self, enabled):
+        for action in (self.action_salvar, self.action_salvar_como,
+                       self.action_exportar, self.action_exportar_python):
+            action.setDisabled(not enabled)
 
     ##
     # Closes current document
     #
     def file_close(self):
+        self.close_listing()
         self.frame_editor.code_editor.clear()
         self.is_external_document = False
         self.path_external_document = ''
@@ -244,16 +453,83 @@ class MainWindow(Window):
 
     ##
     # Prepares the interface and the engine for the execution of a
-    # source code
+    # source code. The program runs on a worker thread.
     #
     def execute(self):
+        if self.is_executing():
+            return
+
         self.clear_console()
         self.clear_memory_table()
         self.log_on_console('Executando...')
         self.change_pc_bg()
         text = self.frame_editor.get_editor_text()
 
-        self.engine.run(text)
+        self.action_executar.setDisabled(True)
+        self.action_pausar.setDisabled(False)
+        self.action_parar.setDisabled(False)
+        # these actions change the engine that the worker is using
+        self.action_executar_etapas.setDisabled(True)
+        self.action_avancar.setDisabled(True)
+        self.action_traduzir.setDisabled(True)
+
+        if self.image_path is not None:
+            self.worker = EngineWorker(self.engine, self.image_path, self.engine.run_image)
+        else:
+            self.worker = EngineWorker(self.engine, text)
+        self.worker.finished.connect(self.execution_finished)
+        self.worker.start()
+        self.rate_meter.start()
+
+    ##
+    # Restores the execution actions when the worker thread finishes
+    #
+    def execution_finished(self):
+        self.rate_meter.stop()
+        self.show_rate(self.engine.pacer.rate)
+        self.action_pausar.setDisabled(True)
+        self.action_continuar.setDisabled(True)
+        self.action_parar.setDisabled(True)
+        self.action_executar_etapas.setDisabled(False)
+        self.action_traduzir.setDisabled(False)
+        self.enable_execution_button()
+
+    ##
+    # Returns true while a program runs on the worker thread
+    #
+    def is_executing(self):
+        return self.worker is not None and self.worker.isRunning()
+
+    ##
+    # Pauses the running execution
+    #
+    def pause_execution(self):
+        self.engine.pause()
+        self.action_pausar.setDisabled(True)
+        self.action_continuar.setDisabled(False)
+
+    ##
+    # Resumes the paused execution
+    #
+    def resume_execution(self):
+        self.engine.resume()
+        self.action_pausar.setDisabled(False)
+        self.action_continuar.setDisabled(True)
+
+    ##
+    # Stops the running execution and waits for the worker thread
+    #
+    def stop_execution(self):
+        self.engine.stop()
+        if self.worker is not None:
+            self.worker.wait()
+
+    ##
+    # Stops the execution before closing the window
+    #
+    def closeEvent(self, event):
+        self.stop_execution()
+        super().closeEvent(event)
 
     ##
     # Enables the execution button.
@@ -261,14 +537,32 @@ class MainWindow(Window):
     def enable_execution_button(self):
         self.action_executar.setDisabled(False)
 
+    ##
+    # Enables the step forward button.
+    #
+    def enable_step_button(self):
+        self.action_avancar.setDisabled(False)
+
+    ##
+    # Disables the step forward button.
+    #
+    def disable_step_button(self):
+        self.action_avancar.setDisabled(True)
+
     ##
     # Prepares the interface and the engine for the execution of a
     # source code in step execution mode
     #
     def run_in_steps(self):
+        if self.is_executing():
+            return
+
         self.clear_console()
         self.clear_memory_table()
         self.log_on_console('Execução em Etapas:')
+        if self.image_path is not None:
+            self.engine.run_in_steps(self.image_path, self.engine.load_image)
+            return
         text = self.frame_editor.get_editor_text()
         self.engine.run_in_steps(text)
 
@@ -277,6 +571,8 @@ class MainWindow(Window):
     # in step execution mode
     #
     def step_foward(self):
+        if self.is_executing():
+            return
         self.engine.step_foward()
 
     ##
@@ -284,12 +580,20 @@ class MainWindow(Window):
     # the interface to receive the updated data
     #
     def translate(self):
+        if self.is_executing():
+            return
+
         self.clear_memory_table()
         self.log_on_console('Traduzindo...')
         text = self.frame_editor.get_editor_text()
 
         try:
-            self.engine.translate(text)
+            if self.image_path is not None:
+                # an image is loaded again from its file
+                self.engine.load_image(self.image_path)
+                self.show_disassembly()
+            else:
+                self.engine.translate(text)
         except ValueError as err:
             self.log_on_console(err)
 
@@ -297,6 +601,7 @@ class MainWindow(Window):
     # call the virtual machine method that reset itself data
     #
     def reset_virtual_machine(self):
+        self.stop_execution()
         vm = self.engine.virtual_machine
         if vm is not None:
             vm.reset_machine()
@@ -341,23 +646,25 @@ class MainWindow(Window):
     ##
     # Updates the registers table
     #
-    def update_registers_table(self):
-        regs = self.engine.virtual_machine.registers
-        for i, v in enumerate(regs):
+    def update_registers_table(self, snapshot=None):
+        if snapshot is None:
+            snapshot = self.engine.snapshot()
+        for i, v in enumerate(snapshot.registers):
+            if self.rendered_registers[i] == v:
+                continue
+            self.rendered_registers[i] = v
             item_widget_table = QTableWidgetItem(str(v))
             item_widget_table.setTextAlignment(Qt.AlignCenter)
             self.frame_register.table_register.setItem(i, 0, item_widget_table)
-            v = Utils.convert_to_binary_twos_complement(v, 32)
-            v = Utils.convert_binary_to_hexadecimal(v)
-            v = '0x' + v
+            v = '0x' + Utils.word_to_hexadecimal(v)
             self.frame_register.table_register.setItem(i, 1, QTableWidgetItem(v))
-            self.frame_register.table_register.repaint()
 
     ##
     # Completely clears the registers table
     #
     def clear_registers_table(self):
         row = self.frame_register.table_register.rowCount()
+        self.rendered_registers = [0] * row
         for i in range(row):
 
             item_table_widget = QTableWidgetItem('0')
@@ -370,51 +677,73 @@ class MainWindow(Window):
             self.frame_register.table_register.setItem(i, 1, item_table_widget_hex)
 
     ##
-    # Updates the UI memory table
+    # Updates the UI memory table. With an image loaded only a window
+    # of MEMORY_TABLE_LINES addresses around the pc is shown (see
+    # fill_memory_window).
     #
-    def update_memory_table(self):
-        memory = dict(self.engine.virtual_machine.main_memory)
-        table = self.frame_editor.memory_table
-        queue = self.engine.execution_queue
+    def update_memory_table(self, snapshot=None):
+        if self.image_path is not None:
+            if snapshot is None:
+                snapshot = self.engine.snapshot()
+            if snapshot is not None:
+                self.fill_memory_window(snapshot.pc)
+            self.open_memory_table()
+            return
 
-        if self.engine.virtual_machine.BLOCKED_ADDRESS_KEY in memory.keys():
-            blocked = memory.pop(self.engine.virtual_machine.BLOCKED_ADDRESS_KEY)
+        if snapshot is None or snapshot.main_memory is None:
+            snapshot = self.engine.snapshot(memory=True)
+        memory = snapshot.main_memory
+        table = self.frame_editor.memory_table
+        queue = snapshot.execution_queue
+        vm = self.engine.virtual_machine
 
-        table.setRowCount(table.DEFAULT_ROW_COUNT)
+        self.memory_table_first = 0
+        table.setRowCount(len(memory))
 
         for i, k in enumerate(memory.keys()):
-            # Adding new row:
-            table.setRowCount(table.rowCount() + 1)
-
-            # Address integer representation
-            table.setItem(i, 0, QTableWidgetItem(str(k)))
-
-            vm = self.engine.virtual_machine
-            # if index < len(queue) and if Instruction
-            # else
-
-            if i < len(queue) and (isinstance(queue[i], Instruction) or isinstance(queue[i], Fill)):
+            if k < len(queue) and isinstance(queue[k], (Instruction, Fill)):
                 inst_hexa = '0x' + queue[k].get_hexa_representation(vm)
                 inst_str = str(queue[k])
             else:
-                f = Fill(None, [memory[k]])
-                inst_hexa = '0x' + f.get_hexa_representation(vm)
-                inst_str = str(memory[k])
+                value = memory[k]
+                if isinstance(value, int):
+                    inst_hexa = '0x' + Utils.word_to_hexadecimal(value)
+                else:
+                    inst_hexa = '-'
+                inst_str = str(value)
+            self.set_memory_table_row(i, k, inst_str, inst_hexa)
 
-            # Add the instruction at i 1
-            table.setItem(i, 1, QTableWidgetItem(inst_str))
+        self.open_memory_table()
 
-            # Add hexadecimal representation on i 2
-            table.setItem(i, 2, QTableWidgetItem(inst_hexa))
+    ##
+    # Shows on the memory table only the addresses around the pc, read
+    # by Engine.memory_window, so a big image is not copied nor listed
+    # as a whole
+    #
+    # @param pc address shown on the table
+    def fill_memory_window(self, pc):
+        table = self.frame_editor.memory_table
+        first, rows = self.engine.memory_window(pc, self.MEMORY_TABLE_LINES)
 
-            # Add the hexadecimas address on i 3
-            # Converting the address:
-            hexa_address = Utils.convert_to_hexadecimal(k, 8)
-            hexa_address = '0x' + hexa_address
-            table.setItem(i, 3, QTableWidgetItem(hexa_address))
+        self.memory_table_first = first
+        table.setRowCount(len(rows))
+        for i, (address, word, instruction) in enumerate(rows):
+            self.set_memory_table_row(i, address, str(instruction),
+                                      '0x' + Utils.word_to_hexadecimal(word))
 
-        self.frame_editor.memory_table.repaint()
-        self.open_memory_table()
+    ##
+    # Writes a row of the memory table
+    #
+    # @param row of the table
+    # @param address of the main memory
+    # @param text of the value (instruction or data)
+    # @param hexa hexadecimal representation of the value
+    def set_memory_table_row(self, row, address, text, hexa):
+        table = self.frame_editor.memory_table
+        table.setItem(row, 0, QTableWidgetItem(str(address)))
+        table.setItem(row, 1, QTableWidgetItem(text))
+        table.setItem(row, 2, QTableWidgetItem(hexa))
+        table.setItem(row, 3, QTableWidgetItem('0x' + Utils.convert_to_hexadecimal(address, 8)))
 
     ##
     # Clean the memory table
@@ -431,13 +760,14 @@ class MainWindow(Window):
             table.removeRow(i)
 
         table.setRowCount(0)
+        self.memory_table_first = 0
 
     ##
     # selects a row from the memory table
     #
     def select_memory_table_row(self, row):
         table = self.frame_editor.memory_table
-        if row <= table.rowCount():
+        if 0 <= row < table.rowCount():
             table.selectRow(row)
 
     ##
@@ -456,13 +786,20 @@ class MainWindow(Window):
     ##
     # Updates the program counter display
     #
-    def update_ui_pc(self):
-        int_pc_value = self.engine.virtual_machine.get_pc()
+    def update_ui_pc(self, snapshot=None):
+        if snapshot is None:
+            snapshot = self.engine.snapshot()
+        int_pc_value = snapshot.pc
         pc_value = '0x' + Utils.convert_to_hexadecimal(int_pc_value, 8)
 
         self.frame_pc.lbl_pc_value.setText(pc_value)
-        self.select_memory_table_row(int_pc_value)
-        self.frame_pc.lbl_pc_value.repaint()
+        if self.image_path is not None:
+            row = int_pc_value - self.memory_table_first
+            rows = self.frame_editor.memory_table.rowCount()
+            if rows and not 0 <= row < rows:
+                self.fill_memory_window(int_pc_value)
+            self.show_disassembly(int_pc_value)
+        self.select_memory_table_row(int_pc_value - self.memory_table_first)
 
     ##
     # Changes the program counter display background color
@@ -487,30 +824,46 @@ class MainWindow(Window):
     ##
     # Updates the instruction Register display value
     #
-    def update_ui_instruction_register(self):
-        vm = self.engine.virtual_machine
-        running_status = self.engine.status.is_running
+    def update_ui_instruction_register(self, snapshot=None):
+        if snapshot is None:
+            snapshot = self.engine.snapshot()
         no_instruction = False
 
-        if vm is not None:
-            if vm.instruction_register == 0 and not running_status:
+        if snapshot is not None:
+            if snapshot.instruction_register == 0 and not snapshot.is_running:
                 no_instruction = True
             else:
-                pc = vm.get_pc()
-                if self.engine.is_valid_pc(pc):
-                    inst = self.engine.execution_queue[pc]
-
-                    representation = inst.get_hexa_representation(vm)
-                    representation = '0x' + str(representation)
-
-                    self.frame_pc.lbl_register_value.setText(representation)
+                representation = Utils.word_to_hexadecimal(snapshot.instruction_register)
+                self.frame_pc.lbl_register_value.setText('0x' + representation)
         else:
             no_instruction = True
 
         if no_instruction:
             self.frame_pc.lbl_register_value.setText('0x00000000')
 
-        self.frame_pc.lbl_register_value.repaint()
+    ##
+    # Renders the parts of the interface changed since the last refresh
+    # from a single snapshot of the engine
+    #
+    # @param names of the update methods requested by the engine
+    def refresh_interface(self, names):
+        if 'clear_memory_table' in names:
+            self.clear_memory_table()
+
+        # the table of an image shows only a window of the memory
+        memory = 'update_memory_table' in names and self.image_path is None
+        snapshot = self.engine.snapshot(memory=memory)
+        if snapshot is None:
+            return
+
+        if 'update_memory_table' in names:
+            self.update_memory_table(snapshot)
+        if 'update_registers_table' in names:
+            self.update_registers_table(snapshot)
+        if 'update_ui_pc' in names:
+            self.update_ui_pc(snapshot)
+        if 'update_ui_instruction_register' in names:
+            self.update_ui_instruction_register(snapshot)
 
 
 if __name__ == '__main__':
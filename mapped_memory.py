@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package mapped_memory
+#
+#   Main memory stored on a memory-mapped file.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from paged_memory import PagedMemory
+from virtual_machine import VirtualMachine
+import mmap
+import os
+
+
+##
+# The MappedMemory keeps the main memory on a sparse file, mapped
+# with mmap. Address a is the signed 32 bit word at byte 4 * a of
+# the file, in the byte order of the machine. The pages are views
+# of the mapped file, so data staged on the file before the
+# execution is read without copies and the file holds the final
+# image of the memory after the execution.
+#
+# A page is found (and its non-zero words become known addresses)
+# the first time one of its addresses is accessed, so iterating
+# over the memory lists only the pages already accessed. clear
+# forgets the known pages but keeps the data of the file. Values
+# that do not fit in a word are kept only while the memory is open;
+# the file receives their lower 32 bits.
+#
+# @see PagedMemory
+class MappedMemory(PagedMemory):
+    WORD_BYTES = 4
+
+    ##
+    # Opens (or creates) the file of the memory
+    # raises *ValueError* if the file can not be mapped
+    #
+    # @param path of the file
+    # @param size number of words of the file (rounded up to pages)
+    def __init__(self, path, size=VirtualMachine.MAX_MEM_ADDRESS + 1):
+        super().__init__()
+        pages = -(-size // self.PAGE_SIZE)
+        self.size = pages * self.PAGE_SIZE
+        self.path = path
+
+        try:
+            self.file = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+            if os.fstat(self.file.fileno()).st_size < self.size * self.WORD_BYTES:
+                # the file is extended without allocating disk blocks
+                self.file.truncate(self.size * self.WORD_BYTES)
+            self.mmap = mmap.mmap(self.file.fileno(), self.size * self.WORD_BYTES)
+        except (OSError, ValueError, OverflowError) as err:
+            raise ValueError(f'Não foi possível mapear o arquivo da memória "{path}": {err}')
+
+        self.view = memoryview(self.mmap).cast(self.TYPECODE)
+
+    ##
+    # Finds the page of a page number on the file
+    #
+    def find_page(self, number):
+        page = self.pages.get(number)
+        if page is None and 0 <= number < self.size >> self.PAGE_BITS:
+            page = self.allocate_page(number)
+        return page
+
+    ##
+    # Maps a page of the file
+    # raises *ValueError* if the page is beyond the end of the file
+    #
+    def allocate_page(self, number):
+        base = number << self.PAGE_BITS
+        if not 0 <= base < self.size:
+            raise ValueError(f'Erro de Execução: O endereço "{base}" está fora '
+                             f'do arquivo da memória principal.')
+
+        words = self.view[base:base + self.PAGE_SIZE]
+        flags = bytearray(map(bool, words))
+        self.count += flags.count(self.WORD)
+        page = (words, flags)
+        self.pages[number] = page
+        return page
+
+    ##
+    # Returns a function that reads a word, like PagedMemory.reader,
+    # finding the pages on the file
+    #
+    def reader(self):
+        pages = self.pages
+        objects = self.objects
+        bits = self.PAGE_BITS
+        mask = self.OFFSET_MASK
+        obj = self.OBJECT
+        find_page = self.find_page
+
+        def read(address):
+            page = pages.get(address >> bits)
+            if page is None:
+                page = find_page(address >> bits)
+                if page is None:
+                    return 0
+            offset = address & mask
+            if page[1][offset] != obj:
+                return page[0][offset]
+            return objects[address]
+        return read
+
+    ##
+    # Reads a block of words from an address on without copies: the
+    # block is a view of the mapped file, so it sees the later writes
+    # and must be released before the memory is closed.
+    # raises *KeyError* if the block is not inside the file
+    #
+    # @param address of the first word
+    # @param count number of words
+    # @return memoryview of the words
+    def read_block(self, address, count):
+        if not isinstance(address, int) or address < 0 or count < 0 or address + count > self.size:
+            raise KeyError(address)
+        return self.view[address:address + count]
+
+    ##
+    # Forgets the known pages. The data of the file is kept.
+    #
+    def clear(self):
+        self.release_pages()
+        super().clear()
+
+    ##
+    # Releases the views of the known pages
+    #
+    def release_pages(self):
+        for words, _ in self.pages.values():
+            words.release()
+
+    ##
+    # Writes the changed pages on the file
+    #
+    def flush(self):
+        self.mmap.flush()
+
+    ##
+    # Writes the memory on the file and closes it
+    #
+    def close(self):
+        if self.mmap.closed:
+            return
+        self.release_pages()
+        self.pages.clear()
+        self.view.release()
+        self.mmap.flush()
+        self.mmap.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return f'MappedMemory({self.path!r}, {len(self)} endereços)'
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package object_file
+#
+#   Binary object files of kindA programs.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from instruction_set import Fill
+from array import array
+from bisect import bisect_right
+import mmap
+import os
+import struct
+import sys
+
+
+##
+# The ObjectFile reads and writes the binary form of a translated
+# program (.ko). All the integers are little endian:
+#
+#   header:   magic "KOBJ", version (16 bits), reserved (16 bits) and
+#             the number of words, sections, lines, symbols and
+#             references (32 bits; version 1 has no references)
+#   words:    the image of the program, one signed 32 bit word per
+#             address, from address 0 on
+#   sections: (kind, first address, number of words) of each run of
+#             code (instructions) or data (.fill) of the image
+#   lines:    (address, line) pairs: the words from the address on
+#             come from consecutive lines of the source, from the line on
+#   symbols:  (address, length of the name) followed by the name in UTF-8
+#   references: (address, index of the symbol) of each instruction that
+#             uses a label as operand, so its text is kept
+#
+# The file is mapped with mmap and the words are used as they are
+# on the file, without parsing, on little endian machines.
+#
+# @see Engine.load_object
+class ObjectFile:
+    MAGIC = b'KOBJ'
+    VERSION = 2
+    EXTENSION = '.ko'
+    TYPECODE = 'i'
+    # Kinds of section
+    CODE = 1
+    DATA = 2
+
+    HEADER_V1 = struct.Struct('<4sHHIIII')
+    HEADER = struct.Struct('<4sHHIIIII')
+    SECTION = struct.Struct('<III')
+    LINE = struct.Struct('<II')
+    SYMBOL = struct.Struct('<IH')
+    REFERENCE = struct.Struct('<II')
+
+    ##
+    # Maps an object file
+    # raises *ValueError* if the file can not be mapped or is not
+    # a valid object
+    #
+    # @param path of the file
+    def __init__(self, path):
+        self.path = path
+        self.words = None
+        self.sections = []
+        self.lines = []
+        self.symbols = dict()
+        # address -> label used as operand
+        self.references = dict()
+
+        try:
+            with open(path, 'rb') as f:
+                self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as err:
+            raise ValueError(f'Não foi possível mapear o arquivo objeto "{path}": {err}')
+
+        try:
+            self.read()
+        except ValueError as err:
+            self.close()
+            raise ValueError(f'O arquivo "{path}" não é um objeto kindA válido: {err}')
+
+    ##
+    # Returns true if a file starts like an object file
+    #
+    # @param path of the file
+    @classmethod
+    def is_object(cls, path):
+        try:
+            with open(path, 'rb') as f:
+                return f.read(len(cls.MAGIC)) == cls.MAGIC
+        except OSError:
+            return False
+
+    ##
+    # Unpacks a structure of the file
+    # raises *ValueError* if the file ends before the structure
+    #
+    def unpack(self, structure, position):
+        if position + structure.size > len(self.mmap):
+            raise ValueError('o arquivo está incompleto.')
+        return structure.unpack_from(self.mmap, position)
+
+    ##
+    # Unpacks a table of structures of the file at once
+    # raises *ValueError* if the file ends before the table
+    #
+    # @return list of tuples
+    def unpack_table(self, structure, position, count):
+        end = position + structure.size * count
+        if end > len(self.mmap):
+            raise ValueError('o arquivo está incompleto.')
+        return list(structure.iter_unpack(self.mmap[position:end]))
+
+    ##
+    # Reads the header and the tables of the mapped file
+    # raises *ValueError* if the content is not valid
+    #
+    def read(self):
+        magic, version, _, words, sections, lines, symbols = self.unpack(self.HEADER_V1, 0)
+        if magic != self.MAGIC:
+            raise ValueError('assinatura inválida.')
+        if version == 1:
+            references = 0
+            position = self.HEADER_V1.size
+        elif version == self.VERSION:
+            references = self.unpack(self.HEADER, 0)[-1]
+            position = self.HEADER.size
+        else:
+            raise ValueError(f'a versão {version} não é suportada.')
+
+        end = position + words * array(self.TYPECODE).itemsize
+        if end > len(self.mmap):
+            raise ValueError('o arquivo está incompleto.')
+        if sys.byteorder == 'little':
+            self.words = memoryview(self.mmap)[position:end].cast(self.TYPECODE)
+        else:
+            self.words = array(self.TYPECODE, self.mmap[position:end])
+            self.words.byteswap()
+        position = end
+
+        self.sections = self.unpack_table(self.SECTION, position, sections)
+        for kind, start, count in self.sections:
+            if kind not in (self.CODE, self.DATA) or start + count > words:
+                raise ValueError(f'seção inválida em {start}.')
+        position += self.SECTION.size * sections
+
+        self.lines = self.unpack_table(self.LINE, position, lines)
+        position += self.LINE.size * lines
+
+        for _ in range(symbols):
+            address, length = self.unpack(self.SYMBOL, position)
+            position += self.SYMBOL.size
+            if position + length > len(self.mmap) or address >= words:
+                raise ValueError('tabela de símbolos inválida.')
+            try:
+                name = self.mmap[position:position + length].decode('utf-8')
+            except UnicodeDecodeError:
+                raise ValueError('tabela de símbolos inválida.')
+            self.symbols[name] = address
+            position += length
+
+        names = list(self.symbols)
+        for address, index in self.unpack_table(self.REFERENCE, position, references):
+            if address >= words or index >= len(names):
+                raise ValueError('tabela de referências inválida.')
+            self.references[address] = names[index]
+
+    ##
+    # Returns the addresses of the data sections
+    #
+    def data_addresses(self):
+        for kind, start, count in self.sections:
+            if kind == self.DATA:
+                yield from range(start, start + count)
+
+    ##
+    # Returns the source line of an address, or None if the
+    # file has no line for it
+    #
+    # @param address of the word
+    def line_of(self, address):
+        index = bisect_right(self.lines, (address, sys.maxsize)) - 1
+        if index < 0 or not 0 <= address < len(self.words):
+            return None
+        start, line = self.lines[index]
+        return line + address - start
+
+    ##
+    # Returns the machine code (.mc) of the words of the file
+    #
+    def machine_code(self):
+        words = array(self.TYPECODE, self.words)
+        if sys.byteorder == 'little':
+            words.byteswap()
+        hexa = words.tobytes().hex().upper()
+        return '\n'.join(hexa[i:i + 8] for i in range(0, len(hexa), 8))
+
+    ##
+    # Releases the words and unmaps the file
+    #
+    def close(self):
+        if self.mmap.closed:
+            return
+        if isinstance(self.words, memoryview):
+            self.words.release()
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    ##
+    # Writes the object file of a translated program. The file is
+    # written on a temporary file that replaces the path at the end,
+    # so a failure does not leave a partial object and a concurrent
+    # run never reads one.
+    # raises *ValueError* if a label name is too long
+    # raises *OSError* if the file can not be written
+    #
+    # @param path of the object file
+    # @param instructions translated by the Assembler
+    # @param labels dictionary of label name -> address
+    # @param first_line line of the source of the first instruction
+    @classmethod
+    def write(cls, path, instructions, labels, first_line=1):
+        words = array(cls.TYPECODE, (inst.get_word() for inst in instructions))
+        if sys.byteorder != 'little':
+            words.byteswap()
+
+        sections = []
+        for address, inst in enumerate(instructions):
+            kind = cls.DATA if isinstance(inst, Fill) else cls.CODE
+            if sections and sections[-1][0] == kind:
+                sections[-1][2] += 1
+            else:
+                sections.append([kind, address, 1])
+
+        lines = [(0, first_line)] if instructions else []
+
+        symbols = []
+        indexes = dict()
+        for name, address in sorted(labels.items(), key=lambda item: item[1]):
+            encoded = name.encode('utf-8')
+            if len(encoded) > 0xFFFF:
+                raise ValueError(f'O label "{name[:20]}..." é longo demais para o arquivo objeto.')
+            indexes[name] = len(symbols)
+            symbols.append(cls.SYMBOL.pack(address, len(encoded)) + encoded)
+
+        references = [cls.REFERENCE.pack(address, indexes[inst.symbol])
+                      for address, inst in enumerate(instructions)
+                      if inst.symbol is not None]
+
+        temporary = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary, 'wb') as f:
+                f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, 0, len(words), len(sections),
+                                        len(lines), len(symbols), len(references)))
+                f.write(words.tobytes())
+                f.writelines(cls.SECTION.pack(*section) for section in sections)
+                f.writelines(cls.LINE.pack(*line) for line in lines)
+                f.writelines(symbols)
+                f.writelines(references)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def __repr__(self):
+        return f'ObjectFile({self.path!r}, {len(self.words)} palavras)'
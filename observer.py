@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package observer
+#
+#   Interface between the execution core (Engine and
+#   VirtualMachine) and whoever is watching it.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+
+
+##
+# EngineObserver lists every callback the Engine and the
+# VirtualMachine may invoke on their context. All of them do
+# nothing, so an instance of this class is the headless context:
+# the core runs without any graphic interface attached.
+#
+# The graphic interface (MainWindow) implements the same methods.
+#
+class EngineObserver:
+    ##
+    # Called when any register value changes
+    #
+    def update_registers_table(self):
+        pass
+
+    ##
+    # Called when the main memory content changes
+    #
+    def update_memory_table(self):
+        pass
+
+    ##
+    # Called when the main memory is emptied
+    #
+    def clear_memory_table(self):
+        pass
+
+    ##
+    # Called when the program counter changes
+    #
+    def update_ui_pc(self):
+        pass
+
+    ##
+    # Called when the instruction register changes
+    #
+    def update_ui_instruction_register(self):
+        pass
+
+    ##
+    # Called when the engine starts an execution
+    #
+    def change_pc_bg(self):
+        pass
+
+    ##
+    # Called when the engine finishes an execution
+    #
+    def change_back_pc_bg(self):
+        pass
+
+    ##
+    # Receives the messages produced during translation and execution
+    #
+    # @param text message to log
+    def log_on_console(self, text):
+        pass
+
+    ##
+    # Called to separate the messages of two executions
+    #
+    def console_space(self):
+        pass
+
+    ##
+    # Called when a new execution may be started
+    #
+    def enable_execution_button(self):
+        pass
+
+    ##
+    # Called when the step execution mode starts
+    #
+    def enable_step_button(self):
+        pass
+
+    ##
+    # Called when the step execution mode finishes
+    #
+    def disable_step_button(self):
+        pass
+
+
+##
+# Headless observer that writes the console messages
+# to a stream (stdout by default) and ignores everything else
+#
+class ConsoleObserver(EngineObserver):
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def log_on_console(self, text):
+        print(text, file=self.stream)
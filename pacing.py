@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package pacing
+#
+#   Controls the execution speed of the engine.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from time import perf_counter
+
+
+##
+# The Pacer keeps an execution at a target rate of instructions
+# per second (IPS). Instructions run in batches that last about
+# SLICE seconds and, before each batch, the Pacer waits until the
+# moment the batch should start. That moment is computed from the
+# start of the execution, so rounding errors of the waits do not
+# accumulate. An execution that falls more than MAX_LAG seconds
+# behind restarts the schedule instead of running a burst.
+#
+# A rate of None means that the execution is not throttled.
+# The rate actually achieved is measured in both cases.
+#
+class Pacer:
+    SLICE = 0.01
+    MAX_LAG = 0.25
+    MEASURE_INTERVAL = 0.5
+
+    def __init__(self, rate=None):
+        self.rate = None
+        self.set_rate(rate)
+        self.reset()
+
+    ##
+    # Changes the target rate
+    # raises *ValueError* if the rate is not positive
+    #
+    # @param rate instructions per second or None for no limit
+    def set_rate(self, rate):
+        if rate is not None and rate <= 0:
+            raise ValueError('A frequência de execução deve ser positiva.')
+        self.rate = rate
+        self.restart_schedule()
+
+    ##
+    # Returns true if the execution is limited to a rate
+    #
+    def is_throttled(self):
+        return self.rate is not None
+
+    ##
+    # Prepares the Pacer for a new execution
+    #
+    def reset(self):
+        now = perf_counter()
+        self.executed = 0
+        self.start_time = now
+        self.measure_time = now
+        self.measure_count = 0
+        self.achieved_rate = 0.0
+        self.restart_schedule()
+
+    ##
+    # Makes the schedule start now
+    #
+    def restart_schedule(self):
+        self.schedule_time = perf_counter()
+        self.schedule_count = getattr(self, 'executed', 0)
+
+    ##
+    # Returns how many instructions the next batch may have
+    #
+    # @param limit size of the batch without throttling
+    def batch_size(self, limit):
+        if self.rate is None:
+            return limit
+        return max(1, min(limit, int(self.rate * self.SLICE)))
+
+    ##
+    # Waits until the next batch should start
+    #
+    # @param event threading.Event that interrupts the wait when set
+    def wait(self, event):
+        rate = self.rate
+        if rate is None:
+            return
+
+        target = self.schedule_time + (self.executed - self.schedule_count) / rate
+        delay = target - perf_counter()
+        if delay > 0:
+            event.wait(delay)
+        elif delay < -self.MAX_LAG:
+            self.restart_schedule()
+
+    ##
+    # Registers executed instructions and measures the achieved rate
+    #
+    # @param count number of instructions executed
+    def account(self, count):
+        self.executed += count
+        now = perf_counter()
+        elapsed = now - self.measure_time
+        if elapsed >= self.MEASURE_INTERVAL:
+            self.achieved_rate = (self.executed - self.measure_count) / elapsed
+            self.measure_time = now
+            self.measure_count = self.executed
+
+    ##
+    # Measures the achieved rate at the end of an execution
+    #
+    def finish(self):
+        elapsed = perf_counter() - self.start_time
+        if elapsed > 0 and self.measure_count == 0:
+            self.achieved_rate = self.executed / elapsed
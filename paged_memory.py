@@ -0,0 +1,352 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package paged_memory
+#
+#   Sparse main memory stored in fixed-size pages.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from array import array
+from itertools import compress
+
+
+##
+# The PagedMemory keeps the words of the main memory in pages of
+# PAGE_SIZE signed 32 bit integers (array('i')), allocated when one
+# of their addresses is written for the first time. A bytearray of
+# flags per page tells which addresses hold a value, so the memory
+# still knows the addresses that were written, like a dictionary.
+# Values that do not fit in a word (or are not integers) are kept
+# in a separate dictionary, with their lower 32 bits on the page.
+#
+# It offers the part of the dict interface used by the machine:
+# get, [], in, len, clear, copy and the iteration over keys, values
+# and items, always in address order.
+#
+# @see VirtualMachine
+class PagedMemory:
+    PAGE_BITS = 10
+    PAGE_SIZE = 1 << PAGE_BITS
+    OFFSET_MASK = PAGE_SIZE - 1
+    TYPECODE = 'i'
+    # Flags of an address
+    EMPTY = 0
+    WORD = 1
+    OBJECT = 2
+
+    def __init__(self, values=None):
+        # page number -> (array of words, bytearray of flags)
+        self.pages = dict()
+        # address -> value that does not fit in a word
+        self.objects = dict()
+        self.count = 0
+
+        if values is not None:
+            for address, value in dict(values).items():
+                self[address] = value
+
+    ##
+    # Returns the page that contains an address, allocating it if needed
+    #
+    def allocate_page(self, number):
+        page = (array(self.TYPECODE, bytes(array(self.TYPECODE).itemsize * self.PAGE_SIZE)),
+                bytearray(self.PAGE_SIZE))
+        self.pages[number] = page
+        return page
+
+    ##
+    # Returns the page of a page number or None if it does not exist
+    #
+    def find_page(self, number):
+        return self.pages.get(number)
+
+    ##
+    # Returns the word that represents a value that does not fit in a page
+    #
+    @staticmethod
+    def truncate(value):
+        if isinstance(value, int):
+            return (value + 0x80000000) % 0x100000000 - 0x80000000
+        return 0
+
+    ##
+    # Returns the value stored on an address
+    #
+    # @param address of the main memory
+    # @param default value returned if nothing was stored on the address
+    def get(self, address, default=None):
+        page = self.find_page(address >> self.PAGE_BITS)
+        if page is not None:
+            offset = address & self.OFFSET_MASK
+            flag = page[1][offset]
+            if flag == self.WORD:
+                return page[0][offset]
+            if flag == self.OBJECT:
+                return self.objects[address]
+        return default
+
+    ##
+    # Returns a function that reads a word, returning 0 for addresses
+    # never written. Used by the execution loops, that call it once
+    # per instruction and can not pay for the generic get.
+    #
+    def reader(self):
+        pages = self.pages
+        objects = self.objects
+        bits = self.PAGE_BITS
+        mask = self.OFFSET_MASK
+        obj = self.OBJECT
+
+        def read(address):
+            page = pages.get(address >> bits)
+            if page is None:
+                return 0
+            offset = address & mask
+            if page[1][offset] != obj:
+                return page[0][offset]
+            return objects[address]
+        return read
+
+    ##
+    # Returns a function that writes a value, like the [] operator,
+    # for the execution loops
+    #
+    def writer(self):
+        pages = self.pages
+        bits = self.PAGE_BITS
+        mask = self.OFFSET_MASK
+        word = self.WORD
+        obj = self.OBJECT
+        allocate_page = self.allocate_page
+        setitem = self.__setitem__
+        memory = self
+
+        def write(address, value):
+            number = address >> bits
+            page = pages.get(number)
+            if page is None:
+                if address < 0:
+                    raise KeyError(address)
+                page = allocate_page(number)
+            offset = address & mask
+            flags = page[1]
+            flag = flags[offset]
+            if flag == obj:
+                return setitem(address, value)
+            try:
+                page[0][offset] = value
+            except (OverflowError, TypeError, ValueError):
+                return setitem(address, value)
+            if flag != word:
+                flags[offset] = word
+                memory.count += 1
+        return write
+
+    ##
+    # Returns a buffer as a flat memoryview of signed 32 bit words.
+    # Buffers of words (array('i'), the int32 arrays of NumPy) and of
+    # bytes are used without copies; other integer buffers are
+    # converted.
+    # raises *ValueError* if the buffer is not a block of integers or
+    # one of its values does not fit in a word
+    #
+    # @param words object that supports the buffer protocol
+    @classmethod
+    def as_words(cls, words):
+        try:
+            view = memoryview(words)
+            if view.ndim != 1:
+                view = view.cast('B').cast(view.format)
+        except (TypeError, ValueError):
+            raise ValueError(f'"{type(words).__name__}" não é um bloco de palavras.')
+
+        if view.format == cls.TYPECODE:
+            return view
+        if view.format in ('B', 'b', 'c'):
+            if not view.c_contiguous or view.nbytes % array(cls.TYPECODE).itemsize:
+                raise ValueError(f'O bloco de {view.nbytes} bytes não tem um número inteiro de palavras.')
+            return view.cast('B').cast(cls.TYPECODE)
+        if view.format not in ('h', 'H', 'I', 'l', 'L', 'q', 'Q', 'n', 'N'):
+            raise ValueError(f'O formato "{view.format}" não é de palavras inteiras.')
+        try:
+            return memoryview(array(cls.TYPECODE, view.tolist()))
+        except OverflowError:
+            raise ValueError('Um valor do bloco não cabe em uma palavra de 32 bits.')
+
+    ##
+    # Reads a block of words from an address on, copying whole
+    # slices of the pages. The addresses never written are read as 0
+    # and the values that do not fit in a word as their lower 32 bits.
+    # raises *KeyError* if the address is not valid
+    #
+    # @param address of the first word
+    # @param count number of words
+    # @return array('i') with the words
+    def read_block(self, address, count):
+        if not isinstance(address, int) or address < 0 or count < 0:
+            raise KeyError(address)
+
+        words = array(self.TYPECODE, bytes(array(self.TYPECODE).itemsize * count))
+        with memoryview(words) as view:
+            position = 0
+            while position < count:
+                number = (address + position) >> self.PAGE_BITS
+                offset = (address + position) & self.OFFSET_MASK
+                size = min(self.PAGE_SIZE - offset, count - position)
+                page = self.find_page(number)
+                if page is not None:
+                    with memoryview(page[0]) as source:
+                        view[position:position + size] = source[offset:offset + size]
+                position += size
+        return words
+
+    ##
+    # Writes a block of words from an address on, copying whole
+    # slices of the pages instead of storing word by word
+    # raises *KeyError* if the address is not valid
+    # raises *ValueError* if the buffer is not a block of words
+    #
+    # @param address of the first word
+    # @param words buffer of words: array, memoryview, bytes or a
+    # NumPy array (see as_words)
+    def write_block(self, address, words):
+        if not isinstance(address, int) or address < 0:
+            raise KeyError(address)
+
+        words = self.as_words(words)
+        position = 0
+        while position < len(words):
+            number = (address + position) >> self.PAGE_BITS
+            page = self.find_page(number)
+            if page is None:
+                page = self.allocate_page(number)
+            page_words, flags = page
+            offset = (address + position) & self.OFFSET_MASK
+            size = min(self.PAGE_SIZE - offset, len(words) - position)
+
+            used = flags[offset:offset + size]
+            self.count += used.count(self.EMPTY)
+            if self.OBJECT in used:
+                base = (number << self.PAGE_BITS) + offset
+                for i in range(size):
+                    self.objects.pop(base + i, None)
+
+            with memoryview(page_words) as view:
+                view[offset:offset + size] = words[position:position + size]
+            flags[offset:offset + size] = bytes([self.WORD]) * size
+            position += size
+
+    def __getitem__(self, address):
+        value = self.get(address, self)
+        if value is self:
+            raise KeyError(address)
+        return value
+
+    def __setitem__(self, address, value):
+        if not isinstance(address, int) or address < 0:
+            raise KeyError(address)
+
+        number = address >> self.PAGE_BITS
+        page = self.pages.get(number)
+        if page is None:
+            page = self.allocate_page(number)
+        words, flags = page
+        offset = address & self.OFFSET_MASK
+
+        flag = flags[offset]
+        if flag == self.EMPTY:
+            self.count += 1
+        elif flag == self.OBJECT:
+            del self.objects[address]
+
+        try:
+            words[offset] = value
+            flags[offset] = self.WORD
+        except (OverflowError, TypeError, ValueError):
+            words[offset] = self.truncate(value)
+            flags[offset] = self.OBJECT
+            self.objects[address] = value
+
+    def __delitem__(self, address):
+        page = self.pages.get(address >> self.PAGE_BITS) if isinstance(address, int) else None
+        offset = address & self.OFFSET_MASK if page is not None else 0
+        if page is None or page[1][offset] == self.EMPTY:
+            raise KeyError(address)
+
+        words, flags = page
+        if flags[offset] == self.OBJECT:
+            del self.objects[address]
+        words[offset] = 0
+        flags[offset] = self.EMPTY
+        self.count -= 1
+
+    def __contains__(self, address):
+        if not isinstance(address, int):
+            return False
+        page = self.find_page(address >> self.PAGE_BITS)
+        return page is not None and page[1][address & self.OFFSET_MASK] != self.EMPTY
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.keys()
+
+    ##
+    # Iterates over the written addresses in increasing order
+    #
+    def keys(self):
+        for number in sorted(self.pages):
+            base = number << self.PAGE_BITS
+            yield from compress(range(base, base + self.PAGE_SIZE), self.pages[number][1])
+
+    ##
+    # Iterates over the values of the written addresses
+    #
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    ##
+    # Iterates over the (address, value) pairs of the written
+    # addresses in increasing order
+    #
+    def items(self):
+        objects = self.objects
+        for number in sorted(self.pages):
+            base = number << self.PAGE_BITS
+            words, flags = self.pages[number]
+            for offset in compress(range(self.PAGE_SIZE), flags):
+                if flags[offset] == self.WORD:
+                    yield base + offset, words[offset]
+                else:
+                    yield base + offset, objects[base + offset]
+
+    ##
+    # Removes every value
+    #
+    def clear(self):
+        self.pages.clear()
+        self.objects.clear()
+        self.count = 0
+
+    ##
+    # Returns an independent copy of the memory
+    #
+    def copy(self):
+        other = PagedMemory()
+        other.pages = {number: (array(self.TYPECODE, words), bytearray(flags))
+                       for number, (words, flags) in self.pages.items()}
+        other.objects = dict(self.objects)
+        other.count = self.count
+        return other
+
+    def __eq__(self, other):
+        if isinstance(other, (PagedMemory, dict)):
+            return len(self) == len(other) and dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return f'PagedMemory({dict(self.items())!r})'
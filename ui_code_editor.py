@@ -11,9 +11,10 @@
 #   Adapted to python by Nathaniel Ramalho
 #   @since 11/28/2020
 #
-from PySide2.QtWidgets import QWidget, QPlainTextEdit, QTextEdit
-from PySide2.QtCore import Qt, QRect, QSize
-from PySide2.QtGui import QColor, QPainter, QTextFormat
+from PySide2.QtWidgets import QWidget, QPlainTextEdit, QTextEdit, QToolTip
+from PySide2.QtCore import Qt, QRect, QSize, QPoint, QEvent, QThread, QTimer, Signal
+from PySide2.QtGui import QColor, QPainter, QTextCursor, QTextFormat
+from assembler import Assembler
 
 
 class LineNumberArea(QWidget):
@@ -26,7 +27,7 @@ class LineNumberArea(QWidget):
     # Overrides the superclass sizeHint method
     #
     def sizeHint(self):
-        return QSize(self.editor.line_number_area_width(), 0)
+        return QSize(self.code_editor.line_number_area_width(), 0)
 
     ##
     # Overrides the superclass paintEvent method
@@ -34,15 +35,69 @@ class LineNumberArea(QWidget):
     def paintEvent(self, event):
         self.code_editor.line_number_area_paint_event(event)
 
+    ##
+    # Overrides the superclass event method to show the errors of
+    # the marked lines as tool tips
+    #
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            message = self.code_editor.diagnostic_at(event.pos().y())
+            if message is None:
+                QToolTip.hideText()
+                event.ignore()
+            else:
+                QToolTip.showText(event.globalPos(), message, self)
+            return True
+        return super().event(event)
+
+
+##
+# Thread that looks for the errors of a text with Assembler.diagnose,
+# out of the graphic interface thread
+#
+class DiagnosticsWorker(QThread):
+    diagnosed = Signal(int, list)
+
+    ##
+    # @param text checked
+    # @param revision of the text on the editor
+    def __init__(self, text, revision):
+        super().__init__()
+        self.text = text
+        self.revision = revision
+
+    def run(self):
+        self.diagnosed.emit(self.revision, Assembler().diagnose(self.text))
+
 
+##
+# Text editor with line numbers. The text is checked on the
+# background DIAGNOSTICS_DELAY milliseconds after the last change and
+# the numbers of the lines with errors are marked; their messages
+# are shown as tool tips.
+#
 class CodeEditor(QPlainTextEdit):
+    DIAGNOSTICS_DELAY = 500
+    MARKER_COLOR = QColor(200, 40, 40)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.line_number_area = LineNumberArea(self)
 
+        # line number (from 0) -> errors of the line
+        self.diagnostics = dict()
+        # incremented on each change, tells the results of old texts
+        self.revision = 0
+        self.diagnostics_worker = None
+        self.diagnostics_timer = QTimer(self)
+        self.diagnostics_timer.setSingleShot(True)
+        self.diagnostics_timer.setInterval(self.DIAGNOSTICS_DELAY)
+        self.diagnostics_timer.timeout.connect(self.start_diagnostics)
+
         self.blockCountChanged.connect(self.update_line_number_area_width)
         self.updateRequest.connect(self.update_line_number_area)
         self.cursorPositionChanged.connect(self.highlight_current_line)
+        self.textChanged.connect(self.schedule_diagnostics)
 
         self.update_line_number_area_width(0)
 
@@ -117,6 +172,83 @@ class CodeEditor(QPlainTextEdit):
             extraSelections.append(selection)
         self.setExtraSelections(extraSelections)
 
+    ##
+    # Checks the text again when it stops changing
+    #
+    def schedule_diagnostics(self):
+        self.revision += 1
+        if not self.isReadOnly():
+            self.diagnostics_timer.start()
+
+    ##
+    # Starts the check of the text on a DiagnosticsWorker. If a check
+    # is running, the text is checked again when it ends.
+    #
+    def start_diagnostics(self):
+        if self.isReadOnly():
+            return
+        if self.diagnostics_worker is not None and self.diagnostics_worker.isRunning():
+            return
+
+        self.diagnostics_worker = DiagnosticsWorker(self.toPlainText(), self.revision)
+        self.diagnostics_worker.diagnosed.connect(self.show_diagnostics)
+        self.diagnostics_worker.start()
+
+    ##
+    # Marks the lines with errors found by a DiagnosticsWorker
+    #
+    # @param revision of the checked text
+    # @param errors list of (line, message) pairs, see Assembler.diagnose
+    def show_diagnostics(self, revision, errors):
+        if revision != self.revision:
+            # the text changed during the check
+            self.diagnostics_timer.start()
+            return
+
+        diagnostics = dict()
+        for line, message in errors:
+            if line - 1 in diagnostics:
+                diagnostics[line - 1] += f'\n{message}'
+            else:
+                diagnostics[line - 1] = message
+        self.diagnostics = diagnostics
+        self.line_number_area.update()
+
+    ##
+    # Shows a text that is neither edited nor checked, like the
+    # machine code of an object or the disassembly of an image (see
+    # MainWindow.object_open and MainWindow.image_open), with a line
+    # on the view
+    #
+    # @param text shown
+    # @param line number (from 0) of the line kept on the view
+    def show_listing(self, text, line=0):
+        self.setReadOnly(True)
+        self.diagnostics = dict()
+        self.setPlainText(text)
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.Down, QTextCursor.MoveAnchor, line)
+        self.setTextCursor(cursor)
+        self.centerCursor()
+
+    ##
+    # Makes the text editable again, see show_listing
+    #
+    def show_editable(self):
+        if self.isReadOnly():
+            self.setReadOnly(False)
+            self.clear()
+
+    ##
+    # Returns the errors of the line at a height of the line number
+    # area, or None if the line has no errors
+    #
+    # @param y coordinate on the line number area
+    def diagnostic_at(self, y):
+        if not self.diagnostics:
+            return None
+        return self.diagnostics.get(self.cursorForPosition(QPoint(0, y)).blockNumber())
+
     ##
     # It deals with the drawing of the area of the numbers on the left
     #
@@ -138,7 +270,12 @@ class CodeEditor(QPlainTextEdit):
 
                 # cor dos números da área lateral
                 # bkp original
-                painter.setPen(Qt.black)
+                if blockNumber in self.diagnostics:
+                    painter.fillRect(0, int(top), self.line_number_area.width(),
+                                     height, self.MARKER_COLOR)
+                    painter.setPen(Qt.white)
+                else:
+                    painter.setPen(Qt.black)
 
                 painter.drawText(
                     0,
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package ui_engine_worker
+#
+#   Runs the engine outside of the graphic interface thread.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from PySide2.QtCore import QObject, QThread, QTimer, Signal
+from observer import EngineObserver
+import threading
+
+
+##
+# Observer that forwards the engine notifications to the main
+# window through Qt signals. Notifications sent by the worker
+# thread are queued and handled on the graphic interface thread.
+#
+# Requests to refresh the registers, memory and pc displays only
+# mark them as outdated. A timer renders the outdated parts from
+# a snapshot of the engine REFRESH_RATE times per second, so the
+# execution speed does not depend on the cost of repainting. The
+# snapshot is taken under the lock of the engine, that the worker
+# holds while it changes the machine.
+#
+class QueuedObserver(QObject, EngineObserver):
+    REFRESH_RATE = 30
+    SAMPLED_CALLS = ['clear_memory_table',
+                     'update_registers_table',
+                     'update_memory_table',
+                     'update_ui_pc',
+                     'update_ui_instruction_register']
+
+    call_requested = Signal(str)
+    log_requested = Signal(str)
+
+    def __init__(self, window):
+        super().__init__()
+        self.window = window
+        # names requested by the worker thread, taken by the timer
+        self.outdated = set()
+        self.outdated_lock = threading.Lock()
+
+        self.call_requested.connect(self.call_window)
+        self.log_requested.connect(window.log_on_console)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(int(1000 / self.REFRESH_RATE))
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+
+    ##
+    # Calls a method of the main window (graphic interface thread)
+    #
+    # @param name of the method
+    def call_window(self, name):
+        getattr(self.window, name)()
+
+    ##
+    # Renders the outdated parts of the main window
+    #
+    def refresh(self):
+        with self.outdated_lock:
+            if not self.outdated:
+                return
+            outdated, self.outdated = self.outdated, set()
+        self.window.refresh_interface(outdated)
+
+    ##
+    # Requests a call to a method of the main window
+    #
+    # @param name of the method
+    def request(self, name):
+        if name in self.SAMPLED_CALLS:
+            with self.outdated_lock:
+                self.outdated.add(name)
+        else:
+            self.call_requested.emit(name)
+
+    def update_registers_table(self):
+        self.request('update_registers_table')
+
+    def update_memory_table(self):
+        self.request('update_memory_table')
+
+    def clear_memory_table(self):
+        self.request('clear_memory_table')
+
+    def update_ui_pc(self):
+        self.request('update_ui_pc')
+
+    def update_ui_instruction_register(self):
+        self.request('update_ui_instruction_register')
+
+    def change_pc_bg(self):
+        self.request('change_pc_bg')
+
+    def change_back_pc_bg(self):
+        self.request('change_back_pc_bg')
+
+    def log_on_console(self, text):
+        self.log_requested.emit(str(text))
+
+    def console_space(self):
+        self.request('console_space')
+
+    def enable_execution_button(self):
+        self.request('enable_execution_button')
+
+    def enable_step_button(self):
+        self.request('enable_step_button')
+
+    def disable_step_button(self):
+        self.request('disable_step_button')
+
+
+##
+# Thread that executes a program on the engine
+#
+class EngineWorker(QThread):
+    ##
+    # @param engine that executes the program
+    # @param text source of the program
+    # @param run method of the engine that executes the source
+    # (None: Engine.run; see Engine.run_image)
+    def __init__(self, engine, text, run=None):
+        super().__init__()
+        self.engine = engine
+        self.text = text
+        self.run_engine = run or engine.run
+
+    def run(self):
+        self.run_engine(self.text)
@@ -480,7 +480,7 @@ class Help(QWidget):
             '<h2>Diretivas</h2>' \
             '<p>' \
             '    As diretivas permitem que o programador indique como o montador deve' \
-            '    operar. O kindA tem apenas uma diretiva: “.fill”.' \
+            '    operar. O kindA tem as diretivas “.fill”, “.space”, “.array” e “.incbin”.' \
             '</p>' \
             '<ul>' \
             '    <li>Funcionamento</li>' \
@@ -509,6 +509,30 @@ class Help(QWidget):
             '        <td>valor</td>' \
             '    </tr>' \
             '</table>' \
+            '<br>' \
+            '<ul>' \
+            '    <li>Funcionamento</li>' \
+            '    <li class="subitem">' \
+            '        <ul>' \
+            '            <li>.space: reserva um bloco de palavras com zero. Cada bloco tem no máximo 1048576 palavras.</li>' \
+            '            <li>.array: salva em memória uma palavra para cada valor, ' \
+            '                separados por espaços ou vírgulas.' \
+            '            </li>' \
+            '            <li>.incbin: salva em memória o conteúdo de um arquivo binário, ' \
+            '                em palavras de 32 bits little endian.' \
+            '            </li>' \
+            '            <li>O label da linha marca o endereço da primeira palavra do bloco.</li>' \
+            '        </ul>' \
+            '    </li>' \
+            '    <li>Sintaxe:</li>' \
+            '    <li class="subitem">' \
+            '        <ul>' \
+            '            <li>.space tamanho</li>' \
+            '            <li>.array valor, valor, ...</li>' \
+            '            <li>.incbin arquivo</li>' \
+            '        </ul>' \
+            '    </li>' \
+            '</ul>' \
             '' \
             '<br>' \
             '<h2>Labels</h2>' \
@@ -45,10 +45,14 @@ class Window(QMainWindow):
         self.action_avancar = None
         self.action_traduzir = None
         self.action_parar = None
+        self.action_pausar = None
+        self.action_continuar = None
         self.action_salvar = None
         self.action_salvar_como = None
         self.action_exportar = None
+        self.action_exportar_python = None
         self.action_abrir = None
+        self.action_carregar_imagem = None
         self.action_fechar = None
         self.action_sair = None
         self.action_sobre = None
@@ -222,7 +226,9 @@ class Window(QMainWindow):
             self)
         self.action_salvar_como = QAction('Salvar como...', self)
         self.action_exportar = QAction('Exportar...', self)
+        self.action_exportar_python = QAction('Exportar para Python...', self)
         self.action_abrir = QAction(QIcon('assets/icon_open.png'), 'Abrir...', self)
+        self.action_carregar_imagem = QAction('Carregar imagem...', self)
         self.action_fechar = QAction('Fechar documento...', self)
         self.action_sair = QAction('Sair', self)
         self.action_salvar.setShortcut(QKeySequence('Ctrl+s'))
@@ -235,12 +241,16 @@ class Window(QMainWindow):
         self.action_avancar = QAction(QIcon('assets/icon_avacar.png'), 'Avançar', self)
         self.action_traduzir = QAction(QIcon('assets/icon_translate.png'), 'Traduzir', self)
         self.action_parar = QAction(QIcon('assets/icon_stop.png'), 'Parar execução', self)
+        self.action_pausar = QAction('Pausar execução', self)
+        self.action_continuar = QAction('Continuar execução', self)
         self.action_redefinir = QAction('Redefinir máquina virtual', self)
         self.action_executar.setShortcut(QKeySequence('Shift+F10'))
         self.action_executar_etapas.setShortcut(QKeySequence('Shift+F9'))
         self.action_avancar.setShortcut(QKeySequence('F7'))
         self.action_traduzir.setShortcut(QKeySequence('Ctrl+t'))
-        self.action_parar.setShortcut(QKeySequence('Shift+F9'))
+        self.action_parar.setShortcut(QKeySequence('Ctrl+F2'))
+        self.action_pausar.setShortcut(QKeySequence('F8'))
+        self.action_continuar.setShortcut(QKeySequence('F9'))
 
         # AJUDA
         self.action_sobre = QAction('Sobre', self)
@@ -249,15 +259,20 @@ class Window(QMainWindow):
         # Adding itens to menu
         # Arquivo
         menu_arquivo.addAction(self.action_abrir)
+        menu_arquivo.addAction(self.action_carregar_imagem)
         menu_arquivo.addAction(self.action_fechar)
         menu_arquivo.addSeparator()
         menu_arquivo.addAction(self.action_salvar)
         menu_arquivo.addAction(self.action_salvar_como)
         menu_arquivo.addAction(self.action_exportar)
+        menu_arquivo.addAction(self.action_exportar_python)
         menu_arquivo.addSeparator()
         menu_arquivo.addAction(self.action_sair)
         # Executar
         menu_executar.addAction(self.action_executar)
+        menu_executar.addAction(self.action_pausar)
+        menu_executar.addAction(self.action_continuar)
+        menu_executar.addAction(self.action_parar)
         menu_executar.addAction(self.action_executar_etapas)
         menu_executar.addAction(self.action_avancar)
         menu_executar.addAction(self.action_traduzir)
@@ -276,10 +291,14 @@ class Window(QMainWindow):
         # Dial button screen
         self.lcd_clock_value.display(00)
         self.lcd_clock_value.setStyleSheet('border: 1px solid #4D5154;')
-        self.lcd_clock_value.setMaximumWidth(60)
+        self.lcd_clock_value.setDigitCount(7)
+        self.lcd_clock_value.setMaximumWidth(100)
 
         # Disabling actions
         self.action_avancar.setDisabled(True)
+        self.action_pausar.setDisabled(True)
+        self.action_continuar.setDisabled(True)
+        self.action_parar.setDisabled(True)
         # self.action_ajustar_clock.setDisabled(True)
         self.action_fechar.setDisabled(True)
 
@@ -309,6 +328,9 @@ class Window(QMainWindow):
         toolbar.addSeparator()
         toolbar.addAction(self.action_traduzir)
         toolbar.addAction(self.action_executar)
+        toolbar.addAction(self.action_pausar)
+        toolbar.addAction(self.action_continuar)
+        toolbar.addAction(self.action_parar)
         toolbar.addSeparator()
         toolbar.addAction(self.action_executar_etapas)
         toolbar.addAction(self.action_avancar)
@@ -318,8 +340,8 @@ class Window(QMainWindow):
 
         toolbar.addWidget(self.lcd_clock_value)
 
-        # seconds label
-        lbl_segundos = QLabel('s')
+        # instructions per second label
+        lbl_segundos = QLabel('ips')
         lbl_segundos.setAlignment(Qt.AlignLeft | Qt.AlignBottom)
         lbl_segundos.setStyleSheet('font-size: 15px;color: #9BAEC1')
         toolbar.addWidget(lbl_segundos)
@@ -8,19 +8,42 @@
 #   @author Nathaniel Ramalho
 #   @since 11/28/2020
 #
+from observer import EngineObserver
+from paged_memory import PagedMemory
+
+
+##
+# The context receives the notifications of every state change.
+# When no context is given the machine runs headless.
+# The main memory is a PagedMemory (or any memory with its interface,
+# like a MappedMemory) and the blocked range of addresses is kept
+# apart, in blocked_address.
+#
+# decode_cache keeps the instructions decoded from the words of the
+# main memory, indexed by address. It is filled by the Engine and a
+# store removes only the entry of its address.
+#
+# @see EngineObserver
+# @see PagedMemory
+# @see MappedMemory
 class VirtualMachine:
     AVAILABLE_REGISTERS = [0, 1, 2, 3, 4, 5, 6, 7]
     MAX_MEM_ADDRESS = 4294967296
     WORD_SIZE = 32
-    BLOCKED_ADDRESS_KEY = 'freeze'
 
-    def __init__(self, context):
+    def __init__(self, context=None, main_memory=None):
+        if context is None:
+            context = EngineObserver()
         self.context = context
 
+        if main_memory is None:
+            main_memory = PagedMemory()
+
         self.registers = [0] * 8
         self.labels = dict()
-        self.main_memory = dict()
-        self.unblock_memory()
+        self.main_memory = main_memory
+        self.decode_cache = dict()
+        self.blocked_address = -1
         self.pc = 0
         self.instruction_register = 0
 
@@ -58,6 +81,7 @@ class VirtualMachine:
     #
     def clear_main_memory(self):
         self.main_memory.clear()
+        self.decode_cache.clear()
         self.unblock_memory()
 
         self.context.clear_memory_table()
@@ -68,13 +92,13 @@ class VirtualMachine:
     # @param last index that will be blocked
     #
     def block_memory(self, index):
-        self.main_memory[self.BLOCKED_ADDRESS_KEY] = index
+        self.blocked_address = index
 
     ##
     # Unblock all memory addresses
     #
     def unblock_memory(self):
-        self.main_memory[self.BLOCKED_ADDRESS_KEY] = -1
+        self.blocked_address = -1
 
     ##
     # Returns the last blocked memory address
@@ -82,7 +106,7 @@ class VirtualMachine:
     # @return last index of blocked memory
     #
     def get_blocked_memory_addresses(self):
-        return self.main_memory[self.BLOCKED_ADDRESS_KEY]
+        return self.blocked_address
 
     ##
     # Retrieves a value from memory at an informed address.
@@ -91,10 +115,7 @@ class VirtualMachine:
     # @return data at the address
     def get_main_memory_value(self, address: int):
         if 0 <= address <= self.MAX_MEM_ADDRESS:
-            try:
-                data = self.main_memory[address]
-            except KeyError:
-                return 0
+            data = self.main_memory.get(address, 0)
         else:
             raise ValueError(f'O endereço "{address}" da memória '
                              f'principal não pode ser acessado.')
@@ -111,11 +132,63 @@ class VirtualMachine:
 
         if 0 <= address <= self.MAX_MEM_ADDRESS:
             self.main_memory[address] = value
+            self.decode_cache.pop(address, None)
         else:
             raise ValueError(f'O endereço "{address}" da memória principal não pode ser acessado.')
         if blocked_addresses > -1:
             self.context.update_memory_table()
 
+    ##
+    # Reads a block of words of the main memory, without a call per
+    # word. The block supports the buffer protocol, so it can be used
+    # by array, bytes or numpy.frombuffer.
+    # raises ValueError if the block is out of memory addresses range
+    #
+    # @param address of the first word
+    # @param count number of words
+    # @return buffer with the words (see PagedMemory.read_block)
+    def read_block(self, address, count):
+        if not (0 <= address and 0 <= count and address + count - 1 <= self.MAX_MEM_ADDRESS):
+            raise ValueError(f'O bloco de {count} palavras no endereço "{address}" da memória '
+                             f'principal não pode ser acessado.')
+        try:
+            return self.main_memory.read_block(address, count)
+        except KeyError:
+            raise ValueError(f'O bloco de {count} palavras no endereço "{address}" da memória '
+                             f'principal não pode ser acessado.')
+
+    ##
+    # Writes a block of words on the main memory, like
+    # set_main_memory_value on each address of the block
+    # raises ValueError if the block is out of memory addresses range
+    # or is not a block of words
+    #
+    # @param address of the first word
+    # @param words buffer of words (array, memoryview, bytes or a
+    # NumPy array)
+    def write_block(self, address, words):
+        blocked_addresses = self.get_blocked_memory_addresses()
+
+        words = PagedMemory.as_words(words)
+        count = len(words)
+        if not (0 <= address and address + count - 1 <= self.MAX_MEM_ADDRESS):
+            raise ValueError(f'O bloco de {count} palavras no endereço "{address}" da memória '
+                             f'principal não pode ser acessado.')
+        try:
+            self.main_memory.write_block(address, words)
+        except KeyError:
+            raise ValueError(f'O bloco de {count} palavras no endereço "{address}" da memória '
+                             f'principal não pode ser acessado.')
+
+        if count < len(self.decode_cache):
+            for i in range(address, address + count):
+                self.decode_cache.pop(i, None)
+        else:
+            for i in [i for i in self.decode_cache if address <= i < address + count]:
+                del self.decode_cache[i]
+        if blocked_addresses > -1:
+            self.context.update_memory_table()
+
     ##
     # clears data from memory, registers, labels, etc. of the virtual machine
     #
@@ -225,12 +298,10 @@ class VirtualMachine:
             msg += f'r{i}: {val} | '
         msg += '\n'
         alt = '{'
-        for i, k in enumerate(self.main_memory.keys()):
-            if k == self.BLOCKED_ADDRESS_KEY:
-                continue
-            if i == self.pc:
+        for k, value in self.main_memory.items():
+            if k == self.pc:
                 alt += '->'
-            alt += f'{k}: \'{self.main_memory[k]}\', '
+            alt += f'{k}: \'{value}\', '
         alt += '}'
         msg += f'Memoria principal: {alt}\n'
         # msg += f'Memoria principal: {self.main_memory}\n'
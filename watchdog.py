@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# coding: UTF-8
+#
+## @package watchdog
+#
+#   Resource limits of an execution.
+#
+#   @author Nathaniel Ramalho
+#   @since 11/28/2020
+#
+from time import perf_counter
+
+
+##
+# Describes why an execution ended
+#
+class TerminationReason:
+    HALTED = 'halted'
+    INVALID_PC = 'invalid_pc'
+    ERROR = 'error'
+    STOPPED = 'stopped'
+    STEP_LIMIT = 'step_limit'
+    TIME_LIMIT = 'time_limit'
+    MEMORY_LIMIT = 'memory_limit'
+    LIMITS = (STEP_LIMIT, TIME_LIMIT, MEMORY_LIMIT)
+
+    ##
+    # @param reason one of the constants of the class
+    # @param message shown to the user
+    # @param steps instructions executed until the end
+    # @param elapsed seconds of execution
+    # @param addresses memory addresses in use at the end
+    def __init__(self, reason, message='', steps=0, elapsed=0.0, addresses=0):
+        self.reason = reason
+        self.message = str(message)
+        self.steps = steps
+        self.elapsed = elapsed
+        self.addresses = addresses
+
+    ##
+    # Returns true if the execution was ended by the Watchdog
+    #
+    @property
+    def is_limit(self):
+        return self.reason in self.LIMITS
+
+    def __repr__(self):
+        return f'{self.reason}: {self.message}'
+
+
+##
+# The Watchdog ends executions that exceed a number of executed
+# instructions, a wall-clock time or a number of distinct main
+# memory addresses in use. A limit of None is not checked.
+#
+# The Engine calls check between two instructions (or two batches
+# of instructions) and limits the batches with batch_size, so the
+# step and memory limits are never exceeded by more than one
+# instruction.
+#
+# @see Engine
+class Watchdog:
+    def __init__(self, max_steps=None, max_time=None, max_memory=None):
+        self.max_steps = None
+        self.max_time = None
+        self.max_memory = None
+        self.start_time = perf_counter()
+        self.set_limits(max_steps, max_time, max_memory)
+
+    ##
+    # Changes the limits
+    # raises *ValueError* if a limit is not positive
+    #
+    # @param max_steps instructions executed
+    # @param max_time seconds of execution
+    # @param max_memory distinct main memory addresses in use
+    def set_limits(self, max_steps=None, max_time=None, max_memory=None):
+        for value, name in ((max_steps, 'instruções'), (max_time, 'tempo'),
+                            (max_memory, 'memória')):
+            if value is not None and value <= 0:
+                raise ValueError(f'O limite de {name} deve ser positivo.')
+
+        self.max_steps = max_steps
+        self.max_time = max_time
+        self.max_memory = max_memory
+
+    ##
+    # Returns true if there is any limit to check
+    #
+    def is_active(self):
+        return (self.max_steps is not None or self.max_time is not None
+                or self.max_memory is not None)
+
+    ##
+    # Starts counting the time of a new execution
+    #
+    def start(self):
+        self.start_time = perf_counter()
+
+    ##
+    # Returns the seconds since the start of the execution
+    #
+    def elapsed(self):
+        return perf_counter() - self.start_time
+
+    ##
+    # Returns how many addresses of the main memory are in use
+    #
+    @staticmethod
+    def used_addresses(memory):
+        return len(memory)
+
+    ##
+    # Returns how many instructions the next batch may have.
+    # Each instruction uses at most one new memory address.
+    #
+    # @param steps instructions executed until now
+    # @param memory main memory of the virtual machine
+    # @param limit size of the batch without limits
+    def batch_size(self, steps, memory, limit):
+        if self.max_steps is not None:
+            limit = min(limit, self.max_steps - steps)
+        if self.max_memory is not None:
+            limit = min(limit, self.max_memory - self.used_addresses(memory) + 1)
+        return max(1, limit)
+
+    ##
+    # Checks the limits
+    #
+    # @param steps instructions executed until now
+    # @param memory main memory of the virtual machine
+    # @return TerminationReason of the exceeded limit or None
+    def check(self, steps, memory):
+        elapsed = self.elapsed()
+        addresses = self.used_addresses(memory)
+
+        if self.max_steps is not None and steps >= self.max_steps:
+            reason = TerminationReason.STEP_LIMIT
+            message = f'limite de {self.max_steps} instruções atingido.'
+        elif self.max_memory is not None and addresses > self.max_memory:
+            reason = TerminationReason.MEMORY_LIMIT
+            message = f'limite de {self.max_memory} endereços de memória excedido.'
+        elif self.max_time is not None and elapsed >= self.max_time:
+            reason = TerminationReason.TIME_LIMIT
+            message = f'limite de {self.max_time:g} segundos atingido.'
+        else:
+            return None
+
+        return TerminationReason(reason, f'Execução interrompida: {message}',
+                                 steps, elapsed, addresses)